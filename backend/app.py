@@ -1,37 +1,6 @@
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
-from flask_cors import CORS
-from flask_migrate import Migrate
-from dotenv import load_dotenv
-import os
+from app import create_app
 
-load_dotenv()
-
-db = SQLAlchemy()
-jwt = JWTManager()
-migrate = Migrate()
-
-def create_app():
-    app = Flask(__name__)
-    
-    # Configuration
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///roomieflow.db')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'dev-secret-key')
-    
-    # Initialize extensions
-    db.init_app(app)
-    jwt.init_app(app)
-    migrate.init_app(app, db)
-    CORS(app)
-    
-    @app.route('/api/health')
-    def health_check():
-        return {'status': 'healthy', 'message': 'RoomieFlow API is running'}
-    
-    return app
+app = create_app()
 
 if __name__ == '__main__':
-    app = create_app()
     app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
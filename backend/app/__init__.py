@@ -0,0 +1,180 @@
+from flask import Flask, Response, request, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from flask_jwt_extended import JWTManager, verify_jwt_in_request, get_jwt_identity
+from flask_cors import CORS
+from flask_migrate import Migrate
+from dotenv import load_dotenv
+from datetime import timedelta
+import hmac
+import os
+
+load_dotenv()
+
+db = SQLAlchemy()
+jwt = JWTManager()
+migrate = Migrate()
+
+def create_app():
+    app = Flask(__name__)
+    
+    # Configuration
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///roomieflow.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'dev-secret-key')
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', '15')))
+    app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', '30')))
+    app.config['TOKEN_REVOCATION_SYNC_SECONDS'] = int(os.getenv('TOKEN_REVOCATION_SYNC_SECONDS', '30'))
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+    app.config['SQL_QUERY_BUDGET'] = int(os.getenv('SQL_QUERY_BUDGET', '0'))
+    app.config['SQL_QUERY_BUDGET_MODE'] = os.getenv('SQL_QUERY_BUDGET_MODE', 'warn')
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    app.config['PROFILE_MAX_FILES'] = int(os.getenv('PROFILE_MAX_FILES', '50'))
+    app.config['ARCHIVE_HORIZON_DAYS'] = int(os.getenv('ARCHIVE_HORIZON_DAYS', '365'))
+    app.config['ARCHIVE_CHUNK_SIZE'] = int(os.getenv('ARCHIVE_CHUNK_SIZE', '1000'))
+    app.config['NOTIFY_TRANSPORT'] = os.getenv('NOTIFY_TRANSPORT', 'log')
+    app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'localhost')
+    app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', '25'))
+    app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
+    app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'false').lower() == 'true'
+    app.config['MAIL_SENDER'] = os.getenv('MAIL_SENDER', 'RoomieFlow <noreply@roomieflow.local>')
+    app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATELIMIT_STORAGE'] = os.getenv('RATELIMIT_STORAGE', 'memory')
+    app.config['RATELIMIT_TRUST_FORWARDED_FOR'] = os.getenv('RATELIMIT_TRUST_FORWARDED_FOR', 'false').lower() == 'true'
+    app.config['LOADSHED_ENABLED'] = os.getenv('LOADSHED_ENABLED', 'true').lower() == 'true'
+    app.config['LOADSHED_MAX_CONCURRENCY'] = int(os.getenv('LOADSHED_MAX_CONCURRENCY', '16'))
+    app.config['SHARD_DATABASE_URLS'] = os.getenv('SHARD_DATABASE_URLS', '')
+    app.config['CHART_WARM_ENABLED'] = os.getenv('CHART_WARM_ENABLED', 'false').lower() == 'true'
+    app.config['CHART_WARM_WEEKS'] = int(os.getenv('CHART_WARM_WEEKS', '2'))
+    app.config['CHART_WARM_CPU_BUDGET'] = float(os.getenv('CHART_WARM_CPU_BUDGET', '0.2'))
+    app.config['RESPONSE_CACHE_ENABLED'] = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    app.config['RESPONSE_CACHE_SHARED'] = os.getenv('RESPONSE_CACHE_SHARED', '')
+    app.config['SQLITE_PROFILE'] = os.getenv('SQLITE_PROFILE', 'off')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    app.config['SQLITE_WRITER_TIMEOUT'] = float(os.getenv('SQLITE_WRITER_TIMEOUT', '30'))
+    app.config['READ_TIER_DATABASE_URL'] = os.getenv('READ_TIER_DATABASE_URL')
+    app.config['READ_TIER_POOL_SIZE'] = int(os.getenv('READ_TIER_POOL_SIZE', '20'))
+    app.config['READ_TIER_MAX_OVERFLOW'] = int(os.getenv('READ_TIER_MAX_OVERFLOW', '10'))
+    if os.getenv('PROFILE_DIR'):
+        app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR')
+    
+    # Optional sharding by property_id; adds the shard binds, so it runs before db.init_app
+    from app.utils.sharding import shard_router
+    shard_router.init_app(app)
+    
+    # Initialize extensions
+    db.init_app(app)
+    jwt.init_app(app)
+    migrate.init_app(app, db)
+    CORS(app)
+    
+    # WAL pragmas and a single writer queue per SQLite database (SQLITE_PROFILE=production)
+    from app.utils.sqlite_profile import sqlite_profile
+    sqlite_profile.init_app(app)
+    
+    # Per-endpoint latency and SQL statistics, plus the N+1 query guard
+    from app.utils.metrics import request_metrics
+    request_metrics.init_app(app)
+    
+    # Token-bucket limits on login, registration and booking creation
+    from app.utils.ratelimit import rate_limiter
+    rate_limiter.init_app(app)
+    
+    # Priority admission control: shed admin listings and reads before writes and auth
+    from app.utils.loadshed import load_shedder
+    load_shedder.init_app(app)
+    
+    # Opt-in cProfile capture, by admin header or sampling rate
+    from app.utils.profiling import request_profiler
+    request_profiler.init_app(app)
+    
+    # Token revocation is checked in memory so refresh never touches the users table
+    from app.utils.revocation import revocation_registry
+    revocation_registry.init_app(app)
+    
+    # Compress large JSON payloads and answer repeat polls with 304
+    from app.utils.compression import response_compressor
+    response_compressor.init_app(app)
+    
+    # Move old bookings to the archive table; history reads union both
+    from app.utils.archive import booking_archive
+    booking_archive.init_app(app)
+    
+    # Places taken per room session, admitted up to the room's capacity (flask rebuild-slot-counts)
+    from app.utils.slots import slot_counter
+    slot_counter.init_app(app)
+    
+    # Stored quota-week key of each booking, from its property's reset day (flask rebuild-quota-weeks)
+    from app.utils.quota_weeks import quota_weeks
+    quota_weeks.init_app(app)
+    
+    # Cached iCalendar feeds for calendar subscriptions
+    from app.utils.calendar import calendar_feeds
+    calendar_feeds.init_app(app)
+    
+    # Append-only change log behind the delta sync API (flask compact-change-log)
+    from app.utils.changelog import change_log
+    change_log.init_app(app)
+    
+    # Chart and usage payloads per property and week, with an optional background warmer
+    from app.utils.chart_cache import chart_cache
+    chart_cache.init_app(app)
+    
+    # Rendered chart and usage responses, in process and optionally shared between workers
+    from app.utils.response_cache import response_cache
+    response_cache.init_app(app)
+    
+    # Notification outbox delivery (flask send-notifications)
+    from app.utils.notifications import outbox_sender
+    outbox_sender.init_app(app)
+    
+    @jwt.token_in_blocklist_loader
+    def check_token_revoked(jwt_header, jwt_payload):
+        return revocation_registry.is_revoked(jwt_payload['sub'], jwt_payload.get('epoch', 0))
+    
+    # Register blueprints
+    from app.routes.auth import auth_bp
+    from app.routes.users import users_bp
+    from app.routes.properties import properties_bp
+    from app.routes.rooms import rooms_bp
+    from app.routes.bookings import bookings_bp
+    from app.routes.usage import usage_bp
+    from app.routes.admin import admin_bp
+    from app.routes.bulk import bulk_bp
+    from app.routes.calendar import calendar_bp
+    from app.routes.batch import batch_bp
+    from app.routes.sync import sync_bp
+    
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(users_bp, url_prefix='/api/users')
+    app.register_blueprint(properties_bp, url_prefix='/api/properties')
+    app.register_blueprint(rooms_bp, url_prefix='/api/rooms')
+    app.register_blueprint(bookings_bp, url_prefix='/api/bookings')
+    app.register_blueprint(usage_bp, url_prefix='/api/usage')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(bulk_bp, url_prefix='/api/bulk')
+    app.register_blueprint(calendar_bp, url_prefix='/api/calendar')
+    app.register_blueprint(batch_bp, url_prefix='/api/batch')
+    app.register_blueprint(sync_bp, url_prefix='/api/sync')
+    
+    @app.route('/api/health')
+    def health_check():
+        return {'status': 'healthy', 'message': 'RoomieFlow API is running'}
+    
+    @app.route('/api/metrics')
+    def metrics():
+        # Scrapers send METRICS_TOKEN; without it only admins get in
+        token = app.config['METRICS_TOKEN']
+        if not (token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')):
+            from app.models.user import User
+            try:
+                verify_jwt_in_request()
+                user = User.query.get(get_jwt_identity())
+            except Exception:
+                user = None
+            if user is None or user.role != 'admin':
+                return jsonify({'error': 'Access denied'}), 403
+        return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+    
+    return app
\ No newline at end of file
@@ -1,29 +1,46 @@
 from app import db
-import uuid
+from app.models.types import CompactUUID, new_id
 from datetime import datetime
 
+# Predicate of the partial unique index; ON CONFLICT targets must repeat it verbatim
+ACTIVE_PREDICATE = "status IN ('pending', 'approved')"
+
 class BookingApplication(db.Model):
     __tablename__ = 'booking_applications'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
-    room_id = db.Column(db.String(36), db.ForeignKey('rooms.id'), nullable=False)
+    id = db.Column(CompactUUID, primary_key=True, default=new_id)
+    user_id = db.Column(CompactUUID, db.ForeignKey('users.id'), nullable=False)
+    room_id = db.Column(CompactUUID, db.ForeignKey('rooms.id'), nullable=False)
     booking_date = db.Column(db.Date, nullable=False)
     session_type = db.Column(db.Enum('morning', 'midday', 'evening', name='session_types'), nullable=False)
     status = db.Column(db.Enum('pending', 'approved', 'rejected', name='booking_status'), 
                       default='pending', nullable=False)
     notes = db.Column(db.Text)
     duration_value = db.Column(db.Float, nullable=False)  # 0.5 for morning, 1.0 for midday/evening
+    quota_week = db.Column(db.Date, nullable=False)  # First day of the property's quota week (app.utils.quota_weeks)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    approved_by = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
+    approved_by = db.Column(CompactUUID, db.ForeignKey('users.id'), nullable=True)
     approval_notes = db.Column(db.Text)
     
     # Relationships
     approver = db.relationship('User', foreign_keys=[approved_by], backref='approved_bookings')
     
-    # Unique constraint to prevent duplicate bookings for same room/date/session
-    __table_args__ = (db.UniqueConstraint('room_id', 'booking_date', 'session_type'),)
+    # A slot takes up to the room's capacity (counted in BookingSlot), one active booking per member
+    __table_args__ = (
+        db.Index(
+            'ix_booking_applications_active_member_slot', 'room_id', 'booking_date', 'session_type', 'user_id',
+            unique=True,
+            sqlite_where=db.text(ACTIVE_PREDICATE),
+            postgresql_where=db.text(ACTIVE_PREDICATE)
+        ),
+        db.Index('ix_booking_applications_user_date', 'user_id', 'booking_date'),
+        # Usage per quota week: one member's week, and every booking of a week by room
+        db.Index('ix_booking_applications_user_quota_week', 'user_id', 'quota_week'),
+        db.Index('ix_booking_applications_quota_week_room', 'quota_week', 'room_id'),
+        # Pending-approval queue: per-room seeks on status, already in date order
+        db.Index('ix_booking_applications_room_status_date', 'room_id', 'status', 'booking_date')
+    )
     
     def to_dict(self):
         """Convert booking application object to dictionary."""
@@ -55,4 +72,53 @@ class BookingApplication(db.Model):
         return duration_map.get(session_type, 0.0)
     
     def __repr__(self):
-        return f'<BookingApplication {self.user_id} - {self.room_id} - {self.booking_date} - {self.session_type}>'
\ No newline at end of file
+        return f'<BookingApplication {self.user_id} - {self.room_id} - {self.booking_date} - {self.session_type}>'
+
+class BookingSlot(db.Model):
+    """Number of pending and approved bookings in one session of one room.
+    
+    Maintained by app.utils.slots: a booking is only admitted by an atomic
+    increment that stays within the room's capacity.
+    """
+    __tablename__ = 'booking_slots'
+    
+    room_id = db.Column(CompactUUID, db.ForeignKey('rooms.id'), primary_key=True)
+    booking_date = db.Column(db.Date, primary_key=True)
+    session_type = db.Column(db.Enum('morning', 'midday', 'evening', name='session_types'), primary_key=True)
+    booked = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<BookingSlot {self.room_id} - {self.booking_date} - {self.session_type}: {self.booked}>'
+
+class ArchivedBooking(db.Model):
+    """Cold copy of bookings that are past the archive horizon.
+    
+    Rows are moved here by app.utils.archive and keep their original ids. On
+    PostgreSQL the table is range-partitioned by booking_date month, so the
+    primary key has to include the partition column.
+    """
+    __tablename__ = 'booking_applications_archive'
+    
+    id = db.Column(CompactUUID, primary_key=True)
+    user_id = db.Column(CompactUUID, db.ForeignKey('users.id'), nullable=False)
+    room_id = db.Column(CompactUUID, db.ForeignKey('rooms.id'), nullable=False)
+    booking_date = db.Column(db.Date, primary_key=True)
+    session_type = db.Column(db.Enum('morning', 'midday', 'evening', name='session_types'), nullable=False)
+    status = db.Column(db.Enum('pending', 'approved', 'rejected', name='booking_status'), nullable=False)
+    notes = db.Column(db.Text)
+    duration_value = db.Column(db.Float, nullable=False)
+    quota_week = db.Column(db.Date, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime)
+    approved_by = db.Column(CompactUUID, db.ForeignKey('users.id'), nullable=True)
+    approval_notes = db.Column(db.Text)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_booking_archive_user_date', 'user_id', 'booking_date'),
+        db.Index('ix_booking_archive_room_date', 'room_id', 'booking_date'),
+        {'postgresql_partition_by': 'RANGE (booking_date)'}
+    )
+    
+    def __repr__(self):
+        return f'<ArchivedBooking {self.user_id} - {self.room_id} - {self.booking_date} - {self.session_type}>'
\ No newline at end of file
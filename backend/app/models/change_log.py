@@ -0,0 +1,32 @@
+from app import db
+from app.models.types import CompactUUID
+from datetime import datetime
+
+class ChangeLogEntry(db.Model):
+    """One created, updated or deleted property, room, membership or booking.
+    
+    Rows are appended by app.utils.changelog in the transaction of the change
+    and only hold ids; sync reads the current state of upserted rows. On
+    PostgreSQL txid holds the writing transaction, and entries are read in
+    (txid, seq) order; elsewhere it stays NULL and seq alone orders them.
+    """
+    __tablename__ = 'change_log'
+    
+    seq = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    txid = db.Column(db.BigInteger)
+    entity_type = db.Column(db.Enum('property', 'room', 'membership', 'booking', name='change_entities'), nullable=False)
+    entity_id = db.Column(CompactUUID, nullable=False)
+    property_id = db.Column(CompactUUID, nullable=False)
+    user_id = db.Column(CompactUUID)  # Member whose access a membership change affects
+    action = db.Column(db.Enum('upsert', 'delete', name='change_actions'), nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_change_log_property_seq', 'property_id', 'seq'),
+        db.Index('ix_change_log_user_seq', 'user_id', 'seq'),
+        db.Index('ix_change_log_property_type', 'property_id', 'entity_type', 'seq'),
+        db.Index('ix_change_log_entity', 'entity_type', 'entity_id', 'property_id', 'seq')
+    )
+    
+    def __repr__(self):
+        return f'<ChangeLogEntry {self.seq} {self.action} {self.entity_type} {self.entity_id}>'
\ No newline at end of file
@@ -0,0 +1,49 @@
+from app import db
+from app.models.types import CompactUUID, new_id
+from datetime import datetime
+import json
+
+class NotificationOutbox(db.Model):
+    __tablename__ = 'notification_outbox'
+    
+    id = db.Column(CompactUUID, primary_key=True, default=new_id)
+    recipient_id = db.Column(CompactUUID, db.ForeignKey('users.id'), nullable=False)
+    event_type = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON document describing the event
+    status = db.Column(db.Enum('pending', 'sending', 'sent', 'failed', name='outbox_status'),
+                       default='pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Not sent before this (backoff)
+    claimed_by = db.Column(db.String(64))  # Claim token of the worker batch holding the row
+    claimed_at = db.Column(db.DateTime)
+    sent_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_notification_outbox_status_available', 'status', 'available_at'),
+        db.Index('ix_notification_outbox_claimed_by', 'claimed_by')
+    )
+    
+    @property
+    def data(self):
+        """Get the decoded event payload."""
+        return json.loads(self.payload)
+    
+    def to_dict(self):
+        """Convert outbox entry to dictionary."""
+        return {
+            'id': self.id,
+            'recipient_id': self.recipient_id,
+            'event_type': self.event_type,
+            'payload': self.data,
+            'status': self.status,
+            'attempts': self.attempts,
+            'available_at': self.available_at.isoformat() if self.available_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<NotificationOutbox {self.recipient_id} - {self.event_type} - {self.status}>'
\ No newline at end of file
@@ -1,14 +1,14 @@
 from app import db
-import uuid
+from app.models.types import CompactUUID, new_id
 from datetime import datetime
 
 class Property(db.Model):
     __tablename__ = 'properties'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(CompactUUID, primary_key=True, default=new_id)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    owner_id = db.Column(CompactUUID, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     
@@ -35,9 +35,9 @@ class Property(db.Model):
 class PropertyMember(db.Model):
     __tablename__ = 'property_members'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    property_id = db.Column(db.String(36), db.ForeignKey('properties.id'), nullable=False)
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    id = db.Column(CompactUUID, primary_key=True, default=new_id)
+    property_id = db.Column(CompactUUID, db.ForeignKey('properties.id'), nullable=False)
+    user_id = db.Column(CompactUUID, db.ForeignKey('users.id'), nullable=False)
     role = db.Column(db.Enum('member', 'admin', name='member_roles'), default='member', nullable=False)
     invitation_status = db.Column(db.Enum('pending', 'accepted', 'rejected', name='invitation_status'), 
                                  default='pending', nullable=False)
@@ -1,12 +1,12 @@
 from app import db
-import uuid
+from app.models.types import CompactUUID, new_id
 from datetime import datetime
 
 class Room(db.Model):
     __tablename__ = 'rooms'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    property_id = db.Column(db.String(36), db.ForeignKey('properties.id'), nullable=False)
+    id = db.Column(CompactUUID, primary_key=True, default=new_id)
+    property_id = db.Column(CompactUUID, db.ForeignKey('properties.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     capacity = db.Column(db.Integer, nullable=False, default=1)
     description = db.Column(db.Text)
@@ -1,12 +1,16 @@
 from app import db
-import uuid
-from datetime import datetime
+from app.models.types import CompactUUID, new_id
+from datetime import datetime, timedelta
+
+def quota_week_start(day, reset_day_of_week=1):
+    """Get the first day of the quota week holding day, for weeks starting on reset_day_of_week (Monday = 1)."""
+    return day - timedelta(days=(day.isoweekday() - reset_day_of_week) % 7)
 
 class TimeAllocation(db.Model):
     __tablename__ = 'time_allocations'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    property_id = db.Column(db.String(36), db.ForeignKey('properties.id'), nullable=False, unique=True)
+    id = db.Column(CompactUUID, primary_key=True, default=new_id)
+    property_id = db.Column(CompactUUID, db.ForeignKey('properties.id'), nullable=False, unique=True)
     weekly_limit_days = db.Column(db.Float, nullable=False, default=7.0)  # Total days per week
     morning_duration = db.Column(db.Float, nullable=False, default=0.5)   # Morning session duration
     midday_duration = db.Column(db.Float, nullable=False, default=1.0)    # Midday session duration
@@ -40,5 +44,9 @@ class TimeAllocation(db.Model):
         }
         return duration_map.get(session_type, 0.0)
     
+    def week_start(self, day):
+        """Get the first day of the quota week holding day."""
+        return quota_week_start(day, self.reset_day_of_week)
+    
     def __repr__(self):
         return f'<TimeAllocation {self.property_id} - {self.weekly_limit_days} days/week>'
\ No newline at end of file
@@ -0,0 +1,34 @@
+from app import db
+from app.models.types import CompactUUID
+from datetime import datetime
+
+class TokenRevocation(db.Model):
+    """One logged-out session, or every session of a user up to an epoch.
+    
+    Workers pull new rows in (txid, seq) order like the change log: seq alone
+    on SQLite, where writers commit one at a time, and txid first on
+    PostgreSQL, where seq can commit out of order.
+    """
+    __tablename__ = 'token_revocations'
+    
+    seq = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    txid = db.Column(db.BigInteger)  # Writing transaction on PostgreSQL, NULL elsewhere
+    user_id = db.Column(CompactUUID, db.ForeignKey('users.id'), nullable=False, index=True)
+    epoch = db.Column(db.BigInteger, nullable=False)  # Session epoch carried in the token claims
+    all_sessions = db.Column(db.Boolean, default=False, nullable=False)  # Revoke every epoch <= epoch
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)  # After this no token of the session is valid anyway
+    
+    def to_dict(self):
+        """Convert token revocation object to dictionary."""
+        return {
+            'seq': self.seq,
+            'user_id': self.user_id,
+            'epoch': self.epoch,
+            'all_sessions': self.all_sessions,
+            'revoked_at': self.revoked_at.isoformat() if self.revoked_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+    
+    def __repr__(self):
+        return f'<TokenRevocation {self.user_id} - {self.epoch}>'
\ No newline at end of file
@@ -0,0 +1,56 @@
+from sqlalchemy.types import TypeDecorator, LargeBinary
+from sqlalchemy.dialects import postgresql
+from functools import lru_cache
+import uuid
+
+@lru_cache(maxsize=65536)
+def format_key(packed):
+    """Format 16 packed bytes as a canonical UUID string (cached, foreign keys repeat a lot)."""
+    digits = packed.hex()
+    return f'{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}'
+
+class CompactUUID(TypeDecorator):
+    """UUID key stored compactly: native uuid on PostgreSQL, a 16-byte BLOB elsewhere.
+    
+    Models, routes and the API keep working with the canonical 36-character
+    strings; only the stored value and the indexes built on it shrink. A value
+    that is not a valid UUID binds as NULL, so looking up a malformed id simply
+    finds nothing.
+    """
+    impl = LargeBinary(16)
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(LargeBinary(16))
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            packed = value.bytes
+        else:
+            # bytes.fromhex is several times faster than parsing with uuid.UUID
+            try:
+                packed = bytes.fromhex(str(value).replace('-', ''))
+            except ValueError:
+                return None
+            if len(packed) != 16:
+                return None
+        if dialect.name == 'postgresql':
+            return str(uuid.UUID(bytes=packed))
+        return packed
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            return format_key(value)
+        if isinstance(value, (bytearray, memoryview)):
+            return format_key(bytes(value))
+        return str(value)
+
+def new_id():
+    """Generate a new primary key value."""
+    return str(uuid.uuid4())
\ No newline at end of file
@@ -1,5 +1,5 @@
 from app import db
-import uuid
+from app.models.types import CompactUUID, new_id
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 import bcrypt
@@ -7,7 +7,7 @@ import bcrypt
 class User(db.Model):
     __tablename__ = 'users'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(CompactUUID, primary_key=True, default=new_id)
     username = db.Column(db.String(50), unique=True, nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
@@ -19,7 +19,7 @@ class User(db.Model):
     # Relationships
     owned_properties = db.relationship('Property', backref='owner', lazy=True, foreign_keys='Property.owner_id')
     property_memberships = db.relationship('PropertyMember', backref='user', lazy=True)
-    booking_applications = db.relationship('BookingApplication', backref='user', lazy=True)
+    booking_applications = db.relationship('BookingApplication', backref='user', lazy=True, foreign_keys='BookingApplication.user_id')
     
     def set_password(self, password):
         """Hash and set the user's password."""
@@ -0,0 +1,257 @@
+import asyncio
+import functools
+import io
+import sys
+from flask import request, jsonify
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.util import await_only
+from app import create_app, db
+from app.utils.profiling import request_profiler
+from app.utils.ratelimit import rate_limiter, MemoryBackend
+from app.utils.response_cache import response_cache
+from app.utils.revocation import revocation_registry
+from app.utils.sharding import shard_router
+
+try:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    import greenlet
+except ImportError:  # optional, only needed to run the read tier
+    greenlet = None
+
+# GET endpoints the read tier serves; everything else stays on the main API
+READ_ENDPOINTS = frozenset([
+    'bookings.get_weekly_bookings',
+    'usage.get_weekly_usage',
+    'properties.get_properties',
+    'properties.get_property',
+    'rooms.get_rooms',
+    'rooms.get_room'
+])
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg'
+}
+
+def async_database_url(url):
+    """Swap the driver of a database URL for its asyncio counterpart (aiosqlite or asyncpg)."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'The read tier has no async driver for {backend} databases')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def build_environ(scope, body):
+    """Turn an ASGI HTTP scope into the WSGI environ Flask expects."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    # cProfile follows the thread, which every request on the event loop shares
+    environ.pop('HTTP_X_PROFILE', None)
+    return environ
+
+class Offloaded:
+    """Proxy running the methods of a blocking backend in the event loop's default executor.
+    
+    On the event loop the call happens inside AsyncSession.run_sync(), so
+    await_only() suspends that one request while a thread does the file or
+    network I/O. Off the loop (CLI commands, the chart warmer) it calls
+    straight through.
+    """
+    
+    def __init__(self, target):
+        self.target = target
+    
+    def __getattr__(self, name):
+        attribute = getattr(self.target, name)
+        if not callable(attribute):
+            return attribute
+        
+        @functools.wraps(attribute)
+        def offloaded(*args, **kwargs):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return attribute(*args, **kwargs)
+            return await_only(loop.run_in_executor(None, functools.partial(attribute, *args, **kwargs)))
+        return offloaded
+
+class ReadTier:
+    """ASGI app serving the chart, usage, property and room reads on an async engine.
+    
+    Requests run the Flask views themselves, so the JSON, the JWT checks, the
+    chart and response caches and compression stay exactly those of the main
+    API. Each request gets an AsyncSession on an aiosqlite or asyncpg engine
+    and runs the view through AsyncSession.run_sync(), with that session
+    installed as db.session: every query then awaits the driver instead of
+    holding a thread, and so do the SQLite or Redis backends of the rate
+    limiter and the shared response cache, through Offloaded. The view's own
+    Python work (building the chart, encoding JSON, compressing) still runs
+    on the event loop thread, one request at a time, so a worker overlaps
+    requests only while they wait on I/O; its throughput is that of one
+    core, and CPU-heavy views delay every other request of the worker. The
+    in-process caches and metrics take their threading locks only around
+    dict updates, never across I/O, so the loop waits on them no longer
+    than the warmer thread's update. Writes and every other endpoint stay
+    on the main API; the tier answers them with a 404.
+    """
+    
+    def __init__(self, flask_app):
+        if greenlet is None:
+            raise RuntimeError('The read tier needs greenlet, plus aiosqlite or asyncpg for the database')
+        config = flask_app.config
+        config.setdefault('READ_TIER_DATABASE_URL', None)
+        config.setdefault('READ_TIER_POOL_SIZE', 20)
+        config.setdefault('READ_TIER_MAX_OVERFLOW', 10)
+        self.flask_app = flask_app
+        url = config['READ_TIER_DATABASE_URL']
+        if not url:
+            # The engine's URL, where Flask-SQLAlchemy has resolved relative SQLite paths
+            with flask_app.app_context():
+                url = db.engine.url
+        url = async_database_url(url)
+        if url.get_backend_name() == 'sqlite':
+            self.engine = create_async_engine(url)
+            busy_timeout = int(config['SQLITE_BUSY_TIMEOUT_MS'])
+            
+            @event.listens_for(self.engine.sync_engine, 'connect')
+            def on_connect(dbapi_connection, record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute(f'PRAGMA busy_timeout={busy_timeout}')
+                cursor.execute('PRAGMA query_only=ON')
+                cursor.close()
+        else:
+            self.engine = create_async_engine(
+                url,
+                pool_size=config['READ_TIER_POOL_SIZE'],
+                max_overflow=config['READ_TIER_MAX_OVERFLOW'],
+                pool_pre_ping=True
+            )
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self._ready = False
+        self._startup_lock = asyncio.Lock()
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+    
+    async def startup(self):
+        """Load the token revocations before the first request.
+        
+        The first load holds the registry's lock across a query, which would
+        block the event loop for any other request checking a token meanwhile.
+        """
+        async with self._startup_lock:
+            if self._ready:
+                return
+            async with self.sessionmaker() as session:
+                await session.run_sync(self._preload)
+            self._ready = True
+    
+    async def shutdown(self):
+        await self.engine.dispose()
+    
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    async def _http(self, scope, receive, send):
+        if not self._ready:
+            await self.startup()
+        
+        body = b''
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        
+        environ = build_environ(scope, body)
+        async with self.sessionmaker() as session:
+            status, headers, content = await session.run_sync(self._dispatch, environ)
+        
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        })
+        await send({'type': 'http.response.body', 'body': content})
+    
+    def _preload(self, session):
+        with self.flask_app.app_context():
+            db.session.registry.set(session)
+            revocation_registry.preload()
+    
+    def _dispatch(self, session, environ):
+        """Run one request through Flask with session as db.session; returns (status, headers, body)."""
+        app = self.flask_app
+        with app.request_context(environ):
+            db.session.registry.set(session)
+            if request.method not in READ_METHODS:
+                response = app.make_response((jsonify({'error': 'The read tier only serves GET requests'}), 405))
+            elif (request.method != 'OPTIONS' and request.routing_exception is None
+                  and request.endpoint not in READ_ENDPOINTS):
+                response = app.make_response((jsonify({'error': 'Not served by the read tier'}), 404))
+            else:
+                try:
+                    response = app.full_dispatch_request()
+                except Exception as e:
+                    response = app.handle_exception(e)
+            headers = response.get_wsgi_headers(environ).to_wsgi_list()
+            content = b'' if request.method == 'HEAD' else response.get_data()
+            response.close()
+            return response.status_code, headers, content
+
+def create_read_app():
+    """Build the read tier on top of a regular app from create_app()."""
+    flask_app = create_app()
+    if shard_router.enabled:
+        raise RuntimeError('The read tier does not support SHARD_DATABASE_URLS yet')
+    # Admission control waits on threading primitives, which would stall the event loop
+    flask_app.config['LOADSHED_ENABLED'] = False
+    request_profiler.sample_rate = 0
+    # Shared backends do file or network I/O on every check
+    if not isinstance(rate_limiter.backend, (MemoryBackend, Offloaded)):
+        rate_limiter.backend = Offloaded(rate_limiter.backend)
+    if response_cache.shared is not None and not isinstance(response_cache.shared, Offloaded):
+        response_cache.shared = Offloaded(response_cache.shared)
+    return ReadTier(flask_app)
\ No newline at end of file
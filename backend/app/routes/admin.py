@@ -0,0 +1,99 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+from app.models.user import User
+from app.utils.profiling import request_profiler
+from app.utils.archive import booking_archive
+from app.utils.chart_cache import chart_cache
+from app.utils.response_cache import response_cache
+
+admin_bp = Blueprint('admin', __name__)
+
+SORT_KEYS = ['cumulative', 'tottime', 'calls']
+
+@admin_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+def get_profiles():
+    """List captured request profiles (admin only)."""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    if not current_user or current_user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    return jsonify({
+        'profiles': request_profiler.list_profiles()
+    }), 200
+
+@admin_bp.route('/profiles/<name>', methods=['GET'])
+@jwt_required()
+def get_profile(name):
+    """Show the top functions of a captured profile (admin only)."""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    if not current_user or current_user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in SORT_KEYS:
+        return jsonify({'error': f"sort must be one of {', '.join(SORT_KEYS)}"}), 400
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 30)), 1), 200)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid limit value'}), 400
+    
+    profile = request_profiler.top_functions(name, limit=limit, sort=sort)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    return jsonify({'profile': profile}), 200
+
+@admin_bp.route('/archive', methods=['POST'])
+@jwt_required()
+def archive_bookings():
+    """Move bookings past the archive horizon out of the hot table (admin only)."""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    if not current_user or current_user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    
+    cutoff = None
+    if data.get('cutoff'):
+        try:
+            cutoff = datetime.strptime(data['cutoff'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        if cutoff > booking_archive.cutoff():
+            return jsonify({'error': 'cutoff cannot be later than the archive horizon'}), 400
+    
+    try:
+        chunk_size = int(data.get('chunk_size', 0)) or None
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid chunk_size value'}), 400
+    
+    try:
+        result = booking_archive.archive(cutoff=cutoff, chunk_size=chunk_size, dry_run=bool(data.get('dry_run')))
+    except Exception as e:
+        return jsonify({'error': 'Failed to archive bookings'}), 500
+    
+    return jsonify({'archive': result}), 200
+
+@admin_bp.route('/chart-cache', methods=['GET'])
+@jwt_required()
+def get_chart_cache():
+    """Show chart and response cache sizes, hit rates and warmer activity (admin only)."""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    if not current_user or current_user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    return jsonify({
+        'chart_cache': chart_cache.stats(),
+        'response_cache': response_cache.stats()
+    }), 200
\ No newline at end of file
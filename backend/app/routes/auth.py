@@ -1,8 +1,9 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
 from app import db
 from app.models.user import User
-from datetime import datetime, timedelta
+from app.utils.revocation import revocation_registry, new_session_epoch
+from datetime import datetime
 import re
 
 auth_bp = Blueprint('auth', __name__)
@@ -24,6 +25,14 @@ def validate_password(password):
         return False, "Password must contain at least one number"
     return True, "Valid password"
 
+def issue_tokens(user_id):
+    """Create an access/refresh token pair for a new login session."""
+    claims = {'epoch': new_session_epoch()}
+    return {
+        'access_token': create_access_token(identity=user_id, additional_claims=claims),
+        'refresh_token': create_refresh_token(identity=user_id, additional_claims=claims)
+    }
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new user."""
@@ -72,16 +81,13 @@ def register():
         db.session.add(user)
         db.session.commit()
         
-        # Create access token
-        access_token = create_access_token(
-            identity=user.id,
-            expires_delta=timedelta(days=7)
-        )
+        # Create session tokens
+        tokens = issue_tokens(user.id)
         
         return jsonify({
             'message': 'User registered successfully',
             'user': user.to_dict(),
-            'access_token': access_token
+            **tokens
         }), 201
         
     except Exception as e:
@@ -116,16 +122,13 @@ def login():
     user.last_login = datetime.utcnow()
     db.session.commit()
     
-    # Create access token
-    access_token = create_access_token(
-        identity=user.id,
-        expires_delta=timedelta(days=7)
-    )
+    # Create session tokens
+    tokens = issue_tokens(user.id)
     
     return jsonify({
         'message': 'Login successful',
         'user': user.to_dict(),
-        'access_token': access_token
+        **tokens
     }), 200
 
 @auth_bp.route('/me', methods=['GET'])
@@ -141,22 +144,41 @@ def get_current_user():
     return jsonify({'user': user.to_dict()}), 200
 
 @auth_bp.route('/refresh', methods=['POST'])
-@jwt_required()
+@jwt_required(refresh=True)
 def refresh_token():
-    """Refresh JWT token."""
+    """Issue a new access token from a refresh token without a database lookup."""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    claims = get_jwt()
     
-    # Create new access token
+    # Revoked sessions are rejected by the in-memory blocklist before we get here
     access_token = create_access_token(
-        identity=user.id,
-        expires_delta=timedelta(days=7)
+        identity=current_user_id,
+        additional_claims={'epoch': claims.get('epoch', 0)}
     )
     
-    return jsonify({
-        'access_token': access_token,
-        'user': user.to_dict()
-    }), 200
\ No newline at end of file
+    return jsonify({'access_token': access_token}), 200
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """Revoke the current session, or every session of the user."""
+    current_user_id = get_jwt_identity()
+    claims = get_jwt()
+    data = request.get_json(silent=True) or {}
+    all_sessions = bool(data.get('all_sessions', False))
+    
+    # A session's refresh token can mint access tokens until it expires, and the last one outlives it
+    lifetime = current_app.config['JWT_REFRESH_TOKEN_EXPIRES'] + current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    if all_sessions:
+        epoch = new_session_epoch()
+        expires_at = datetime.utcnow() + lifetime
+    else:
+        epoch = claims.get('epoch', 0)
+        expires_at = datetime.utcfromtimestamp(epoch / 1000) + lifetime
+    
+    try:
+        revocation_registry.revoke(current_user_id, epoch, expires_at, all_sessions=all_sessions)
+        return jsonify({'message': 'Logged out successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to log out'}), 500
\ No newline at end of file
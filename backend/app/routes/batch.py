@@ -0,0 +1,126 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask.globals import request_ctx
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.exceptions import HTTPException
+from urllib.parse import urlencode
+from app import db
+from app.models.user import User
+from app.utils.scope import share_property_scope
+import io
+import json
+
+batch_bp = Blueprint('batch', __name__)
+
+MAX_SUB_REQUESTS = 10
+
+# Read-only views a batch may run
+BATCH_ENDPOINTS = {
+    'auth.get_current_user',
+    'properties.get_properties',
+    'properties.get_property',
+    'rooms.get_rooms',
+    'rooms.get_room',
+    'bookings.get_bookings',
+    'bookings.get_weekly_bookings',
+    'bookings.get_pending_queue',
+    'usage.get_weekly_usage',
+    'sync.get_changes'
+}
+
+def run_sub_request(path, params):
+    """Dispatch one GET sub-request to its view and return the response.
+    
+    The sub-request replaces the batch request only while its view runs. The
+    view is called as registered, decorators included, but none of the
+    before/after request hooks run for it. It shares g and the database
+    session with the batch, so the user loaded by the first view comes from
+    the session's identity map in the others. A view that fails rolls the
+    session back and answers 500 for its own sub-request only.
+    """
+    path, _, query_string = path.partition('?')
+    if params:
+        query_string = '&'.join(part for part in (query_string, urlencode(params, doseq=True)) if part)
+    
+    environ = dict(request.environ)
+    environ.update({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'CONTENT_LENGTH': '0',
+        'wsgi.input': io.BytesIO()
+    })
+    environ.pop('CONTENT_TYPE', None)
+    sub_request = current_app.request_class(environ)
+    
+    batch_request = request_ctx.request
+    request_ctx.request = sub_request
+    try:
+        try:
+            rule, view_args = current_app.create_url_adapter(sub_request).match(return_rule=True)
+            sub_request.url_rule = rule
+            sub_request.view_args = view_args
+            if rule.endpoint in BATCH_ENDPOINTS:
+                # dispatch_request() without preprocess_request()/process_response(), so no hooks run
+                rv = current_app.ensure_sync(current_app.view_functions[rule.endpoint])(**view_args)
+            else:
+                rv = jsonify({'error': 'Endpoint is not available in a batch'}), 400
+        except HTTPException as e:
+            rv = jsonify({'error': e.description}), e.code
+        except Exception:
+            # Leave the session usable for the sub-requests after this one
+            db.session.rollback()
+            current_app.logger.exception('Batch sub-request %s failed', path)
+            rv = jsonify({'error': 'Internal server error'}), 500
+        return current_app.make_response(rv)
+    finally:
+        request_ctx.request = batch_request
+
+@batch_bp.route('/', methods=['POST'])
+@jwt_required()
+def run_batch():
+    """Run several named read requests and return their responses in one document.
+    
+    The body maps names to sub-requests, e.g. {"requests": {"chart":
+    {"path": "/api/bookings/weekly", "params": {"week_start": "2024-01-01"}}}}.
+    A string stands for {"path": ...}. Each response comes back under its
+    name as {"status": ..., "body": ...}; a failed sub-request does not fail
+    the others.
+    """
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    data = request.get_json(silent=True) or {}
+    sub_requests = data.get('requests')
+    if not isinstance(sub_requests, dict) or not sub_requests:
+        return jsonify({'error': 'requests must map names to sub-requests'}), 400
+    if len(sub_requests) > MAX_SUB_REQUESTS:
+        return jsonify({'error': f'A batch holds at most {MAX_SUB_REQUESTS} requests'}), 400
+    
+    specs = {}
+    for name, spec in sub_requests.items():
+        if isinstance(spec, str):
+            spec = {'path': spec}
+        if not isinstance(spec, dict) or not isinstance(spec.get('path'), str) or not spec['path'].startswith('/'):
+            return jsonify({'error': f'Request {name} needs an absolute path'}), 400
+        if not isinstance(spec.get('params') or {}, dict):
+            return jsonify({'error': f'params of request {name} must be an object'}), 400
+        specs[name] = spec
+    
+    share_property_scope()
+    
+    # Sub-responses are already JSON; splice their bodies in rather than re-encode them
+    parts = []
+    for name, spec in specs.items():
+        response = run_sub_request(spec['path'], spec.get('params'))
+        body = response.get_data() if response.is_json else b'null'
+        parts.append(
+            json.dumps(name).encode() + b':{"status":' + str(response.status_code).encode() + b',"body":' + body + b'}'
+        )
+    
+    return current_app.response_class(
+        b'{"responses":{' + b','.join(parts) + b'}}',
+        mimetype='application/json'
+    ), 200
\ No newline at end of file
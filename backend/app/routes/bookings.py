@@ -5,12 +5,25 @@ from app.models.user import User
 from app.models.property import Property, PropertyMember
 from app.models.room import Room
 from app.models.booking import BookingApplication
-from app.models.time_allocation import TimeAllocation
-from datetime import datetime, date
-from sqlalchemy import and_
+from app.models.types import new_id
+from app.models.time_allocation import TimeAllocation, quota_week_start
+from app.utils.allocation import resolve_pending, REASON_MESSAGES
+from app.utils.archive import booking_archive
+from app.utils.chart_cache import chart_cache
+from app.utils.response_cache import response_cache
+from app.utils.scope import accessible_property_ids, administered_property_ids
+from app.utils.notifications import notify_booking_created, notify_booking_decided
+from app.utils.sharding import shard_router
+from app.utils.slots import slot_counter
+from datetime import datetime, date, timedelta
+from sqlalchemy import and_, or_, func
+import uuid
 
 bookings_bp = Blueprint('bookings', __name__)
 
+QUEUE_PAGE_SIZE = 50
+QUEUE_MAX_PAGE_SIZE = 200
+
 @bookings_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_bookings():
@@ -25,16 +38,37 @@ def get_bookings():
     status = request.args.get('status')
     property_id = request.args.get('property_id')
     
-    query = BookingApplication.query.filter_by(user_id=current_user_id)
+    start_date = None
+    end_date = None
+    try:
+        if request.args.get('start_date'):
+            start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date()
+        if request.args.get('end_date'):
+            end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    # Archived bookings are included when the range reaches past the archive cutoff
+    Booking = booking_archive.history(start_date, end_date)
+    query = db.session.query(Booking).filter(Booking.user_id == current_user_id)
+    
+    if start_date:
+        query = query.filter(Booking.booking_date >= start_date)
+    
+    if end_date:
+        query = query.filter(Booking.booking_date <= end_date)
     
     if status:
-        query = query.filter_by(status=status)
+        query = query.filter(Booking.status == status)
     
     if property_id:
         # Filter by property through room relationship
-        query = query.join(Room).filter(Room.property_id == property_id)
+        query = query.join(Room, Room.id == Booking.room_id).filter(Room.property_id == property_id)
     
-    bookings = query.order_by(BookingApplication.booking_date.desc()).all()
+    bookings = query.order_by(Booking.booking_date.desc()).all()
+    if shard_router.enabled:
+        # Each shard returns its own ordered run of rows
+        bookings.sort(key=lambda booking: booking.booking_date, reverse=True)
     
     return jsonify({
         'bookings': [booking.to_dict() for booking in bookings]
@@ -93,39 +127,43 @@ def create_booking():
     if not has_access:
         return jsonify({'error': 'Access denied to this room'}), 403
     
-    # Check for existing booking for same room/date/session
-    existing_booking = BookingApplication.query.filter(
-        and_(
-            BookingApplication.room_id == room_id,
-            BookingApplication.booking_date == booking_date,
-            BookingApplication.session_type == session_type,
-            BookingApplication.status.in_(['pending', 'approved'])
-        )
-    ).first()
-    
-    if existing_booking:
-        return jsonify({'error': 'This time slot is already booked or pending approval'}), 400
-    
     # Get duration value from time allocation
     time_allocation = TimeAllocation.query.filter_by(property_id=property_obj.id).first()
     if not time_allocation:
         # Use default values if no time allocation exists
         duration_value = BookingApplication.get_session_duration(session_type)
+        quota_week = quota_week_start(booking_date)
     else:
         duration_value = time_allocation.get_session_duration(session_type)
-    
-    # Create booking application
-    booking = BookingApplication(
-        user_id=current_user_id,
-        room_id=room_id,
-        booking_date=booking_date,
-        session_type=session_type,
-        notes=notes,
-        duration_value=duration_value
-    )
+        quota_week = time_allocation.week_start(booking_date)
+    
+    now = datetime.utcnow()
+    values = {
+        'id': new_id(),
+        'user_id': current_user_id,
+        'room_id': room.id,
+        'booking_date': booking_date,
+        'session_type': session_type,
+        'status': 'pending',
+        'notes': notes,
+        'duration_value': duration_value,
+        'quota_week': quota_week,
+        'created_at': now,
+        'updated_at': now
+    }
     
     try:
-        db.session.add(booking)
+        # Each step is one atomic statement, so concurrent requests cannot both pass a check
+        if not slot_counter.claim(values):
+            db.session.rollback()
+            return jsonify({'error': 'You already have a booking for this time slot'}), 409
+        if not slot_counter.reserve(room.id, booking_date, session_type):
+            db.session.rollback()
+            return jsonify({'error': 'This time slot is fully booked'}), 409
+        
+        booking = db.session.get(BookingApplication, values['id'])
+        # Queued in the same transaction, delivered later by the outbox worker
+        notify_booking_created(booking)
         db.session.commit()
         
         return jsonify({
@@ -137,6 +175,201 @@ def create_booking():
         db.session.rollback()
         return jsonify({'error': 'Failed to create booking application'}), 500
 
+def parse_week_start(today):
+    """Get the requested week start, defaulting to the Monday of the current week."""
+    week_start = today - timedelta(days=today.weekday())
+    
+    week_start_param = request.args.get('week_start')
+    if week_start_param:
+        try:
+            week_start = datetime.strptime(week_start_param, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    
+    return week_start
+
+@bookings_bp.route('/weekly', methods=['GET'])
+@jwt_required()
+def get_weekly_bookings():
+    """Get weekly booking data for the visual chart."""
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    today = date.today()
+    week_start = parse_week_start(today)
+    property_id = request.args.get('property_id')
+    
+    # A single property's chart opens on its current quota week
+    if property_id and not request.args.get('week_start'):
+        time_allocation = TimeAllocation.query.filter_by(property_id=property_id).first()
+        if time_allocation:
+            week_start = time_allocation.week_start(today)
+    
+    # Generate 7 days from the week start
+    week_days = []
+    for i in range(7):
+        current_date = week_start + timedelta(days=i)
+        week_days.append({
+            'date': current_date.isoformat(),
+            'day_name': current_date.strftime('%A'),
+            'day_short': current_date.strftime('%a'),
+            'is_today': current_date == today
+        })
+    
+    # Bookings per property come from the chart cache; one grouped query checks they are current
+    conditions = []
+    if property_id:
+        conditions.append(Room.property_id == property_id)
+    
+    if user.role != 'admin':
+        conditions.append(Room.property_id.in_(accessible_property_ids(user)))
+    
+    stamps, booked = chart_cache.scope(week_start, *conditions, viewer_id=current_user_id)
+    
+    # can_modify is the only viewer-specific part: it is all true for admins and
+    # all false for members without bookings this week, who then share one entry
+    viewer = 'admin' if user.role == 'admin' else (current_user_id if booked else None)
+    cache_key, body = response_cache.lookup('bookings.weekly', (week_start, today, property_id, viewer), stamps)
+    if body is not None:
+        return response_cache.respond(body), 200
+    
+    payloads = chart_cache.lookup('chart', week_start, stamps)
+    
+    # Merge the properties and add the viewer-specific flag
+    booking_data = {}
+    for property_bookings in payloads.values():
+        for date_str, sessions in property_bookings.items():
+            if date_str not in booking_data:
+                booking_data[date_str] = {
+                    'morning': [],
+                    'midday': [],
+                    'evening': []
+                }
+            for session_type, entries in sessions.items():
+                booking_data[date_str][session_type].extend(
+                    dict(entry, can_modify=entry['user_id'] == current_user_id or user.role == 'admin')
+                    for entry in entries
+                )
+    
+    response = jsonify({
+        'week_start': week_start.isoformat(),
+        'week_days': week_days,
+        'bookings': booking_data,
+        'session_types': ['morning', 'midday', 'evening'],
+        'session_labels': {
+            'morning': 'Morning',
+            'midday': 'Midday',
+            'evening': 'Evening'
+        }
+    })
+    response_cache.store(cache_key, response)
+    return response, 200
+
+def parse_queue_cursor(cursor):
+    """Split a pending-queue cursor ('<booking_date>:<booking_id>') into its parts."""
+    booking_date, _, booking_id = cursor.partition(':')
+    return datetime.strptime(booking_date, '%Y-%m-%d').date(), str(uuid.UUID(booking_id))
+
+@bookings_bp.route('/pending', methods=['GET'])
+@jwt_required()
+def get_pending_queue():
+    """Get the bookings waiting for approval in every property the user owns or administers."""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    if not current_user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    try:
+        limit = min(max(int(request.args.get('limit', QUEUE_PAGE_SIZE)), 1), QUEUE_MAX_PAGE_SIZE)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid limit value'}), 400
+    
+    cursor = None
+    if request.args.get('cursor'):
+        try:
+            cursor = parse_queue_cursor(request.args['cursor'])
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    properties = dict(db.session.query(Property.id, Property.name).filter(
+        Property.id.in_(administered_property_ids(current_user))
+    ).all())
+    
+    property_id = request.args.get('property_id')
+    if property_id:
+        if property_id not in properties:
+            return jsonify({'error': 'Access denied'}), 403
+        property_ids = [property_id]
+    else:
+        property_ids = list(properties)
+    
+    if not property_ids:
+        return jsonify({'bookings': [], 'counts': [], 'total': 0, 'next_cursor': None}), 200
+    
+    # Both queries seek ix_booking_applications_room_status_date room by room
+    counts = db.session.query(Room.property_id, func.count(BookingApplication.id)).join(
+        BookingApplication, BookingApplication.room_id == Room.id
+    ).filter(
+        Room.property_id.in_(property_ids),
+        BookingApplication.status == 'pending'
+    ).group_by(Room.property_id).all()
+    
+    room_ids = db.session.query(Room.id).filter(Room.property_id.in_(property_ids))
+    
+    query = db.session.query(
+        BookingApplication.id, BookingApplication.booking_date, BookingApplication.session_type,
+        BookingApplication.duration_value, BookingApplication.notes, BookingApplication.created_at,
+        BookingApplication.user_id, User.username, Room.id.label('room_id'), Room.name.label('room_name'),
+        Room.property_id
+    ).join(Room, Room.id == BookingApplication.room_id).join(
+        User, User.id == BookingApplication.user_id
+    ).filter(
+        BookingApplication.room_id.in_(room_ids),
+        BookingApplication.status == 'pending'
+    )
+    
+    if cursor:
+        after_date, after_id = cursor
+        query = query.filter(or_(
+            BookingApplication.booking_date > after_date,
+            and_(BookingApplication.booking_date == after_date, BookingApplication.id > after_id)
+        ))
+    
+    rows = query.order_by(BookingApplication.booking_date, BookingApplication.id).limit(limit + 1).all()
+    if shard_router.enabled:
+        # Each shard returns its own ordered run of rows
+        rows.sort(key=lambda row: (row.booking_date, row.id))
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f'{rows[-1].booking_date.isoformat()}:{rows[-1].id}'
+    
+    return jsonify({
+        'bookings': [{
+            'id': row.id,
+            'booking_date': row.booking_date.isoformat(),
+            'session_type': row.session_type,
+            'duration_value': row.duration_value,
+            'notes': row.notes,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'user': {'id': row.user_id, 'username': row.username},
+            'room': {'id': row.room_id, 'name': row.room_name},
+            'property_id': row.property_id,
+            'property_name': properties[row.property_id]
+        } for row in rows],
+        'counts': [
+            {'property_id': pid, 'property_name': properties[pid], 'pending': count}
+            for pid, count in sorted(counts, key=lambda item: properties[item[0]])
+        ],
+        'total': sum(count for _, count in counts),
+        'next_cursor': next_cursor
+    }), 200
+
 @bookings_bp.route('/<booking_id>', methods=['GET'])
 @jwt_required()
 def get_booking(booking_id):
@@ -148,6 +381,10 @@ def get_booking(booking_id):
         return jsonify({'error': 'User not found'}), 404
     
     booking = BookingApplication.query.get(booking_id)
+    if not booking:
+        # Fall back to the archive for bookings past the horizon
+        Booking = booking_archive.history()
+        booking = db.session.query(Booking).filter(Booking.id == booking_id).first()
     if not booking:
         return jsonify({'error': 'Booking not found'}), 404
     
@@ -205,6 +442,7 @@ def approve_booking(booking_id):
     booking.approved_by = current_user_id
     booking.approval_notes = approval_notes
     booking.updated_at = datetime.utcnow()
+    notify_booking_decided(booking)
     
     try:
         db.session.commit()
@@ -254,8 +492,10 @@ def reject_booking(booking_id):
     booking.approved_by = current_user_id
     booking.approval_notes = approval_notes
     booking.updated_at = datetime.utcnow()
+    notify_booking_decided(booking)
     
     try:
+        slot_counter.release([booking])
         db.session.commit()
         return jsonify({
             'message': 'Booking rejected successfully',
@@ -263,4 +503,131 @@ def reject_booking(booking_id):
         }), 200
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': 'Failed to reject booking'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Failed to reject booking'}), 500
+
+@bookings_bp.route('/resolve-pending', methods=['POST'])
+@jwt_required()
+def resolve_pending_bookings():
+    """Approve or reject every pending booking of a property week in one transaction."""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    if not current_user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    data = request.get_json() or {}
+    property_id = data.get('property_id')
+    week_start_str = data.get('week_start')
+    dry_run = bool(data.get('dry_run', False))
+    
+    if not property_id or not week_start_str:
+        return jsonify({'error': 'property_id and week_start are required'}), 400
+    
+    try:
+        week_start = datetime.strptime(week_start_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    property_obj = Property.query.get(property_id)
+    if not property_obj:
+        return jsonify({'error': 'Property not found'}), 404
+    
+    # Check if user has admin access to moderate
+    is_property_owner = property_obj.owner_id == current_user_id
+    is_property_admin = PropertyMember.query.filter_by(
+        property_id=property_id,
+        user_id=current_user_id,
+        role='admin',
+        invitation_status='accepted'
+    ).first() is not None
+    
+    if not (is_property_owner or is_property_admin):
+        return jsonify({'error': 'Access denied'}), 403
+    
+    # The weekly limit applies per quota week, so resolve the one holding week_start
+    time_allocation = property_obj.time_allocation
+    week_start = time_allocation.week_start(week_start) if time_allocation else quota_week_start(week_start)
+    week_end = week_start + timedelta(days=6)
+    
+    # One pass over the week for the whole property
+    rooms = Room.query.filter_by(property_id=property_id).all()
+    bookings = BookingApplication.query.join(Room).filter(
+        Room.property_id == property_id,
+        BookingApplication.quota_week == week_start
+    ).all()
+    
+    pending, approved = [], []
+    for booking in bookings:
+        if booking.status == 'pending':
+            pending.append(booking)
+        elif booking.status == 'approved':
+            approved.append(booking)
+    
+    weekly_limit = time_allocation.weekly_limit_days if time_allocation else 7.0
+    
+    decisions, usage_before, usage_after = resolve_pending(pending, approved, weekly_limit)
+    
+    user_ids = {booking.user_id for booking in pending} | set(usage_after)
+    usernames = dict(db.session.query(User.id, User.username).filter(User.id.in_(user_ids)).all()) if user_ids else {}
+    room_names = {room.id: room.name for room in rooms}
+    
+    result = []
+    for booking, decision, reason in decisions:
+        result.append({
+            'booking_id': booking.id,
+            'user_id': booking.user_id,
+            'username': usernames.get(booking.user_id, 'Unknown'),
+            'room_id': booking.room_id,
+            'room_name': room_names.get(booking.room_id, 'Unknown Room'),
+            'booking_date': booking.booking_date.isoformat(),
+            'session_type': booking.session_type,
+            'duration_value': booking.duration_value,
+            'decision': decision,
+            'reason': reason
+        })
+    
+    summary = {
+        'approved': sum(1 for _, decision, _ in decisions if decision == 'approve'),
+        'rejected': sum(1 for _, decision, _ in decisions if decision == 'reject')
+    }
+    usage = [
+        {
+            'user_id': user_id,
+            'username': usernames.get(user_id, 'Unknown'),
+            'before': usage_before.get(user_id, 0.0),
+            'after': usage_after.get(user_id, 0.0),
+            'weekly_limit': weekly_limit
+        }
+        for user_id in sorted(user_ids, key=lambda uid: usernames.get(uid, ''))
+    ]
+    
+    response = {
+        'property_id': property_id,
+        'week_start': week_start.isoformat(),
+        'week_end': week_end.isoformat(),
+        'dry_run': dry_run,
+        'decisions': result,
+        'summary': summary,
+        'usage': usage
+    }
+    
+    if dry_run:
+        db.session.rollback()
+        return jsonify(response), 200
+    
+    now = datetime.utcnow()
+    for booking, decision, reason in decisions:
+        booking.status = 'approved' if decision == 'approve' else 'rejected'
+        booking.approved_by = current_user_id
+        booking.approval_notes = REASON_MESSAGES[reason]
+        booking.updated_at = now
+        notify_booking_decided(booking)
+    
+    try:
+        slot_counter.release([booking for booking, decision, _ in decisions if decision == 'reject'])
+        db.session.commit()
+        response['message'] = f"Resolved {len(decisions)} pending bookings"
+        return jsonify(response), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to resolve pending bookings'}), 500
\ No newline at end of file
@@ -0,0 +1,87 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db
+from app.models.user import User
+from app.utils.bulk import ImportScope, FORMATS, IMPORTERS, import_rows, export_query, iter_export
+
+bulk_bp = Blueprint('bulk', __name__)
+
+def request_format():
+    """Get the bulk format from ?format= or the Content-Type, defaulting to CSV."""
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt
+    if request.mimetype == FORMATS['ndjson'] or request.mimetype == 'application/json':
+        return 'ndjson'
+    return 'csv'
+
+@bulk_bp.route('/export/<entity>', methods=['GET'])
+@jwt_required()
+def export_entities(entity):
+    """Stream properties, rooms, members or bookings the user administers as CSV or NDJSON."""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    if not current_user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    if entity not in IMPORTERS:
+        return jsonify({'error': f"entity must be one of {', '.join(IMPORTERS)}"}), 400
+    
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    scope = ImportScope(current_user)
+    property_ids = scope.property_ids
+    
+    property_id = request.args.get('property_id')
+    if property_id:
+        if property_id not in scope.properties:
+            return jsonify({'error': 'Access denied'}), 403
+        property_ids = [property_id]
+    
+    query = export_query(entity, property_ids)
+    filename = f'roomieflow-{entity}.{fmt}'
+    return Response(
+        stream_with_context(iter_export(query, fmt)),
+        mimetype=FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@bulk_bp.route('/import/<entity>', methods=['POST'])
+@jwt_required()
+def import_entities(entity):
+    """Import properties, rooms, members or bookings from a CSV or NDJSON body."""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    if not current_user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    if entity not in IMPORTERS:
+        return jsonify({'error': f"entity must be one of {', '.join(IMPORTERS)}"}), 400
+    
+    fmt = request_format()
+    if fmt not in FORMATS:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    dry_run = request.args.get('dry_run', 'false').lower() in ('1', 'true', 'yes')
+    scope = ImportScope(current_user)
+    
+    try:
+        report = import_rows(entity, request.stream, fmt, scope, dry_run=dry_run)
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'Import must be UTF-8 encoded'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to import {entity}'}), 500
+    
+    status_code = 200 if dry_run else 201
+    return jsonify({
+        'entity': entity,
+        'format': fmt,
+        'dry_run': dry_run,
+        **report
+    }), status_code
\ No newline at end of file
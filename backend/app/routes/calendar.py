@@ -0,0 +1,90 @@
+from flask import Blueprint, request, jsonify, Response, url_for, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db
+from app.models.user import User
+from app.models.property import Property, PropertyMember
+from app.models.room import Room
+from app.utils.calendar import calendar_feeds
+
+calendar_bp = Blueprint('calendar', __name__)
+
+def feed_entry(scope, object_id, name, user_id):
+    token = calendar_feeds.make_token(scope, object_id, user_id)
+    return {
+        'scope': scope,
+        'id': object_id,
+        'name': name,
+        'url': url_for('calendar.get_feed', token=token, _external=True)
+    }
+
+@calendar_bp.route('/feeds', methods=['GET'])
+@jwt_required()
+def get_feeds():
+    """Get the subscription URLs of the calendar feeds the user can read."""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    if not current_user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    owned = db.session.query(Property.id).filter(Property.owner_id == current_user_id)
+    member = db.session.query(PropertyMember.property_id).filter(
+        PropertyMember.user_id == current_user_id,
+        PropertyMember.invitation_status == 'accepted'
+    )
+    properties = Property.query.filter(Property.id.in_(owned.union(member))).order_by(Property.name).all()
+    rooms = Room.query.filter(Room.property_id.in_([p.id for p in properties])).order_by(Room.name).all()
+    
+    property_names = {property_obj.id: property_obj.name for property_obj in properties}
+    
+    return jsonify({
+        'user': feed_entry('user', current_user_id, current_user.username, current_user_id),
+        'properties': [
+            feed_entry('property', property_obj.id, property_obj.name, current_user_id)
+            for property_obj in properties
+        ],
+        'rooms': [
+            feed_entry('room', room.id, f'{room.name} ({property_names[room.property_id]})', current_user_id)
+            for room in rooms
+        ]
+    }), 200
+
+@calendar_bp.route('/<token>.ics', methods=['GET'])
+def get_feed(token):
+    """Serve an iCalendar feed, answering unchanged polls with 304."""
+    feed = calendar_feeds.read_token(token)
+    if feed is None:
+        return jsonify({'error': 'Feed not found'}), 404
+    
+    scope, object_id, user_id = feed
+    user = User.query.get(user_id)
+    if not user or not calendar_feeds.can_view(user, scope, object_id):
+        return jsonify({'error': 'Feed not found'}), 404
+    
+    version = calendar_feeds.version(scope, object_id)
+    etag = calendar_feeds.etag(scope, object_id, version)
+    last_modified = version[1]
+    
+    response = Response(mimetype='text/calendar')
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = f"private, max-age={current_app.config['CALENDAR_MAX_AGE']}"
+    if last_modified:
+        response.last_modified = last_modified
+    
+    # If-None-Match wins over If-Modified-Since (RFC 9110 section 13.2.2)
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        since = request.if_modified_since
+        not_modified = (
+            since is not None and last_modified is not None and
+            last_modified.replace(microsecond=0) <= since.replace(tzinfo=None)
+        )
+    if not_modified:
+        response.status_code = 304
+        response.headers.pop('Content-Type', None)
+        return response
+    
+    response.set_data(calendar_feeds.render(scope, object_id, version))
+    response.headers['Content-Disposition'] = f'inline; filename="roomieflow-{scope}.ics"'
+    return response
\ No newline at end of file
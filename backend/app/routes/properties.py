@@ -3,7 +3,12 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.user import User
 from app.models.property import Property, PropertyMember
-from app.models.time_allocation import TimeAllocation
+from app.models.room import Room
+from app.utils.scope import can_access_property
+from app.models.time_allocation import TimeAllocation, quota_week_start
+from app.utils.quota_weeks import quota_weeks
+from app.utils.analytics import load_booking_columns, compute_property_analytics, SESSION_TYPES, WEEKDAY_NAMES
+from datetime import datetime, date, timedelta
 
 properties_bp = Blueprint('properties', __name__)
 
@@ -99,16 +104,7 @@ def get_property(property_id):
         return jsonify({'error': 'Property not found'}), 404
     
     # Check if user has access to this property
-    has_access = (
-        property_obj.owner_id == current_user_id or
-        PropertyMember.query.filter_by(
-            property_id=property_id,
-            user_id=current_user_id,
-            invitation_status='accepted'
-        ).first() is not None
-    )
-    
-    if not has_access:
+    if not can_access_property(current_user, property_obj):
         return jsonify({'error': 'Access denied'}), 403
     
     return jsonify({'property': property_obj.to_dict()}), 200
@@ -157,6 +153,23 @@ def update_property(property_id):
     if 'is_active' in data and is_owner:
         property_obj.is_active = bool(data['is_active'])
     
+    if 'reset_day_of_week' in data:
+        try:
+            reset_day = int(data['reset_day_of_week'])
+        except (ValueError, TypeError):
+            return jsonify({'error': 'reset_day_of_week must be an integer'}), 400
+        if not 1 <= reset_day <= 7:
+            return jsonify({'error': 'reset_day_of_week must be between 1 and 7'}), 400
+        
+        time_allocation = property_obj.time_allocation
+        if not time_allocation:
+            time_allocation = TimeAllocation(property_id=property_obj.id)
+            db.session.add(time_allocation)
+        if time_allocation.reset_day_of_week != reset_day:
+            time_allocation.reset_day_of_week = reset_day
+            # Bookings move to the quota weeks of the new reset day in the same commit
+            quota_weeks.recompute(property_obj.id, reset_day)
+    
     try:
         db.session.commit()
         return jsonify({
@@ -165,4 +178,102 @@ def update_property(property_id):
         }), 200
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': 'Failed to update property'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Failed to update property'}), 500
+
+@properties_bp.route('/<property_id>/analytics', methods=['GET'])
+@jwt_required()
+def get_property_analytics(property_id):
+    """Get occupancy, member usage and approval analytics over the last N weeks."""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    
+    if not current_user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    property_obj = Property.query.get(property_id)
+    if not property_obj:
+        return jsonify({'error': 'Property not found'}), 404
+    
+    # Analytics are for the people running the property
+    is_owner = property_obj.owner_id == current_user_id
+    is_property_admin = PropertyMember.query.filter_by(
+        property_id=property_id,
+        user_id=current_user_id,
+        role='admin',
+        invitation_status='accepted'
+    ).first() is not None
+    
+    if not (is_owner or is_property_admin):
+        return jsonify({'error': 'Access denied'}), 403
+    
+    try:
+        weeks = int(request.args.get('weeks', 12))
+        if weeks < 1 or weeks > 104:
+            return jsonify({'error': 'weeks must be between 1 and 104'}), 400
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid weeks value'}), 400
+    
+    # Default to the N quota weeks ending with the current one
+    today = date.today()
+    time_allocation = property_obj.time_allocation
+    current_week = time_allocation.week_start(today) if time_allocation else quota_week_start(today)
+    week_start = current_week - timedelta(weeks=weeks - 1)
+    week_start_param = request.args.get('week_start')
+    if week_start_param:
+        try:
+            week_start = datetime.strptime(week_start_param, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    week_end = week_start + timedelta(weeks=weeks) - timedelta(days=1)
+    
+    rooms = Room.query.filter_by(property_id=property_id).order_by(Room.name).all()
+    columns = load_booking_columns(property_id, week_start, week_end)
+    
+    # Owner and accepted members, plus anyone who booked in the window
+    member_ids = [property_obj.owner_id]
+    for member in PropertyMember.query.filter_by(property_id=property_id, invitation_status='accepted').all():
+        if member.user_id not in member_ids:
+            member_ids.append(member.user_id)
+    for user_id in sorted(set(columns['user_id'].tolist()) - set(member_ids)):
+        member_ids.append(user_id)
+    usernames = dict(db.session.query(User.id, User.username).filter(User.id.in_(member_ids)).all())
+    
+    weekly_limit = time_allocation.weekly_limit_days if time_allocation else 7.0
+    
+    result = compute_property_analytics(
+        columns, [room.id for room in rooms], member_ids, week_start, weeks, weekly_limit
+    )
+    
+    members = []
+    for i, user_id in enumerate(member_ids):
+        members.append({
+            'user_id': user_id,
+            'username': usernames.get(user_id, 'Unknown'),
+            'weekly_usage': result['usage'][i],
+            'approved_usage': result['approved_usage'][i],
+            'average_usage': result['average_usage'][i],
+            'peak_usage': result['peak_usage'][i],
+            'average_utilization': result['average_utilization'][i],
+            'weeks_over_limit': result['weeks_over_limit'][i]
+        })
+    
+    return jsonify({
+        'property_id': property_id,
+        'week_start': week_start.isoformat(),
+        'week_end': week_end.isoformat(),
+        'weeks': weeks,
+        'week_starts': [(week_start + timedelta(weeks=i)).isoformat() for i in range(weeks)],
+        'weekly_limit': weekly_limit,
+        'rooms': [{'id': room.id, 'name': room.name} for room in rooms],
+        'weekdays': WEEKDAY_NAMES,
+        'session_types': SESSION_TYPES,
+        'occupancy': {
+            'counts': result['occupancy_counts'],
+            'rates': result['occupancy_rates']
+        },
+        'members': members,
+        'status_totals': result['status_totals'],
+        'approval_rate': result['approval_rate'],
+        'rejection_rate': result['rejection_rate'],
+        'total_bookings': result['total_bookings']
+    }), 200
\ No newline at end of file
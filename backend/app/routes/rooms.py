@@ -4,6 +4,7 @@ from app import db
 from app.models.user import User
 from app.models.property import Property, PropertyMember
 from app.models.room import Room
+from app.utils.scope import can_access_property
 
 rooms_bp = Blueprint('rooms', __name__)
 
@@ -26,16 +27,7 @@ def get_rooms():
     if not property_obj:
         return jsonify({'error': 'Property not found'}), 404
     
-    has_access = (
-        property_obj.owner_id == current_user_id or
-        PropertyMember.query.filter_by(
-            property_id=property_id,
-            user_id=current_user_id,
-            invitation_status='accepted'
-        ).first() is not None
-    )
-    
-    if not has_access:
+    if not can_access_property(current_user, property_obj):
         return jsonify({'error': 'Access denied'}), 403
     
     rooms = Room.query.filter_by(property_id=property_id, is_active=True).all()
@@ -129,16 +121,7 @@ def get_room(room_id):
     
     # Check if user has access to this room's property
     property_obj = room.property
-    has_access = (
-        property_obj.owner_id == current_user_id or
-        PropertyMember.query.filter_by(
-            property_id=property_obj.id,
-            user_id=current_user_id,
-            invitation_status='accepted'
-        ).first() is not None
-    )
-    
-    if not has_access:
+    if not can_access_property(current_user, property_obj):
         return jsonify({'error': 'Access denied'}), 403
     
     return jsonify({'room': room.to_dict()}), 200
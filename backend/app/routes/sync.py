@@ -0,0 +1,210 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.user import User
+from app.models.property import Property, PropertyMember
+from app.models.room import Room
+from app.models.booking import BookingApplication
+from app.utils.changelog import change_log, load_properties, load_rooms, load_memberships, load_bookings
+from app.utils.scope import property_scope_query
+from app.utils.sharding import shard_router
+
+sync_bp = Blueprint('sync', __name__)
+
+LOADERS = {
+    'property': lambda ids: load_properties(Property.id.in_(ids)),
+    'room': lambda ids: load_rooms(Room.id.in_(ids)),
+    'membership': lambda ids: load_memberships(PropertyMember.id.in_(ids)),
+    'booking': lambda ids: load_bookings(BookingApplication.id.in_(ids))
+}
+
+def encode_position(position):
+    txid, seq = position
+    return f'{txid}.{seq}' if txid else str(seq)
+
+def encode_cursor(positions):
+    """Turn the last (txid, seq) position seen on each shard into a cursor string."""
+    if list(positions) == [None]:
+        return encode_position(positions[None])
+    return ','.join(f'{shard}:{encode_position(position)}' for shard, position in sorted(positions.items()))
+
+def parse_cursor(value):
+    """Parse a cursor from encode_cursor; raises ValueError for a malformed or outdated one."""
+    positions = {}
+    for part in value.split(','):
+        shard, _, position = part.rpartition(':')
+        txid, _, seq = position.rpartition('.')
+        positions[shard or None] = (int(txid or 0), int(seq))
+    if set(positions) != set(shard_router.all_shards()):
+        raise ValueError('Cursor does not match the shard layout')
+    return positions
+
+# Snapshots walk each shard through these tables in id order
+SNAPSHOT_TABLES = [
+    ('property', Property.id, Property.id, load_properties),
+    ('room', Room.id, Room.property_id, load_rooms),
+    ('membership', PropertyMember.id, PropertyMember.property_id, load_memberships),
+    ('booking', BookingApplication.id, Room.property_id, load_bookings)
+]
+
+SNAPSHOT_PREFIX = 'snapshot|'
+
+def encode_snapshot_cursor(positions, position, property_ids):
+    """Turn a snapshot in progress into a cursor string.
+    
+    positions is the log cursor to carry on from once the snapshot is done,
+    position the (shard, entity type, id) it has reached (None before the
+    first page) and property_ids the properties it covers, or None for all
+    the user can see.
+    """
+    shard, entity_type, last_id = position or (None, '', '')
+    return SNAPSHOT_PREFIX + '|'.join([
+        encode_cursor(positions), shard or '', entity_type, last_id,
+        '*' if property_ids is None else ','.join(property_ids)
+    ])
+
+def parse_snapshot_cursor(value):
+    """Parse a cursor from encode_snapshot_cursor; raises ValueError for a malformed or outdated one."""
+    parts = value[len(SNAPSHOT_PREFIX):].split('|')
+    if len(parts) != 5:
+        raise ValueError('Malformed snapshot cursor')
+    cursor, shard, entity_type, last_id, property_ids = parts
+    positions = parse_cursor(cursor)
+    position = None
+    if entity_type:
+        position = (shard or None, entity_type, last_id)
+        if position[0] not in shard_router.all_shards() or entity_type not in [table[0] for table in SNAPSHOT_TABLES]:
+            raise ValueError('Snapshot cursor does not match the shard layout')
+    return positions, position, None if property_ids == '*' else [part for part in property_ids.split(',') if part]
+
+def upsert(entity_type, data):
+    return {'type': entity_type, 'action': 'upsert', 'id': data['id'], 'data': data}
+
+def snapshot(property_ids, position, limit):
+    """Get up to limit upserts of everything in these properties after position.
+    
+    Returns the changes and the (shard, entity type, id) to continue from, or
+    None once the snapshot is complete.
+    """
+    by_shard = {}
+    for property_id in property_ids:
+        shard = shard_router.shard_for_property(property_id) if shard_router.enabled else None
+        by_shard.setdefault(shard, []).append(property_id)
+    
+    steps = [(shard, table) for shard in shard_router.all_shards() for table in SNAPSHOT_TABLES]
+    start = 0
+    if position is not None:
+        start = next(index for index, (shard, table) in enumerate(steps) if (shard, table[0]) == position[:2])
+    
+    changes = []
+    for index, (shard, (entity_type, key, property_key, loader)) in enumerate(steps[start:], start):
+        if not by_shard.get(shard):
+            continue
+        conditions = [property_key.in_(by_shard[shard])]
+        if index == start and position is not None:
+            conditions.append(key > position[2])
+        # Keys on one shard's properties route every query to that shard, so ids stay in its order
+        rows = loader(*conditions, limit=limit - len(changes))
+        changes.extend(upsert(entity_type, data) for data in rows.values())
+        if len(changes) >= limit:
+            return changes, (shard, entity_type, changes[-1]['id'])
+    return changes, None
+
+def snapshot_page(positions, position, property_ids, scope, limit):
+    """Get the response for one page of a snapshot of property_ids, or of the whole scope when None."""
+    full = property_ids is None
+    changes, position = snapshot(sorted(scope if full else scope & set(property_ids)), position, limit)
+    if position is None:
+        cursor = encode_cursor(positions)
+    else:
+        cursor = encode_snapshot_cursor(positions, position, property_ids)
+    return jsonify({
+        'full': full,
+        'changes': changes,
+        'cursor': cursor,
+        # After the snapshot of a new property the log may have more entries waiting
+        'has_more': position is not None or not full
+    }), 200
+
+@sync_bp.route('', methods=['GET'])
+@jwt_required()
+def get_changes():
+    """Get the properties, rooms, memberships and bookings that changed since the cursor.
+    
+    Without a cursor the response is the first page of a full snapshot. Every
+    response ends with the cursor for the next call; has_more means another
+    page is waiting.
+    """
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    page_size = current_app.config['SYNC_PAGE_SIZE']
+    try:
+        limit = min(max(int(request.args.get('limit', page_size)), 1), page_size)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid limit value'}), 400
+    
+    scope = {property_id for (property_id,) in property_scope_query(user).all()}
+    
+    cursor = request.args.get('cursor')
+    if not cursor:
+        # Read the head first: changes committed during the snapshot are sent again next time
+        return snapshot_page(change_log.head(), None, None, scope, limit)
+    
+    try:
+        if cursor.startswith(SNAPSHOT_PREFIX):
+            return snapshot_page(*parse_snapshot_cursor(cursor), scope, limit)
+        positions = parse_cursor(cursor)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor, sync again without one'}), 400
+    
+    entries, has_more = change_log.entries_since(positions, sorted(scope), current_user_id, limit)
+    
+    # The user's own membership changes decide which properties appear or disappear
+    granted, revoked = set(), set()
+    latest = {}
+    for shard, entry in entries:
+        positions[shard] = max(positions.get(shard, (0, 0)), change_log.position(entry))
+        if entry.entity_type == 'membership' and entry.user_id == current_user_id:
+            (granted if entry.property_id in scope else revoked).add(entry.property_id)
+        if entry.property_id not in scope:
+            continue
+        # Only the newest change of each object matters
+        key = (entry.entity_type, entry.entity_id, entry.property_id)
+        latest.pop(key, None)
+        latest[key] = entry
+    
+    changes = [
+        {'type': 'property', 'action': 'delete', 'id': property_id, 'property_id': property_id}
+        for property_id in sorted(revoked)
+    ]
+    
+    pending = [entry for entry in latest.values() if entry.property_id not in granted]
+    upserted = {}
+    for entity_type, loader in LOADERS.items():
+        ids = [entry.entity_id for entry in pending if entry.entity_type == entity_type and entry.action == 'upsert']
+        upserted[entity_type] = loader(ids) if ids else {}
+    
+    for entry in pending:
+        if entry.action == 'delete':
+            changes.append({
+                'type': entry.entity_type,
+                'action': 'delete',
+                'id': entry.entity_id,
+                'property_id': entry.property_id
+            })
+            continue
+        data = upserted[entry.entity_type].get(entry.entity_id)
+        # Rows deleted since then are covered by their own delete entry
+        if data is not None:
+            changes.append(upsert(entry.entity_type, data))
+    
+    # Newly granted properties follow as snapshot pages, which carry on with the log afterwards
+    return jsonify({
+        'full': False,
+        'changes': changes,
+        'cursor': encode_snapshot_cursor(positions, None, sorted(granted)) if granted else encode_cursor(positions),
+        'has_more': has_more or bool(granted)
+    }), 200
\ No newline at end of file
@@ -0,0 +1,129 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.user import User
+from app.models.room import Room
+from app.routes.bookings import parse_week_start
+from app.utils.archive import booking_archive
+from app.utils.chart_cache import chart_cache
+from app.utils.response_cache import response_cache
+from app import db
+from datetime import date, timedelta
+from sqlalchemy import func
+
+usage_bp = Blueprint('usage', __name__)
+
+@usage_bp.route('/weekly', methods=['GET'])
+@jwt_required()
+def get_weekly_usage():
+    """Get weekly usage statistics for current user."""
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    today = date.today()
+    week_start = parse_week_start(today)
+    week_end = week_start + timedelta(days=6)
+    
+    # Each property counts usage in its own quota week: the one holding the requested week_start, or today
+    day = week_start if request.args.get('week_start') else today
+    week_keys = [day - timedelta(days=offset) for offset in range(7)]
+    
+    # Properties where the user has bookings that quota week; their usage comes from the chart cache
+    Booking = booking_archive.history(week_keys[-1], day + timedelta(days=6))
+    property_ids = [property_id for (property_id,) in db.session.query(Room.property_id).join(
+        Booking, Booking.room_id == Room.id
+    ).filter(
+        Booking.user_id == current_user_id,
+        Booking.quota_week.in_(week_keys),
+        Booking.status.in_(['approved', 'pending'])
+    ).group_by(Room.property_id).order_by(func.min(Booking.booking_date)).all()]
+    
+    stamps, property_weeks = chart_cache.quota_scope(day, Room.property_id.in_(property_ids)) if property_ids else ({}, {})
+    cache_key, body = response_cache.lookup('usage.weekly', (week_start, day, current_user_id, tuple(property_ids)), stamps)
+    if body is not None:
+        return response_cache.respond(body), 200
+    
+    # Calculate usage by property
+    property_usage = {}
+    total_usage = 0.0
+    
+    payloads = {}
+    for quota_week in set(property_weeks.values()):
+        payloads.update(chart_cache.lookup('usage', quota_week, {
+            property_id: stamp for property_id, stamp in stamps.items() if property_weeks[property_id] == quota_week
+        }))
+    for property_id in property_ids:
+        payload = payloads.get(property_id)
+        member_usage = payload['members'].get(current_user_id) if payload else None
+        if not member_usage:
+            continue
+        
+        property_usage[property_id] = {
+            'property_name': payload['property_name'],
+            'weekly_limit': payload['weekly_limit'],
+            **member_usage
+        }
+        total_usage += member_usage['total_usage']
+    
+    # Calculate warnings and usage percentages
+    usage_summary = {
+        'week_start': week_start.isoformat(),
+        'week_end': week_end.isoformat(),
+        'total_usage': total_usage,
+        'property_breakdown': [],
+        'warnings': [],
+        'overall_status': 'normal'
+    }
+    
+    for prop_id, usage_data in property_usage.items():
+        weekly_limit = usage_data['weekly_limit']
+        total_usage_prop = usage_data['total_usage']
+        usage_percentage = (total_usage_prop / weekly_limit) * 100 if weekly_limit > 0 else 0
+        
+        status = 'normal'
+        if usage_percentage >= 100:
+            status = 'exceeded'
+        elif usage_percentage >= 80:
+            status = 'warning'
+        elif usage_percentage >= 60:
+            status = 'caution'
+        
+        property_summary = {
+            'property_id': prop_id,
+            'property_name': usage_data['property_name'],
+            'week_start': property_weeks[prop_id].isoformat(),
+            'week_end': (property_weeks[prop_id] + timedelta(days=6)).isoformat(),
+            'approved_usage': usage_data['approved_usage'],
+            'pending_usage': usage_data['pending_usage'],
+            'total_usage': total_usage_prop,
+            'weekly_limit': weekly_limit,
+            'usage_percentage': round(usage_percentage, 1),
+            'remaining_days': max(0, weekly_limit - total_usage_prop),
+            'status': status,
+            'bookings': usage_data['bookings']
+        }
+        
+        usage_summary['property_breakdown'].append(property_summary)
+        
+        # Add warnings
+        if status == 'exceeded':
+            usage_summary['warnings'].append({
+                'type': 'exceeded',
+                'message': f"Weekly limit exceeded for {usage_data['property_name']} ({usage_percentage:.1f}%)",
+                'property_id': prop_id
+            })
+            usage_summary['overall_status'] = 'exceeded'
+        elif status == 'warning':
+            usage_summary['warnings'].append({
+                'type': 'warning',
+                'message': f"Approaching weekly limit for {usage_data['property_name']} ({usage_percentage:.1f}%)",
+                'property_id': prop_id
+            })
+            if usage_summary['overall_status'] == 'normal':
+                usage_summary['overall_status'] = 'warning'
+    
+    response = jsonify(usage_summary)
+    response_cache.store(cache_key, response)
+    return response, 200
\ No newline at end of file
@@ -0,0 +1,59 @@
+from collections import defaultdict
+
+SESSION_ORDER = {'morning': 0, 'midday': 1, 'evening': 2}
+
+REASON_MESSAGES = {
+    'granted': 'Approved by batch resolution',
+    'quota': 'Rejected: weekly limit would be exceeded',
+    'overlap': 'Rejected: already holds another room for this session'
+}
+
+def slot_key(booking):
+    return (booking.room_id, booking.booking_date, booking.session_type)
+
+def resolve_pending(pending, approved, weekly_limit):
+    """Decide every pending booking of a week in one deterministic pass.
+    
+    pending     pending bookings of the week
+    approved    bookings of the same week that are already approved
+    Returns a list of (booking, 'approve' | 'reject', reason) and the usage per user
+    before and after the decisions.
+    
+    Slots are visited in chronological order, and requests within a slot from
+    the lowest weekly usage up, then the earliest request. A request is
+    rejected when it would push its user over weekly_limit, or when the user
+    already holds another room for the same date and session. Every pending
+    request already holds one of its slot's places (SlotCounter admits no
+    more than the room's capacity), so there is never a slot to share out.
+    """
+    usage = defaultdict(float)
+    held = set()
+    for booking in approved:
+        usage[booking.user_id] += booking.duration_value
+        held.add((booking.user_id, booking.booking_date, booking.session_type))
+    usage_before = dict(usage)
+    
+    by_slot = defaultdict(list)
+    for booking in pending:
+        by_slot[slot_key(booking)].append(booking)
+    
+    ordered_slots = sorted(
+        by_slot,
+        key=lambda key: (key[1], SESSION_ORDER.get(key[2], 99), key[0])
+    )
+    
+    decisions = []
+    for key in ordered_slots:
+        candidates = sorted(by_slot[key], key=lambda b: (usage[b.user_id], b.created_at, b.id))
+        for booking in candidates:
+            user_slot = (booking.user_id, booking.booking_date, booking.session_type)
+            if user_slot in held:
+                decisions.append((booking, 'reject', 'overlap'))
+            elif weekly_limit > 0 and usage[booking.user_id] + booking.duration_value > weekly_limit:
+                decisions.append((booking, 'reject', 'quota'))
+            else:
+                decisions.append((booking, 'approve', 'granted'))
+                usage[booking.user_id] += booking.duration_value
+                held.add(user_slot)
+    
+    return decisions, usage_before, dict(usage)
\ No newline at end of file
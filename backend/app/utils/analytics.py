@@ -0,0 +1,118 @@
+from app import db
+from app.models.room import Room
+from app.utils.archive import booking_archive
+import numpy as np
+
+SESSION_TYPES = ['morning', 'midday', 'evening']
+STATUSES = ['pending', 'approved', 'rejected']
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def load_booking_columns(property_id, start, end):
+    """Load a property's bookings between two dates as columnar NumPy arrays.
+    
+    Only the columns the analytics need are selected, so rows are never
+    hydrated into ORM objects. Ranges past the archive cutoff read both tables.
+    """
+    Booking = booking_archive.history(start, end)
+    rows = db.session.query(
+        Booking.room_id,
+        Booking.user_id,
+        Booking.booking_date,
+        Booking.session_type,
+        Booking.status,
+        Booking.duration_value
+    ).join(Room, Room.id == Booking.room_id).filter(
+        Room.property_id == property_id,
+        Booking.booking_date >= start,
+        Booking.booking_date <= end
+    ).all()
+    
+    if not rows:
+        return {
+            'room_id': np.array([], dtype=object),
+            'user_id': np.array([], dtype=object),
+            'ordinal': np.array([], dtype=np.int64),
+            'session': np.array([], dtype=np.int64),
+            'status': np.array([], dtype=np.int64),
+            'duration': np.array([], dtype=np.float64)
+        }
+    
+    room_ids, user_ids, dates, sessions, statuses, durations = zip(*rows)
+    session_index = {name: i for i, name in enumerate(SESSION_TYPES)}
+    status_index = {name: i for i, name in enumerate(STATUSES)}
+    return {
+        'room_id': np.array(room_ids, dtype=object),
+        'user_id': np.array(user_ids, dtype=object),
+        'ordinal': np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates)),
+        'session': np.fromiter((session_index[s] for s in sessions), dtype=np.int64, count=len(sessions)),
+        'status': np.fromiter((status_index[s] for s in statuses), dtype=np.int64, count=len(statuses)),
+        'duration': np.array(durations, dtype=np.float64)
+    }
+
+def encode_ids(values, known_ids):
+    """Map an object array of ids onto positions in known_ids (-1 when unknown)."""
+    lookup = {value: i for i, value in enumerate(known_ids)}
+    return np.fromiter((lookup.get(value, -1) for value in values), dtype=np.int64, count=len(values))
+
+def compute_property_analytics(columns, room_ids, member_ids, start, weeks, weekly_limit):
+    """Compute occupancy, per-member usage and moderation rates for a property.
+    
+    Returns plain lists so the result can be serialized directly:
+      - occupancy counts/rates shaped room x weekday x session (approved bookings)
+      - usage shaped member x week (approved and pending durations)
+      - booking totals per status
+    """
+    start_ordinal = start.toordinal()
+    day_offset = columns['ordinal'] - start_ordinal
+    week = day_offset // 7
+    # date(1, 1, 1) has ordinal 1 and is a Monday
+    weekday = (columns['ordinal'] - 1) % 7
+    session = columns['session']
+    status = columns['status']
+    duration = columns['duration']
+    
+    approved = status == STATUSES.index('approved')
+    pending = status == STATUSES.index('pending')
+    
+    # Occupancy heatmap: room x weekday x session
+    n_rooms = len(room_ids)
+    room = encode_ids(columns['room_id'], room_ids)
+    keep = approved & (room >= 0)
+    flat = (room[keep] * 7 + weekday[keep]) * len(SESSION_TYPES) + session[keep]
+    occupancy = np.bincount(flat, minlength=n_rooms * 7 * len(SESSION_TYPES))
+    occupancy = occupancy.reshape(n_rooms, 7, len(SESSION_TYPES))
+    occupancy_rates = occupancy / max(weeks, 1)
+    
+    # Usage matrix: member x week, counting what is charged against the quota
+    n_members = len(member_ids)
+    member = encode_ids(columns['user_id'], member_ids)
+    keep = (approved | pending) & (member >= 0) & (week >= 0) & (week < weeks)
+    usage = np.zeros((n_members, weeks), dtype=np.float64)
+    np.add.at(usage, (member[keep], week[keep]), duration[keep])
+    approved_usage = np.zeros((n_members, weeks), dtype=np.float64)
+    keep_approved = keep & approved
+    np.add.at(approved_usage, (member[keep_approved], week[keep_approved]), duration[keep_approved])
+    
+    over_limit = usage > weekly_limit if weekly_limit > 0 else np.zeros_like(usage, dtype=bool)
+    utilization = usage / weekly_limit if weekly_limit > 0 else np.zeros_like(usage)
+    
+    # Moderation outcomes
+    status_totals = np.bincount(status, minlength=len(STATUSES))
+    decided = status_totals[STATUSES.index('approved')] + status_totals[STATUSES.index('rejected')]
+    approval_rate = status_totals[STATUSES.index('approved')] / decided if decided else 0.0
+    rejection_rate = status_totals[STATUSES.index('rejected')] / decided if decided else 0.0
+    
+    return {
+        'occupancy_counts': occupancy.tolist(),
+        'occupancy_rates': np.round(occupancy_rates, 3).tolist(),
+        'usage': np.round(usage, 2).tolist(),
+        'approved_usage': np.round(approved_usage, 2).tolist(),
+        'average_usage': np.round(usage.mean(axis=1), 2).tolist() if weeks else [0.0] * n_members,
+        'peak_usage': np.round(usage.max(axis=1), 2).tolist() if weeks else [0.0] * n_members,
+        'average_utilization': np.round(utilization.mean(axis=1), 3).tolist() if weeks else [0.0] * n_members,
+        'weeks_over_limit': over_limit.sum(axis=1).astype(int).tolist(),
+        'status_totals': {name: int(status_totals[i]) for i, name in enumerate(STATUSES)},
+        'approval_rate': round(float(approval_rate), 3),
+        'rejection_rate': round(float(rejection_rate), 3),
+        'total_bookings': int(len(status))
+    }
\ No newline at end of file
@@ -0,0 +1,142 @@
+from flask import current_app
+from sqlalchemy import select, delete, union_all, text, func
+from sqlalchemy.orm import aliased
+from app import db
+from app.models.booking import BookingApplication, ArchivedBooking
+from app.utils.sharding import shard_router
+from app.utils.slots import slot_counter
+from app.utils.changelog import change_log
+from datetime import date, timedelta
+import click
+
+class BookingArchive:
+    """Hot/cold split of booking_applications by booking date.
+    
+    Bookings older than ARCHIVE_HORIZON_DAYS are moved in chunks into
+    booking_applications_archive, so the hot table only holds recent and
+    upcoming bookings. Reads whose date range reaches past the cutoff use
+    history(), which maps BookingApplication onto a UNION ALL of both tables.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('ARCHIVE_HORIZON_DAYS', 365)
+        app.config.setdefault('ARCHIVE_CHUNK_SIZE', 1000)
+        app.extensions['booking_archive'] = self
+        
+        @app.cli.command('archive-bookings')
+        @click.option('--dry-run', is_flag=True, help='Only count the bookings that would move.')
+        def archive_bookings_command(dry_run):
+            """Move bookings past the archive horizon out of the hot table."""
+            result = self.archive(dry_run=dry_run)
+            verb = 'Would move' if dry_run else 'Moved'
+            click.echo(f"{verb} {result['moved']} bookings older than {result['cutoff']} to the archive")
+    
+    def cutoff(self):
+        """Get the first booking date that stays in the hot table."""
+        return date.today() - timedelta(days=current_app.config['ARCHIVE_HORIZON_DAYS'])
+    
+    def reaches_archive(self, start):
+        """Check whether a date range starting at start (None for unbounded) needs the archive."""
+        return start is None or start < self.cutoff()
+    
+    def history(self, start=None, end=None):
+        """Get the booking entity to query for a date range.
+        
+        Returns BookingApplication itself while the range stays in the hot
+        table. Otherwise returns it aliased onto a UNION ALL of the hot and
+        archive tables, with the date range pushed into both branches, so
+        callers query and serialize rows exactly as before.
+        """
+        if not self.reaches_archive(start):
+            return BookingApplication
+        
+        hot = BookingApplication.__table__
+        cold = ArchivedBooking.__table__
+        branches = []
+        for table in (hot, cold):
+            branch = select(*[table.c[column.name] for column in hot.columns])
+            if start is not None:
+                branch = branch.where(table.c.booking_date >= start)
+            if end is not None:
+                branch = branch.where(table.c.booking_date <= end)
+            branches.append(branch)
+        return aliased(BookingApplication, union_all(*branches).subquery('booking_history'))
+    
+    def archive(self, cutoff=None, chunk_size=None, dry_run=False):
+        """Move bookings dated before cutoff to the archive, one committed chunk at a time.
+        
+        Each chunk is copied, deleted and logged as deleted for delta sync in
+        the same transaction, so a row is always in exactly one of the two
+        tables and history() never counts it twice. Sharded deployments move
+        each shard's bookings within that shard.
+        """
+        cutoff = cutoff or self.cutoff()
+        chunk_size = chunk_size or current_app.config['ARCHIVE_CHUNK_SIZE']
+        
+        if dry_run:
+            # Summed because a sharded deployment returns one count per shard
+            eligible = sum(count for (count,) in db.session.query(func.count(BookingApplication.id)).filter(
+                BookingApplication.booking_date < cutoff
+            ).all())
+            return {'cutoff': cutoff.isoformat(), 'moved': eligible, 'chunks': 0, 'dry_run': True}
+        
+        hot = BookingApplication.__table__
+        cold = ArchivedBooking.__table__
+        columns = [column.name for column in hot.columns]
+        moved = 0
+        chunks = 0
+        for shard in shard_router.all_shards():
+            bind_arguments = shard_router.bind_arguments(shard)
+            while True:
+                rows = db.session.execute(
+                    select(hot.c.id, hot.c.room_id, hot.c.booking_date).where(
+                        hot.c.booking_date < cutoff
+                    ).order_by(hot.c.booking_date, hot.c.id).limit(chunk_size),
+                    bind_arguments=bind_arguments
+                ).all()
+                if not rows:
+                    break
+                
+                ids = [row.id for row in rows]
+                try:
+                    if db.engine.dialect.name == 'postgresql':
+                        self._ensure_partitions({(row.booking_date.year, row.booking_date.month) for row in rows}, shard)
+                    db.session.execute(cold.insert().from_select(
+                        columns,
+                        select(*[hot.c[name] for name in columns]).where(hot.c.id.in_(ids))
+                    ), bind_arguments=bind_arguments)
+                    db.session.execute(delete(hot).where(hot.c.id.in_(ids)), bind_arguments=bind_arguments)
+                    # Synced clients drop them like any other deleted booking
+                    change_log.record_rows(
+                        BookingApplication, [{'id': row.id, 'room_id': row.room_id} for row in rows], action='delete'
+                    )
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+                
+                moved += len(ids)
+                chunks += 1
+        
+        # Past slots take no new bookings, so their place counts can go too
+        slot_counter.prune(cutoff)
+        db.session.commit()
+        
+        return {'cutoff': cutoff.isoformat(), 'moved': moved, 'chunks': chunks, 'dry_run': False}
+    
+    def _ensure_partitions(self, months, shard):
+        """Create the monthly archive partitions that a chunk needs on its shard (PostgreSQL only)."""
+        parent = ArchivedBooking.__tablename__
+        for year, month in sorted(months):
+            start = date(year, month, 1)
+            end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+            db.session.execute(text(
+                f'CREATE TABLE IF NOT EXISTS {parent}_y{year}m{month:02d} PARTITION OF {parent} '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ), bind_arguments=shard_router.bind_arguments(shard))
+
+booking_archive = BookingArchive()
\ No newline at end of file
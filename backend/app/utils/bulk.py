@@ -0,0 +1,622 @@
+from app import db
+from app.models.user import User
+from app.models.property import Property, PropertyMember
+from app.models.room import Room
+from app.models.booking import BookingApplication
+from app.models.time_allocation import TimeAllocation, quota_week_start
+from app.utils.archive import booking_archive
+from app.utils.changelog import change_log
+from app.utils.sharding import shard_router
+from app.utils.slots import slot_counter, ACTIVE_STATUSES
+from sqlalchemy import select, or_, tuple_
+from datetime import datetime, date
+import csv
+import io
+import json
+import uuid
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+class ImportScope:
+    """Properties a user may bulk-manage, with their rooms and time allocations."""
+    
+    def __init__(self, user):
+        self.user = user
+        if user.role == 'admin':
+            properties = Property.query.all()
+        else:
+            admin_of = db.session.query(PropertyMember.property_id).filter(
+                PropertyMember.user_id == user.id,
+                PropertyMember.role == 'admin',
+                PropertyMember.invitation_status == 'accepted'
+            )
+            properties = Property.query.filter(
+                or_(Property.owner_id == user.id, Property.id.in_(admin_of))
+            ).all()
+        
+        self.properties = {prop.id: prop for prop in properties}
+        self.property_names = {prop.name: prop for prop in properties}
+        rooms = Room.query.filter(Room.property_id.in_(list(self.properties))).all() if properties else []
+        self.rooms = {room.id: room for room in rooms}
+        self.room_names = {(room.property_id, room.name): room for room in rooms}
+        allocations = TimeAllocation.query.filter(
+            TimeAllocation.property_id.in_(list(self.properties))
+        ).all() if properties else []
+        self.allocations = {alloc.property_id: alloc for alloc in allocations}
+    
+    def member_refs(self, property_ids):
+        """Get {property_id: {(kind, value): user_id}} for the owner and accepted members of some properties.
+        
+        Keys are ('id', user id), ('username', username) and ('email', email),
+        as _user_ref() looks them up.
+        """
+        refs = {property_id: {} for property_id in property_ids}
+        if not refs:
+            return refs
+        members = db.session.query(PropertyMember.property_id, User.id, User.username, User.email).join(
+            User, User.id == PropertyMember.user_id
+        ).filter(
+            PropertyMember.property_id.in_(list(refs)),
+            PropertyMember.invitation_status == 'accepted'
+        ).all()
+        owner_ids = {self.properties[property_id].owner_id for property_id in refs}
+        owners = {row[0]: row for row in db.session.query(User.id, User.username, User.email).filter(
+            User.id.in_(owner_ids)
+        ).all()}
+        rows = list(members) + [
+            (property_id,) + tuple(owners[self.properties[property_id].owner_id])
+            for property_id in refs if self.properties[property_id].owner_id in owners
+        ]
+        for property_id, user_id, username, email in rows:
+            refs[property_id].update({('id', user_id): user_id, ('username', username): user_id, ('email', email): user_id})
+        return refs
+    
+    @property
+    def property_ids(self):
+        return list(self.properties)
+    
+    def resolve_property(self, row):
+        property_id = clean(row.get('property_id'))
+        if property_id:
+            return self.properties.get(property_id)
+        property_name = clean(row.get('property_name'))
+        if property_name:
+            return self.property_names.get(property_name)
+        return None
+    
+    def resolve_room(self, row):
+        room_id = clean(row.get('room_id'))
+        if room_id:
+            return self.rooms.get(room_id)
+        property_obj = self.resolve_property(row)
+        room_name = clean(row.get('room_name'))
+        if property_obj and room_name:
+            return self.room_names.get((property_obj.id, room_name))
+        return None
+
+def clean(value):
+    """Normalize a cell: strip strings and treat empty cells as missing."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+def parse_bool(value, default):
+    value = clean(value)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).lower()
+    if text in ('1', 'true', 'yes', 'y', 't'):
+        return True
+    if text in ('0', 'false', 'no', 'n', 'f'):
+        return False
+    raise ValueError(f'Invalid boolean value: {value}')
+
+def parse_id(value):
+    value = clean(value)
+    if value is None:
+        return str(uuid.uuid4())
+    return str(uuid.UUID(str(value)))
+
+def iter_rows(stream, fmt):
+    """Yield (row_number, row, error) from a CSV or NDJSON byte stream without buffering it."""
+    lines = (raw.decode('utf-8-sig') if i == 0 else raw.decode('utf-8') for i, raw in enumerate(stream))
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for number, row in enumerate(reader, start=1):
+            yield number, row, None
+        return
+    
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, 'Invalid JSON'
+            continue
+        if not isinstance(row, dict):
+            yield number, None, 'Each line must be a JSON object'
+            continue
+        yield number, row, None
+
+def chunked(iterable, size=CHUNK_SIZE):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def bulk_insert(model, mappings):
+    """Insert mappings in one statement per shard: COPY on PostgreSQL, executemany elsewhere."""
+    if not mappings:
+        return
+    table = model.__table__
+    for shard, shard_mappings in shard_router.partition(model, mappings).items():
+        connection = db.session.connection(bind_arguments=shard_router.bind_arguments(shard))
+        
+        if connection.dialect.name == 'postgresql':
+            columns = list(shard_mappings[0])
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for mapping in shard_mappings:
+                writer.writerow([_copy_value(mapping[column]) for column in columns])
+            buffer.seek(0)
+            sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+            with connection.connection.cursor() as cursor:
+                cursor.copy_expert(sql, buffer)
+        else:
+            connection.execute(table.insert(), shard_mappings)
+    change_log.record_rows(model, mappings)
+
+def _existing_ids(model, ids):
+    if not ids:
+        return set()
+    return set(db.session.scalars(select(model.id).where(model.id.in_(ids))))
+
+def _resolve_users(rows):
+    """Resolve user_id/username/email references of a chunk with one query."""
+    ids, usernames, emails = set(), set(), set()
+    for _, row in rows:
+        if clean(row.get('user_id')):
+            ids.add(clean(row.get('user_id')))
+        elif clean(row.get('username')):
+            usernames.add(clean(row.get('username')))
+        elif clean(row.get('email')):
+            emails.add(clean(row.get('email')).lower())
+    if not (ids or usernames or emails):
+        return {}
+    users = db.session.query(User.id, User.username, User.email).filter(or_(
+        User.id.in_(ids), User.username.in_(usernames), User.email.in_(emails)
+    )).all()
+    lookup = {}
+    for user_id, username, email in users:
+        lookup[('id', user_id)] = user_id
+        lookup[('username', username)] = user_id
+        lookup[('email', email)] = user_id
+    return lookup
+
+def _user_ref(row, lookup):
+    if clean(row.get('user_id')):
+        return lookup.get(('id', clean(row.get('user_id'))))
+    if clean(row.get('username')):
+        return lookup.get(('username', clean(row.get('username'))))
+    if clean(row.get('email')):
+        return lookup.get(('email', clean(row.get('email')).lower()))
+    return None
+
+def import_properties(rows, scope, state):
+    properties, allocations, errors = [], [], []
+    now = datetime.utcnow()
+    for number, row in rows:
+        row_errors = []
+        try:
+            property_id = parse_id(row.get('id'))
+        except ValueError:
+            row_errors.append('id must be a UUID')
+            property_id = None
+        name = clean(row.get('name'))
+        if not name:
+            row_errors.append('name is required')
+        elif len(name) > 100:
+            row_errors.append('name must be at most 100 characters')
+        try:
+            is_active = parse_bool(row.get('is_active'), True)
+        except ValueError as e:
+            row_errors.append(str(e))
+        try:
+            weekly_limit = float(clean(row.get('weekly_limit_days')) or 7.0)
+            if weekly_limit <= 0:
+                row_errors.append('weekly_limit_days must be positive')
+        except (ValueError, TypeError):
+            row_errors.append('weekly_limit_days must be a number')
+        try:
+            reset_day = int(clean(row.get('reset_day_of_week')) or 1)
+            if reset_day < 1 or reset_day > 7:
+                row_errors.append('reset_day_of_week must be between 1 and 7')
+        except (ValueError, TypeError):
+            row_errors.append('reset_day_of_week must be an integer')
+        if property_id and property_id in state['seen']:
+            row_errors.append('Duplicate id in import')
+        
+        if row_errors:
+            errors.append((number, row_errors))
+            continue
+        
+        state['seen'].add(property_id)
+        properties.append((number, {
+            'id': property_id,
+            'name': name,
+            'description': clean(row.get('description')) or '',
+            'owner_id': scope.user.id,
+            'created_at': now,
+            'is_active': is_active
+        }))
+        allocations.append({
+            'id': str(uuid.uuid4()),
+            'property_id': property_id,
+            'weekly_limit_days': weekly_limit,
+            'morning_duration': 0.5,
+            'midday_duration': 1.0,
+            'evening_duration': 1.0,
+            'reset_day_of_week': reset_day,
+            'created_at': now,
+            'updated_at': now
+        })
+    
+    existing = _existing_ids(Property, [mapping['id'] for _, mapping in properties])
+    valid = []
+    for (number, mapping), allocation in zip(properties, allocations):
+        if mapping['id'] in existing:
+            errors.append((number, ['A property with this id already exists']))
+        else:
+            valid.append((mapping, allocation))
+    
+    bulk_insert(Property, [mapping for mapping, _ in valid])
+    bulk_insert(TimeAllocation, [allocation for _, allocation in valid])
+    return len(valid), errors
+
+def import_rooms(rows, scope, state):
+    rooms, errors = [], []
+    now = datetime.utcnow()
+    for number, row in rows:
+        row_errors = []
+        try:
+            room_id = parse_id(row.get('id'))
+        except ValueError:
+            row_errors.append('id must be a UUID')
+            room_id = None
+        property_obj = scope.resolve_property(row)
+        if not property_obj:
+            row_errors.append('Unknown property or access denied')
+        name = clean(row.get('name'))
+        if not name:
+            row_errors.append('name is required')
+        elif len(name) > 100:
+            row_errors.append('name must be at most 100 characters')
+        try:
+            capacity = int(clean(row.get('capacity')) or 1)
+            if capacity < 1:
+                row_errors.append('capacity must be at least 1')
+        except (ValueError, TypeError):
+            row_errors.append('capacity must be an integer')
+        try:
+            is_active = parse_bool(row.get('is_active'), True)
+        except ValueError as e:
+            row_errors.append(str(e))
+        if room_id and room_id in state['seen']:
+            row_errors.append('Duplicate id in import')
+        
+        if row_errors:
+            errors.append((number, row_errors))
+            continue
+        
+        state['seen'].add(room_id)
+        rooms.append((number, {
+            'id': room_id,
+            'property_id': property_obj.id,
+            'name': name,
+            'capacity': capacity,
+            'description': clean(row.get('description')) or '',
+            'is_active': is_active,
+            'created_at': now
+        }))
+    
+    existing = _existing_ids(Room, [mapping['id'] for _, mapping in rooms])
+    valid = []
+    for number, mapping in rooms:
+        if mapping['id'] in existing:
+            errors.append((number, ['A room with this id already exists']))
+        else:
+            valid.append(mapping)
+    
+    bulk_insert(Room, valid)
+    return len(valid), errors
+
+def import_members(rows, scope, state):
+    members, errors = [], []
+    now = datetime.utcnow()
+    users = _resolve_users(rows)
+    for number, row in rows:
+        row_errors = []
+        property_obj = scope.resolve_property(row)
+        if not property_obj:
+            row_errors.append('Unknown property or access denied')
+        user_id = _user_ref(row, users)
+        if not user_id:
+            row_errors.append('Unknown user (give user_id, username or email)')
+        role = clean(row.get('role')) or 'member'
+        if role not in ('member', 'admin'):
+            row_errors.append('role must be member or admin')
+        invitation_status = clean(row.get('invitation_status')) or 'pending'
+        if invitation_status not in ('pending', 'accepted', 'rejected'):
+            row_errors.append('invitation_status must be pending, accepted or rejected')
+        if property_obj and user_id and (property_obj.id, user_id) in state['seen']:
+            row_errors.append('Duplicate membership in import')
+        
+        if row_errors:
+            errors.append((number, row_errors))
+            continue
+        
+        state['seen'].add((property_obj.id, user_id))
+        members.append((number, {
+            'id': str(uuid.uuid4()),
+            'property_id': property_obj.id,
+            'user_id': user_id,
+            'role': role,
+            'invitation_status': invitation_status,
+            'joined_at': now
+        }))
+    
+    pairs = [(mapping['property_id'], mapping['user_id']) for _, mapping in members]
+    existing = set()
+    if pairs:
+        existing = set(db.session.query(PropertyMember.property_id, PropertyMember.user_id).filter(
+            tuple_(PropertyMember.property_id, PropertyMember.user_id).in_(pairs)
+        ).all())
+    valid = []
+    for number, mapping in members:
+        if (mapping['property_id'], mapping['user_id']) in existing:
+            errors.append((number, ['User is already a member of this property']))
+        else:
+            valid.append(mapping)
+    
+    bulk_insert(PropertyMember, valid)
+    return len(valid), errors
+
+def import_bookings(rows, scope, state):
+    bookings, errors = [], []
+    now = datetime.utcnow()
+    # Bookings may only name the property's owner or accepted members, so
+    # unknown and outside users get the same error
+    members = scope.member_refs({room.property_id for room in (scope.resolve_room(row) for _, row in rows) if room})
+    for number, row in rows:
+        row_errors = []
+        try:
+            booking_id = parse_id(row.get('id'))
+        except ValueError:
+            row_errors.append('id must be a UUID')
+            booking_id = None
+        room = scope.resolve_room(row)
+        if not room:
+            row_errors.append('Unknown room or access denied')
+        user_id = None
+        if not (clean(row.get('user_id')) or clean(row.get('username')) or clean(row.get('email'))):
+            row_errors.append('Give the user as user_id, username or email')
+        elif room:
+            user_id = _user_ref(row, members[room.property_id])
+            if not user_id:
+                row_errors.append('User is not a member of this property')
+        booking_date = None
+        try:
+            booking_date = datetime.strptime(clean(row.get('booking_date')) or '', '%Y-%m-%d').date()
+        except ValueError:
+            row_errors.append('booking_date must be YYYY-MM-DD')
+        session_type = clean(row.get('session_type'))
+        if session_type not in ('morning', 'midday', 'evening'):
+            row_errors.append('session_type must be morning, midday, or evening')
+        status = clean(row.get('status')) or 'pending'
+        if status not in ('pending', 'approved', 'rejected'):
+            row_errors.append('status must be pending, approved or rejected')
+        if room and booking_date and session_type and user_id and (room.id, booking_date, session_type, user_id) in state['seen']:
+            row_errors.append('Duplicate booking of this slot by the same user in import')
+        
+        if row_errors:
+            errors.append((number, row_errors))
+            continue
+        
+        state['seen'].add((room.id, booking_date, session_type, user_id))
+        allocation = scope.allocations.get(room.property_id)
+        if allocation:
+            duration_value = allocation.get_session_duration(session_type)
+            quota_week = allocation.week_start(booking_date)
+        else:
+            duration_value = BookingApplication.get_session_duration(session_type)
+            quota_week = quota_week_start(booking_date)
+        bookings.append((number, {
+            'id': booking_id,
+            'user_id': user_id,
+            'room_id': room.id,
+            'booking_date': booking_date,
+            'session_type': session_type,
+            'status': status,
+            'notes': clean(row.get('notes')) or '',
+            'duration_value': duration_value,
+            'quota_week': quota_week,
+            'created_at': now,
+            'updated_at': now,
+            'approved_by': None,
+            'approval_notes': clean(row.get('approval_notes'))
+        }))
+    
+    existing_ids = _existing_ids(BookingApplication, [mapping['id'] for _, mapping in bookings])
+    slots = [(m['room_id'], m['booking_date'], m['session_type']) for _, m in bookings]
+    held = set()
+    if slots:
+        held = set(db.session.query(
+            BookingApplication.room_id, BookingApplication.booking_date, BookingApplication.session_type,
+            BookingApplication.user_id
+        ).filter(
+            BookingApplication.room_id.in_({slot[0] for slot in slots}),
+            BookingApplication.booking_date.in_({slot[1] for slot in slots}),
+            BookingApplication.status.in_(ACTIVE_STATUSES)
+        ).all())
+    
+    checked = []
+    for number, mapping in bookings:
+        active = mapping['status'] in ACTIVE_STATUSES
+        if mapping['id'] in existing_ids:
+            errors.append((number, ['A booking with this id already exists']))
+        elif active and (mapping['room_id'], mapping['booking_date'], mapping['session_type'], mapping['user_id']) in held:
+            errors.append((number, ['This user already has a booking for this time slot']))
+        else:
+            checked.append((number, mapping))
+    
+    # Pending and approved rows take places, admitted per slot against the room's capacity
+    by_slot = {}
+    for number, mapping in checked:
+        if mapping['status'] in ACTIVE_STATUSES:
+            by_slot.setdefault((mapping['room_id'], mapping['booking_date'], mapping['session_type']), []).append(number)
+    full = set()
+    for slot, numbers in by_slot.items():
+        if not slot_counter.reserve(*slot, count=len(numbers)):
+            full.add(slot)
+            errors.extend((number, ['Not enough free places left in this time slot']) for number in numbers)
+    
+    valid = [
+        mapping for _, mapping in checked
+        if (mapping['room_id'], mapping['booking_date'], mapping['session_type']) not in full
+        or mapping['status'] not in ACTIVE_STATUSES
+    ]
+    bulk_insert(BookingApplication, valid)
+    return len(valid), errors
+
+IMPORTERS = {
+    'properties': import_properties,
+    'rooms': import_rooms,
+    'members': import_members,
+    'bookings': import_bookings
+}
+
+def import_rows(entity, stream, fmt, scope, dry_run=False):
+    """Validate and insert a stream of rows chunk by chunk, returning a per-row error report."""
+    importer = IMPORTERS[entity]
+    state = {'seen': set()}
+    report = {'processed': 0, 'inserted': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+    
+    def record(number, messages):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': number, 'errors': messages})
+        else:
+            report['errors_truncated'] = True
+    
+    for chunk in chunked(iter_rows(stream, fmt)):
+        rows = []
+        for number, row, error in chunk:
+            report['processed'] += 1
+            if error:
+                record(number, [error])
+            else:
+                rows.append((number, row))
+        
+        inserted, errors = importer(rows, scope, state)
+        for number, messages in sorted(errors):
+            record(number, messages)
+        report['inserted'] += inserted
+        
+        # Commit per chunk so a large import never holds one long write lock
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    
+    report['errors'].sort(key=lambda error: error['row'])
+    return report
+
+def export_query(entity, property_ids):
+    """Build the column-only select used to export an entity."""
+    if entity == 'properties':
+        return select(
+            Property.id, Property.name, Property.description, Property.owner_id,
+            Property.is_active, Property.created_at
+        ).where(Property.id.in_(property_ids)).order_by(Property.created_at, Property.id)
+    if entity == 'rooms':
+        return select(
+            Room.id, Room.property_id, Room.name, Room.capacity, Room.description,
+            Room.is_active, Room.created_at
+        ).where(Room.property_id.in_(property_ids)).order_by(Room.property_id, Room.name)
+    if entity == 'members':
+        return select(
+            PropertyMember.id, PropertyMember.property_id, PropertyMember.user_id,
+            User.username, PropertyMember.role, PropertyMember.invitation_status, PropertyMember.joined_at
+        ).join(User, User.id == PropertyMember.user_id).where(
+            PropertyMember.property_id.in_(property_ids)
+        ).order_by(PropertyMember.property_id, User.username)
+    # Exports cover the full history, archived bookings included
+    Booking = booking_archive.history()
+    return select(
+        Booking.id, Room.property_id, Booking.room_id, Room.name.label('room_name'),
+        Booking.user_id, User.username, Booking.booking_date,
+        Booking.session_type, Booking.status, Booking.notes,
+        Booking.duration_value, Booking.created_at,
+        Booking.approved_by, Booking.approval_notes
+    ).join(Room, Room.id == Booking.room_id).join(
+        User, User.id == Booking.user_id
+    ).where(Room.property_id.in_(property_ids)).order_by(
+        Booking.booking_date, Booking.id
+    )
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def iter_export(query, fmt, batch_size=1000):
+    """Stream query rows as CSV or NDJSON text through a server-side cursor."""
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    columns = list(result.keys())
+    
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for partition in result.partitions():
+            for row in partition:
+                writer.writerow([_json_value(value) for value in row])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        return
+    
+    for partition in result.partitions():
+        yield ''.join(
+            json.dumps({column: _json_value(value) for column, value in zip(columns, row)}) + '\n'
+            for row in partition
+        )
\ No newline at end of file
@@ -0,0 +1,276 @@
+from flask import current_app
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy import func
+from collections import OrderedDict
+from app import db
+from app.models.user import User
+from app.models.property import Property, PropertyMember
+from app.models.room import Room
+from app.utils.archive import booking_archive
+from datetime import date, timedelta
+import hashlib
+import threading
+
+FEED_SCOPES = ['user', 'room', 'property']
+FEED_STATUSES = ['approved', 'pending']
+
+# Floating local times, matching the single-timezone model of the app.
+# (start, end, days the end falls after the booking date)
+SESSION_TIMES = {
+    'morning': ('080000', '120000', 0),
+    'midday': ('120000', '170000', 0),
+    'evening': ('170000', '090000', 1)
+}
+
+SESSION_LABELS = {'morning': 'Morning', 'midday': 'Midday', 'evening': 'Evening'}
+
+def escape_text(value):
+    """Escape a TEXT property value (RFC 5545 section 3.3.11)."""
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+def fold_line(line):
+    """Fold a content line at 75 octets (RFC 5545 section 3.1)."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    
+    parts = []
+    current = ''
+    size = 0
+    limit = 75
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > limit:
+            parts.append(current)
+            current = ''
+            size = 0
+            limit = 74  # continuation lines start with a space
+        current += char
+        size += width
+    parts.append(current)
+    return '\r\n '.join(parts)
+
+def format_stamp(value):
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+class FeedCache:
+    """Small thread-safe LRU mapping."""
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def __len__(self):
+        return len(self._entries)
+
+class CalendarFeeds:
+    """Tokenized iCalendar feeds of bookings per user, room and property.
+    
+    A feed token is a signed (scope, object id, user id) triple, so calendar
+    clients can subscribe without a JWT. Each poll runs one aggregate query to
+    get the feed version (row count, latest change and the names shown); a matching
+    If-None-Match or If-Modified-Since is answered without loading a booking.
+    Rendered feeds are cached per (scope, object id, version), and each VEVENT
+    is cached per (booking id, updated_at), so a change to one booking only
+    re-renders that event.
+    """
+    
+    def __init__(self, app=None):
+        self.feeds = None
+        self.events = None
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('CALENDAR_PAST_DAYS', 90)
+        app.config.setdefault('CALENDAR_FEED_CACHE_SIZE', 256)
+        app.config.setdefault('CALENDAR_EVENT_CACHE_SIZE', 20000)
+        app.config.setdefault('CALENDAR_MAX_AGE', 900)
+        self.feeds = FeedCache(app.config['CALENDAR_FEED_CACHE_SIZE'])
+        self.events = FeedCache(app.config['CALENDAR_EVENT_CACHE_SIZE'])
+        app.extensions['calendar_feeds'] = self
+    
+    def _serializer(self):
+        return URLSafeSerializer(current_app.config['JWT_SECRET_KEY'], salt='calendar-feed')
+    
+    def make_token(self, scope, object_id, user_id):
+        """Create the feed token for a scope, signed with the app secret."""
+        return self._serializer().dumps([scope, object_id, user_id])
+    
+    def read_token(self, token):
+        """Get (scope, object id, user id) from a feed token, or None if it is invalid."""
+        try:
+            scope, object_id, user_id = self._serializer().loads(token)
+        except (BadSignature, ValueError, TypeError):
+            return None
+        if scope not in FEED_SCOPES:
+            return None
+        return scope, object_id, user_id
+    
+    def can_view(self, user, scope, object_id):
+        """Check whether a user may still read a feed."""
+        if scope == 'user':
+            return object_id == user.id
+        
+        if scope == 'room':
+            room = Room.query.get(object_id)
+            if not room:
+                return False
+            property_id = room.property_id
+        else:
+            property_id = object_id
+        
+        if user.role == 'admin':
+            return Property.query.get(property_id) is not None
+        
+        property_obj = Property.query.get(property_id)
+        if not property_obj:
+            return False
+        return property_obj.owner_id == user.id or PropertyMember.query.filter_by(
+            property_id=property_id,
+            user_id=user.id,
+            invitation_status='accepted'
+        ).first() is not None
+    
+    def window_start(self):
+        return date.today() - timedelta(days=current_app.config['CALENDAR_PAST_DAYS'])
+    
+    def _scoped(self, query, Booking, scope, object_id):
+        query = query.filter(
+            Booking.booking_date >= self.window_start(),
+            Booking.status.in_(FEED_STATUSES)
+        )
+        if scope == 'user':
+            return query.filter(Booking.user_id == object_id)
+        if scope == 'room':
+            return query.filter(Booking.room_id == object_id)
+        return query.join(Room, Room.id == Booking.room_id).filter(Room.property_id == object_id)
+    
+    def _named(self, query, Booking, scope, object_id):
+        """Scope a booking query and join the user, room and property names the events show."""
+        query = self._scoped(query.join(User, User.id == Booking.user_id), Booking, scope, object_id)
+        if scope != 'property':
+            query = query.join(Room, Room.id == Booking.room_id)
+        return query.join(Property, Property.id == Room.property_id)
+    
+    def version(self, scope, object_id):
+        """Get (count, last modified, names digest) for a feed with one aggregate query.
+        
+        Renaming a user, room or property changes no booking, so the names the
+        events show are part of the version through a digest of their groups.
+        """
+        Booking = booking_archive.history(self.window_start())
+        names = (User.username, Room.name, Property.name)
+        # A user feed spans properties, so a sharded deployment returns rows from every shard
+        rows = self._named(
+            db.session.query(*names, func.count(Booking.id), func.max(Booking.updated_at), func.max(Booking.created_at)),
+            Booking, scope, object_id
+        ).group_by(*names).all()
+        count = sum(row[3] for row in rows)
+        last_modified = max(filter(None, [stamp for row in rows for stamp in row[4:]]), default=None)
+        digest = hashlib.blake2b(digest_size=8)
+        for group in sorted(set(tuple(row[:3]) for row in rows)):
+            digest.update('\x1f'.join(group).encode('utf-8') + b'\x1e')
+        return count, last_modified, digest.hexdigest()
+    
+    def etag(self, scope, object_id, version):
+        count, last_modified, names = version
+        key = f"{scope}:{object_id}:{count}:{last_modified.isoformat() if last_modified else ''}:{names}"
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def feed_name(self, scope, object_id):
+        if scope == 'user':
+            user = User.query.get(object_id)
+            return f"RoomieFlow - {user.username if user else 'My bookings'}"
+        if scope == 'room':
+            room = Room.query.get(object_id)
+            return f"RoomieFlow - {room.name} ({room.property.name})" if room else 'RoomieFlow'
+        property_obj = Property.query.get(object_id)
+        return f'RoomieFlow - {property_obj.name}' if property_obj else 'RoomieFlow'
+    
+    def render(self, scope, object_id, version):
+        """Get the ICS body of a feed, rendering only events that are not cached."""
+        etag = self.etag(scope, object_id, version)
+        body = self.feeds.get(etag)
+        if body is not None:
+            return body
+        
+        Booking = booking_archive.history(self.window_start())
+        query = self._named(db.session.query(
+            Booking.id, Booking.booking_date, Booking.session_type, Booking.status,
+            Booking.notes, Booking.created_at, Booking.updated_at,
+            User.username, Room.name.label('room_name'), Property.name.label('property_name')
+        ), Booking, scope, object_id)
+        rows = query.order_by(Booking.booking_date, Booking.session_type, Booking.id).all()
+        
+        lines = [
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            'PRODID:-//RoomieFlow//Booking Feed//EN',
+            'CALSCALE:GREGORIAN',
+            'METHOD:PUBLISH',
+            fold_line(f'X-WR-CALNAME:{escape_text(self.feed_name(scope, object_id))}'),
+            'REFRESH-INTERVAL;VALUE=DURATION:PT15M',
+            'X-PUBLISHED-TTL:PT15M'
+        ]
+        body = '\r\n'.join(lines) + '\r\n'
+        body += ''.join(self._event(scope, row) for row in rows)
+        body += 'END:VCALENDAR\r\n'
+        
+        self.feeds.put(etag, body)
+        return body
+    
+    def _event(self, scope, row):
+        changed = row.updated_at or row.created_at
+        key = (scope, row.id, changed, row.status, row.username, row.room_name, row.property_name)
+        event = self.events.get(key)
+        if event is not None:
+            return event
+        
+        start_time, end_time, end_offset = SESSION_TIMES[row.session_type]
+        end_date = row.booking_date + timedelta(days=end_offset)
+        session = SESSION_LABELS[row.session_type]
+        if scope == 'user':
+            summary = f'{row.room_name} ({row.property_name}) - {session}'
+        elif scope == 'room':
+            summary = f'{row.username} - {session}'
+        else:
+            summary = f'{row.username} - {row.room_name} - {session}'
+        if row.status == 'pending':
+            summary += ' (pending)'
+        
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:{row.id}@roomieflow',
+            f'DTSTAMP:{format_stamp(changed)}',
+            f"DTSTART:{row.booking_date.strftime('%Y%m%d')}T{start_time}",
+            f"DTEND:{end_date.strftime('%Y%m%d')}T{end_time}",
+            fold_line(f'SUMMARY:{escape_text(summary)}'),
+            fold_line(f'LOCATION:{escape_text(f"{row.room_name}, {row.property_name}")}'),
+            'STATUS:CONFIRMED' if row.status == 'approved' else 'STATUS:TENTATIVE',
+            f'LAST-MODIFIED:{format_stamp(changed)}'
+        ]
+        if row.notes:
+            lines.append(fold_line(f'DESCRIPTION:{escape_text(row.notes)}'))
+        lines.append('END:VEVENT')
+        
+        event = '\r\n'.join(lines) + '\r\n'
+        self.events.put(key, event)
+        return event
+
+calendar_feeds = CalendarFeeds()
\ No newline at end of file
@@ -0,0 +1,280 @@
+from flask import current_app
+from sqlalchemy import BigInteger, event, inspect, select, delete, func, literal, literal_column, tuple_, and_, or_
+from sqlalchemy.orm import Session, aliased
+from app import db
+from app.models.user import User
+from app.models.property import Property, PropertyMember
+from app.models.room import Room
+from app.models.booking import BookingApplication
+from app.models.change_log import ChangeLogEntry
+from app.utils.sharding import shard_router
+from datetime import datetime
+import click
+
+ENTITY_TYPES = {
+    Property: 'property',
+    Room: 'room',
+    PropertyMember: 'membership',
+    BookingApplication: 'booking'
+}
+
+# Transaction ids as bigint (xid8 only casts through text; PostgreSQL 13+)
+CURRENT_TXID = literal_column('pg_current_xact_id()::text::bigint')
+# Every transaction below this id has finished, and no later one can get an id below it
+SNAPSHOT_XMIN = literal_column('pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+
+def property_dict(row):
+    return {
+        'id': row.id,
+        'name': row.name,
+        'description': row.description,
+        'owner_id': row.owner_id,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'is_active': row.is_active
+    }
+
+def membership_dict(row):
+    return {
+        'id': row.id,
+        'property_id': row.property_id,
+        'user_id': row.user_id,
+        'username': row.username,
+        'role': row.role,
+        'invitation_status': row.invitation_status,
+        'joined_at': row.joined_at.isoformat() if row.joined_at else None
+    }
+
+def booking_dict(row):
+    return {
+        'id': row.id,
+        'property_id': row.property_id,
+        'room_id': row.room_id,
+        'user_id': row.user_id,
+        'booking_date': row.booking_date.isoformat(),
+        'session_type': row.session_type,
+        'status': row.status,
+        'notes': row.notes,
+        'duration_value': row.duration_value,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+        'approved_by': row.approved_by,
+        'approval_notes': row.approval_notes
+    }
+
+def _first(query, key, limit):
+    # Snapshot pages walk each table in id order
+    return query if limit is None else query.order_by(key).limit(limit)
+
+def load_properties(*conditions, limit=None):
+    rows = _first(db.session.query(
+        Property.id, Property.name, Property.description, Property.owner_id, Property.created_at, Property.is_active
+    ).filter(*conditions), Property.id, limit)
+    return {row.id: property_dict(row) for row in rows}
+
+def load_rooms(*conditions, limit=None):
+    return {room.id: room.to_dict() for room in _first(Room.query.filter(*conditions), Room.id, limit)}
+
+def load_memberships(*conditions, limit=None):
+    rows = _first(db.session.query(
+        PropertyMember.id, PropertyMember.property_id, PropertyMember.user_id, User.username,
+        PropertyMember.role, PropertyMember.invitation_status, PropertyMember.joined_at
+    ).join(User, User.id == PropertyMember.user_id).filter(*conditions), PropertyMember.id, limit)
+    return {row.id: membership_dict(row) for row in rows}
+
+def load_bookings(*conditions, limit=None):
+    rows = _first(db.session.query(
+        BookingApplication.id, Room.property_id, BookingApplication.room_id, BookingApplication.user_id,
+        BookingApplication.booking_date, BookingApplication.session_type, BookingApplication.status,
+        BookingApplication.notes, BookingApplication.duration_value, BookingApplication.created_at,
+        BookingApplication.updated_at, BookingApplication.approved_by, BookingApplication.approval_notes
+    ).join(Room, Room.id == BookingApplication.room_id).filter(*conditions), BookingApplication.id, limit)
+    return {row.id: booking_dict(row) for row in rows}
+
+class ChangeLog:
+    """Append-only log of changes to properties, rooms, memberships and bookings, for delta sync.
+    
+    A flush hook appends one id-only row per changed object to change_log on
+    the same connection, so entries commit or roll back with the change they
+    describe; bulk imports and the archive record theirs through
+    record_rows. Each entry carries the property it belongs to, and
+    membership entries also carry the member, so sync reads only the entries
+    a user can see since their cursor, a (txid, seq) position per shard.
+    SQLite allows one writer at a time, so its entries commit in seq order.
+    PostgreSQL writers run concurrently and seq can commit out of order, so
+    each entry records its transaction id; readers walk (txid, seq) and stop
+    below the xmin of their snapshot, where every writer has finished and no
+    new one can start. compact() deletes entries superseded by a later one
+    for the same object, which never changes what any cursor syncs to.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('CHANGE_LOG_ENABLED', True)
+        app.config.setdefault('SYNC_PAGE_SIZE', 500)
+        app.extensions['change_log'] = self
+        
+        if not event.contains(Session, 'after_flush', self._append_changes):
+            event.listen(Session, 'after_flush', self._append_changes)
+        
+        @app.cli.command('compact-change-log')
+        def compact_change_log_command():
+            """Delete change log entries superseded by a newer change to the same object."""
+            click.echo(f'Deleted {self.compact()} superseded change log entries')
+    
+    def _append_changes(self, session, flush_context):
+        if not current_app.config['CHANGE_LOG_ENABLED']:
+            return
+        changes = []
+        for instance in session.new:
+            if type(instance) in ENTITY_TYPES:
+                changes.append((instance, 'upsert'))
+        for instance in session.dirty:
+            if type(instance) in ENTITY_TYPES and session.is_modified(instance, include_collections=False):
+                changes.append((instance, 'upsert'))
+            elif isinstance(instance, User) and inspect(instance).attrs.username.history.has_changes():
+                # Memberships carry the username
+                with session.no_autoflush:
+                    changes.extend((member, 'upsert') for member in session.query(PropertyMember).filter_by(user_id=instance.id))
+        for instance in session.deleted:
+            if type(instance) in ENTITY_TYPES:
+                changes.append((instance, 'delete'))
+        if not changes:
+            return
+        
+        now = datetime.utcnow()
+        rows = []
+        with session.no_autoflush:
+            for instance, action in changes:
+                current, previous = self._properties(session, instance)
+                row = {
+                    'entity_type': ENTITY_TYPES[type(instance)],
+                    'entity_id': instance.id,
+                    'user_id': instance.user_id if isinstance(instance, PropertyMember) else None,
+                    'changed_at': now
+                }
+                if current is not None:
+                    rows.append(dict(row, property_id=current, action=action))
+                # An object moved to another property disappears from the old one
+                rows.extend(dict(row, property_id=old, action='delete') for old in previous if old != current)
+        self._insert(session, rows)
+    
+    def _properties(self, session, instance):
+        """Get the current property id of a changed object and the ones it was moved away from."""
+        if isinstance(instance, Property):
+            return instance.id, []
+        if isinstance(instance, BookingApplication):
+            previous = [self._room_property(session, room_id) for room_id in inspect(instance).attrs.room_id.history.deleted or ()]
+            return self._room_property(session, instance.room_id), [property_id for property_id in previous if property_id]
+        return instance.property_id, list(inspect(instance).attrs.property_id.history.deleted or ())
+    
+    def _room_property(self, session, room_id):
+        # Rooms of new bookings are normally in the identity map already
+        room = session.get(Room, room_id) if room_id is not None else None
+        return room.property_id if room is not None else None
+    
+    def record_rows(self, model, mappings, action='upsert'):
+        """Log rows written without the ORM (bulk imports, archiving) in the caller's transaction."""
+        if model not in ENTITY_TYPES or not mappings or not current_app.config['CHANGE_LOG_ENABLED']:
+            return
+        entity_type = ENTITY_TYPES[model]
+        if model is BookingApplication:
+            room_ids = list({mapping['room_id'] for mapping in mappings})
+            room_properties = dict(db.session.query(Room.id, Room.property_id).filter(Room.id.in_(room_ids)).all())
+        now = datetime.utcnow()
+        rows = []
+        for mapping in mappings:
+            if model is Property:
+                property_id = mapping['id']
+            elif model is BookingApplication:
+                property_id = room_properties.get(mapping['room_id'])
+            else:
+                property_id = mapping['property_id']
+            rows.append({
+                'entity_type': entity_type,
+                'entity_id': mapping['id'],
+                'property_id': property_id,
+                'user_id': mapping.get('user_id') if model is PropertyMember else None,
+                'action': action,
+                'changed_at': now
+            })
+        self._insert(db.session, [row for row in rows if row['property_id'] is not None])
+    
+    def _insert(self, session, rows):
+        if not rows:
+            return
+        for shard, shard_rows in shard_router.partition(ChangeLogEntry, rows).items():
+            connection = session.connection(bind_arguments=shard_router.bind_arguments(shard))
+            insert = ChangeLogEntry.__table__.insert()
+            if connection.dialect.name == 'postgresql':
+                insert = insert.values(txid=CURRENT_TXID)
+            connection.execute(insert, shard_rows)
+    
+    def _postgresql(self, shard):
+        return db.session.connection(bind_arguments=shard_router.bind_arguments(shard)).dialect.name == 'postgresql'
+    
+    def position(self, entry):
+        """Get the (txid, seq) position of an entry; txid is 0 outside PostgreSQL."""
+        return entry.txid or 0, entry.seq
+    
+    def head(self):
+        """Get a position on every shard that all committed entries are at or before."""
+        positions = {}
+        for shard in shard_router.all_shards():
+            if self._postgresql(shard):
+                # Writers still running get a txid from xmin upwards
+                query = select(SNAPSHOT_XMIN, literal(0))
+            else:
+                query = select(literal(0), func.coalesce(func.max(ChangeLogEntry.seq), 0))
+            positions[shard] = tuple(db.session.execute(query, bind_arguments=shard_router.bind_arguments(shard)).one())
+        return positions
+    
+    def entries_since(self, cursor, property_ids, user_id, limit):
+        """Get up to limit entries per shard after the cursor that the user can see, and whether more remain."""
+        entries = []
+        more = False
+        visible = or_(ChangeLogEntry.property_id.in_(property_ids), ChangeLogEntry.user_id == user_id)
+        txid = func.coalesce(ChangeLogEntry.txid, 0)
+        for shard in shard_router.all_shards():
+            after_txid, after_seq = cursor.get(shard, (0, 0))
+            if self._postgresql(shard):
+                after = tuple_(literal(after_txid, BigInteger), literal(after_seq, BigInteger))
+                query = select(ChangeLogEntry).where(
+                    tuple_(txid, ChangeLogEntry.seq) > after, txid < SNAPSHOT_XMIN, visible
+                ).order_by(txid, ChangeLogEntry.seq)
+            else:
+                query = select(ChangeLogEntry).where(ChangeLogEntry.seq > after_seq, visible).order_by(ChangeLogEntry.seq)
+            rows = db.session.execute(
+                query.limit(limit + 1),
+                bind_arguments=shard_router.bind_arguments(shard)
+            ).scalars().all()
+            if len(rows) > limit:
+                rows = rows[:limit]
+                more = True
+            entries.extend((shard, row) for row in rows)
+        return entries, more
+    
+    def compact(self):
+        """Delete every entry that a later entry for the same object and property supersedes."""
+        newer = aliased(ChangeLogEntry)
+        txid, newer_txid = func.coalesce(ChangeLogEntry.txid, 0), func.coalesce(newer.txid, 0)
+        # Later in the order cursors walk, so a cursor before the deleted entry is before its successor too
+        superseded = select(newer.seq).where(
+            newer.entity_type == ChangeLogEntry.entity_type,
+            newer.entity_id == ChangeLogEntry.entity_id,
+            newer.property_id == ChangeLogEntry.property_id,
+            or_(newer_txid > txid, and_(newer_txid == txid, newer.seq > ChangeLogEntry.seq))
+        ).exists()
+        deleted = 0
+        for shard in shard_router.all_shards():
+            result = db.session.execute(
+                delete(ChangeLogEntry).where(superseded).execution_options(synchronize_session=False),
+                bind_arguments=shard_router.bind_arguments(shard)
+            )
+            deleted += result.rowcount
+        db.session.commit()
+        return deleted
+
+change_log = ChangeLog()
\ No newline at end of file
@@ -0,0 +1,441 @@
+from flask import current_app
+from sqlalchemy import event, func, inspect, case, literal, select
+from sqlalchemy.orm import Session
+from collections import OrderedDict, defaultdict
+from app import db
+from app.models.user import User
+from app.models.property import Property, PropertyMember
+from app.models.room import Room
+from app.models.time_allocation import TimeAllocation
+from app.models.booking import BookingApplication
+from app.models.change_log import ChangeLogEntry
+from app.utils.archive import booking_archive
+from datetime import date, timedelta
+import threading
+import time
+import click
+
+KINDS = ['chart', 'usage']
+LOOKUP_RESULTS = ['warm', 'hit', 'cold']
+SESSION_TYPES = ['morning', 'midday', 'evening']
+USAGE_STATUSES = ['approved', 'pending']
+
+# Seconds to let a burst of commits settle before the warmer re-renders
+WAKE_DELAY = 1.0
+
+# Change log entries for the names a payload shows (usernames change through memberships)
+NAME_ENTITIES = ['property', 'room', 'membership']
+
+def property_stamp():
+    """Get the columns stamping a property's names and time allocation.
+    
+    These are the count and last seq of its name entries in the change log
+    and the last update of its time allocation. They correlate on
+    Room.property_id, so they ride along in a stamp query grouped by it. The
+    count also moves when a PostgreSQL entry commits after one with a
+    higher seq.
+    """
+    entries = select(ChangeLogEntry.seq).where(
+        ChangeLogEntry.property_id == Room.property_id,
+        ChangeLogEntry.entity_type.in_(NAME_ENTITIES)
+    )
+    return (entries.with_only_columns(func.count()).scalar_subquery(),
+            entries.with_only_columns(func.max(ChangeLogEntry.seq)).scalar_subquery(),
+            select(TimeAllocation.updated_at).where(TimeAllocation.property_id == Room.property_id).scalar_subquery())
+
+def build_chart(property_id, week_start):
+    """Get the chart bookings of one property and week, by date and session.
+    
+    Viewer-specific fields (can_modify) are left out; the route adds them.
+    """
+    week_end = week_start + timedelta(days=6)
+    Booking = booking_archive.history(week_start, week_end)
+    rows = db.session.query(
+        Booking.id, Booking.booking_date, Booking.session_type, Booking.user_id, Booking.room_id,
+        Booking.status, Booking.notes, Booking.duration_value, Booking.created_at,
+        User.username, Room.name.label('room_name'), Property.name.label('property_name')
+    ).join(Room, Room.id == Booking.room_id).outerjoin(
+        User, User.id == Booking.user_id
+    ).outerjoin(
+        Property, Property.id == Room.property_id
+    ).filter(
+        Room.property_id == property_id,
+        Booking.booking_date >= week_start,
+        Booking.booking_date <= week_end
+    ).order_by(Booking.booking_date, Booking.created_at).all()
+    
+    booking_data = {}
+    for row in rows:
+        sessions = booking_data.setdefault(row.booking_date.isoformat(), {name: [] for name in SESSION_TYPES})
+        sessions[row.session_type].append({
+            'id': row.id,
+            'user': row.username or 'Unknown',
+            'user_id': row.user_id,
+            'room_name': row.room_name or 'Unknown Room',
+            'room_id': row.room_id,
+            'property_name': row.property_name or 'Unknown Property',
+            'status': row.status,
+            'notes': row.notes,
+            'duration': row.duration_value,
+            'created_at': row.created_at.isoformat() if row.created_at else None
+        })
+    return booking_data
+
+def build_usage(property_id, week_start):
+    """Get the approved and pending usage of every member of one property in a quota week."""
+    week_end = week_start + timedelta(days=6)
+    Booking = booking_archive.history(week_start, week_end)
+    rows = db.session.query(
+        Booking.id, Booking.user_id, Booking.booking_date, Booking.session_type,
+        Booking.status, Booking.duration_value, Booking.notes
+    ).join(Room, Room.id == Booking.room_id).filter(
+        Room.property_id == property_id,
+        Booking.quota_week == week_start,
+        Booking.status.in_(USAGE_STATUSES)
+    ).order_by(Booking.booking_date, Booking.created_at).all()
+    
+    property_name = db.session.query(Property.name).filter(Property.id == property_id).scalar()
+    time_alloc = TimeAllocation.query.filter_by(property_id=property_id).first()
+    
+    members = {}
+    for row in rows:
+        usage = members.setdefault(row.user_id, {
+            'approved_usage': 0.0,
+            'pending_usage': 0.0,
+            'total_usage': 0.0,
+            'bookings': []
+        })
+        usage['bookings'].append({
+            'id': row.id,
+            'date': row.booking_date.isoformat(),
+            'session': row.session_type,
+            'status': row.status,
+            'duration': row.duration_value,
+            'notes': row.notes
+        })
+        if row.status == 'approved':
+            usage['approved_usage'] += row.duration_value
+        else:
+            usage['pending_usage'] += row.duration_value
+        usage['total_usage'] += row.duration_value
+    
+    return {
+        'property_name': property_name or 'Unknown',
+        'weekly_limit': time_alloc.weekly_limit_days if time_alloc else 7.0,
+        'members': members
+    }
+
+BUILDERS = {'chart': build_chart, 'usage': build_usage}
+
+class ChartCache:
+    """Per-worker cache of chart and usage payloads by (property, week), kept warm in the background.
+    
+    Chart weeks are 7-day calendar windows; usage weeks are the property's
+    quota weeks (see app.utils.quota_weeks).
+    
+    Each request runs one grouped aggregate query for the booking count and
+    latest change of every property it shows, plus the position of its
+    property, room and membership entries in the change log and the last
+    update of its time allocation, and reuses a cached payload whenever that
+    stamp still matches, so bookings, renames and new limits from other
+    workers are picked up as well. Commits that touch bookings, rooms, memberships,
+    properties, time allocations or usernames drop the affected entries
+    right away, and the warmer re-renders exactly those properties first.
+    With CHART_WARM_ENABLED a background thread keeps the current and next
+    CHART_WARM_WEEKS weeks of every property with bookings built, using at
+    most CHART_WARM_CPU_BUDGET of one core. Lookups are counted as warm
+    (built by the warmer), hit (built by an earlier request) or cold (built
+    while the request waited).
+    """
+    
+    def __init__(self, app=None):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._lookups = defaultdict(int)
+        self._room_properties = {}
+        self._listeners = []
+        self._dirty = set()
+        self._wake = threading.Event()
+        self._warmer = None
+        self.warm_stats = {'cycles': 0, 'builds': 0, 'cpu_seconds': 0.0, 'throttled_seconds': 0.0, 'last_cycle': None}
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('CHART_CACHE_SIZE', 4096)
+        app.config.setdefault('CHART_CACHE_MAX_AGE', 300)
+        app.config.setdefault('CHART_WARM_ENABLED', False)
+        app.config.setdefault('CHART_WARM_WEEKS', 2)
+        app.config.setdefault('CHART_WARM_INTERVAL', 30)
+        app.config.setdefault('CHART_WARM_CPU_BUDGET', 0.2)
+        app.extensions['chart_cache'] = self
+        app.before_request(self._before_request)
+        
+        if not event.contains(Session, 'after_flush', self._collect_changes):
+            event.listen(Session, 'after_flush', self._collect_changes)
+            event.listen(Session, 'after_commit', self._apply_changes)
+            event.listen(Session, 'after_rollback', self._forget_changes)
+        
+        from app.utils.metrics import request_metrics
+        request_metrics.register_collector(self.render_metrics)
+        
+        @app.cli.command('warm-charts')
+        def warm_charts_command():
+            """Build the chart and usage cache for the upcoming weeks once."""
+            click.echo(self.warm_once())
+    
+    def stamps(self, week_start, *conditions):
+        """Get {property id: stamp} for a week: booking count, last update, last insert, then property_stamp().
+        
+        conditions filter on Room (usually Room.property_id); properties
+        without bookings that week are left out, their payloads are empty.
+        """
+        return self.scope(week_start, *conditions)[0]
+    
+    def scope(self, week_start, *conditions, viewer_id=None):
+        """Get the stamps of a week plus the property ids where viewer_id has a booking, in one query."""
+        week_end = week_start + timedelta(days=6)
+        Booking = booking_archive.history(week_start, week_end)
+        booked = func.max(case((Booking.user_id == viewer_id, 1), else_=0)) if viewer_id else literal(0)
+        rows = db.session.query(
+            Room.property_id, booked, func.count(Booking.id), func.max(Booking.updated_at), func.max(Booking.created_at),
+            *property_stamp()
+        ).select_from(Booking).join(Room, Room.id == Booking.room_id).filter(
+            Booking.booking_date >= week_start,
+            Booking.booking_date <= week_end,
+            *conditions
+        ).group_by(Room.property_id).all()
+        return {row[0]: tuple(row[2:]) for row in rows}, {row[0] for row in rows if row[1]}
+    
+    def quota_scope(self, day, *conditions):
+        """Get the stamps of the quota week holding day in each property, plus {property id: quota week}.
+        
+        Every property's quota weeks are 7 days apart, so exactly one of the
+        7 week keys up to day can match its bookings.
+        """
+        keys = [day - timedelta(days=offset) for offset in range(7)]
+        Booking = booking_archive.history(keys[-1], day + timedelta(days=6))
+        rows = db.session.query(
+            Room.property_id, func.max(Booking.quota_week),
+            func.count(Booking.id), func.max(Booking.updated_at), func.max(Booking.created_at), *property_stamp()
+        ).select_from(Booking).join(Room, Room.id == Booking.room_id).filter(
+            Booking.quota_week.in_(keys),
+            *conditions
+        ).group_by(Room.property_id).all()
+        return {row[0]: tuple(row[2:]) for row in rows}, {row[0]: row[1] for row in rows}
+    
+    def lookup(self, kind, week_start, stamps):
+        """Get {property id: payload} for the properties in stamps, building missing or stale ones."""
+        max_age = current_app.config['CHART_CACHE_MAX_AGE']
+        now = time.monotonic()
+        payloads = {}
+        for property_id, stamp in stamps.items():
+            entry = self._get((kind, property_id, week_start))
+            if entry is not None and entry['stamp'] == stamp and now - entry['built_at'] < max_age:
+                result = 'warm' if entry['source'] == 'warmer' else 'hit'
+            else:
+                entry = self._build(kind, property_id, week_start, stamp, 'request')
+                result = 'cold'
+            with self._lock:
+                self._lookups[(kind, result)] += 1
+            payloads[property_id] = entry['payload']
+        return payloads
+    
+    def invalidate(self, property_ids=None, notify=True):
+        """Drop the cached payloads of some properties (all when None) and queue them for the warmer.
+        
+        Listeners hear about it unless notify is false, as when the change
+        was made by another worker.
+        """
+        with self._lock:
+            if property_ids is None:
+                self._dirty.update(key[1] for key in self._entries)
+                self._entries.clear()
+            else:
+                property_ids = set(property_ids)
+                for key in [key for key in self._entries if key[1] in property_ids]:
+                    del self._entries[key]
+                self._dirty.update(property_ids)
+        self._wake.set()
+        if notify:
+            for listener in self._listeners:
+                listener(property_ids)
+    
+    def register_listener(self, listener):
+        """Call listener(property_ids) whenever properties are invalidated (None means all)."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+    
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def _build(self, kind, property_id, week_start, stamp, source):
+        entry = {
+            'payload': BUILDERS[kind](property_id, week_start),
+            'stamp': stamp,
+            'built_at': time.monotonic(),
+            'source': source
+        }
+        max_entries = current_app.config['CHART_CACHE_SIZE']
+        with self._lock:
+            self._entries[(kind, property_id, week_start)] = entry
+            self._entries.move_to_end((kind, property_id, week_start))
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+        return entry
+    
+    def warm_once(self):
+        """Build every missing or stale payload of the warm window once, changed properties first."""
+        config = current_app.config
+        budget = min(max(config['CHART_WARM_CPU_BUDGET'], 0.01), 1.0)
+        refresh_age = config['CHART_CACHE_MAX_AGE'] * 0.75
+        today = date.today()
+        first_week = today - timedelta(days=today.weekday())
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        
+        work = []
+        for index in range(config['CHART_WARM_WEEKS'] + 1):
+            week_start = first_week + timedelta(weeks=index)
+            for property_id, stamp in self.stamps(week_start).items():
+                work.append((property_id not in dirty, index, 'chart', property_id, week_start, stamp))
+            # Usage goes by each property's quota week
+            stamps, weeks = self.quota_scope(today + timedelta(weeks=index))
+            for property_id, stamp in stamps.items():
+                work.append((property_id not in dirty, index, 'usage', property_id, weeks[property_id], stamp))
+        db.session.rollback()
+        work.sort(key=lambda item: item[:2])
+        
+        built = 0
+        for _, _, kind, property_id, week_start, stamp in work:
+            with self._lock:
+                entry = self._entries.get((kind, property_id, week_start))
+            if (entry is not None and entry['stamp'] == stamp
+                    and time.monotonic() - entry['built_at'] < refresh_age):
+                continue
+            
+            started = time.thread_time()
+            self._build(kind, property_id, week_start, stamp, 'warmer')
+            db.session.rollback()
+            spent = time.thread_time() - started
+            built += 1
+            
+            # Sleep in proportion to the CPU used, so the warmer stays within its share of a core
+            pause = spent * (1 - budget) / budget
+            with self._lock:
+                self.warm_stats['builds'] += 1
+                self.warm_stats['cpu_seconds'] += spent
+                self.warm_stats['throttled_seconds'] += pause
+            time.sleep(pause)
+        
+        with self._lock:
+            self.warm_stats['cycles'] += 1
+            self.warm_stats['last_cycle'] = time.time()
+        return {'properties': len({item[3] for item in work}), 'weeks': config['CHART_WARM_WEEKS'] + 1, 'built': built}
+    
+    def start_warmer(self, app):
+        """Start the background warmer thread of this worker, if it is not running."""
+        with self._lock:
+            if self._warmer is not None and self._warmer.is_alive():
+                return
+            self._warmer = threading.Thread(target=self._run_warmer, args=(app,), name='chart-cache-warmer', daemon=True)
+            self._warmer.start()
+    
+    def _run_warmer(self, app):
+        while True:
+            with app.app_context():
+                try:
+                    self.warm_once()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Chart cache warm-up failed')
+                finally:
+                    db.session.remove()
+            if self._wake.wait(app.config['CHART_WARM_INTERVAL']):
+                time.sleep(WAKE_DELAY)
+            self._wake.clear()
+    
+    def _before_request(self):
+        # Started lazily so forked workers each run their own warmer
+        if self._warmer is None and current_app.config['CHART_WARM_ENABLED']:
+            self.start_warmer(current_app._get_current_object())
+    
+    def _collect_changes(self, session, flush_context):
+        changed = session.info.setdefault('chart_cache_changes', set())
+        rooms = set()
+        for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(instance, BookingApplication):
+                rooms.update(self._values(instance, 'room_id'))
+            elif isinstance(instance, (Room, TimeAllocation, PropertyMember)):
+                changed.update(self._values(instance, 'property_id'))
+                if isinstance(instance, Room):
+                    self._room_properties.pop(instance.id, None)
+            elif isinstance(instance, Property):
+                changed.add(instance.id)
+            elif isinstance(instance, User) and inspect(instance).attrs.username.history.has_changes():
+                # Usernames appear in every chart of the user's properties
+                changed.add(None)
+        
+        unknown = [room_id for room_id in rooms if room_id not in self._room_properties]
+        if unknown:
+            with session.no_autoflush:
+                for room_id, property_id in session.query(Room.id, Room.property_id).filter(Room.id.in_(unknown)):
+                    self._room_properties[room_id] = property_id
+        changed.update(self._room_properties.get(room_id) for room_id in rooms if room_id in self._room_properties)
+    
+    def _values(self, instance, name):
+        # Old and new values, so a booking moved between rooms clears both properties
+        return [value for value in inspect(instance).attrs[name].history.sum() if value is not None]
+    
+    def _forget_changes(self, session):
+        session.info.pop('chart_cache_changes', None)
+    
+    def _apply_changes(self, session):
+        changed = session.info.pop('chart_cache_changes', None)
+        if not changed:
+            return
+        self.invalidate(None if None in changed else changed)
+    
+    def stats(self):
+        """Get cache size, lookup counts with warm and cold rates, and warmer activity."""
+        with self._lock:
+            lookups = {kind: {result: self._lookups[(kind, result)] for result in LOOKUP_RESULTS} for kind in KINDS}
+            warmer = dict(self.warm_stats, pending_properties=len(self._dirty))
+            warmer['running'] = self._warmer is not None and self._warmer.is_alive()
+            entries = len(self._entries)
+        total = sum(sum(counts.values()) for counts in lookups.values())
+        warm = sum(counts['warm'] for counts in lookups.values())
+        cold = sum(counts['cold'] for counts in lookups.values())
+        return {
+            'entries': entries,
+            'lookups': lookups,
+            'warm_rate': round(warm / total, 4) if total else None,
+            'cold_rate': round(cold / total, 4) if total else None,
+            'warmer': warmer
+        }
+    
+    def render_metrics(self):
+        stats = self.stats()
+        lines = [
+            '# HELP roomieflow_chart_cache_lookups_total Chart and usage cache lookups by result (warm, hit, cold).',
+            '# TYPE roomieflow_chart_cache_lookups_total counter'
+        ]
+        for kind in KINDS:
+            for result in LOOKUP_RESULTS:
+                lines.append(f'roomieflow_chart_cache_lookups_total{{kind="{kind}",result="{result}"}} {stats["lookups"][kind][result]}')
+        lines.append('# HELP roomieflow_chart_cache_entries Cached chart and usage payloads.')
+        lines.append('# TYPE roomieflow_chart_cache_entries gauge')
+        lines.append(f'roomieflow_chart_cache_entries {stats["entries"]}')
+        lines.append('# HELP roomieflow_chart_cache_warm_builds_total Payloads built by the background warmer.')
+        lines.append('# TYPE roomieflow_chart_cache_warm_builds_total counter')
+        lines.append(f'roomieflow_chart_cache_warm_builds_total {stats["warmer"]["builds"]}')
+        lines.append('# HELP roomieflow_chart_cache_warm_cpu_seconds_total CPU time used by the background warmer.')
+        lines.append('# TYPE roomieflow_chart_cache_warm_cpu_seconds_total counter')
+        lines.append(f'roomieflow_chart_cache_warm_cpu_seconds_total {stats["warmer"]["cpu_seconds"]:.6f}')
+        return lines
+
+chart_cache = ChartCache()
\ No newline at end of file
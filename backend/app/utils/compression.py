@@ -0,0 +1,182 @@
+from flask import request, current_app
+from collections import OrderedDict
+import hashlib
+import threading
+import gzip
+
+# Optional encoders, used only when installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MIMETYPES = [
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/calendar',
+    'text/plain',
+    'text/html'
+]
+
+def available_encodings():
+    """Get the content codings this process can produce, best first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+def negotiate_encoding(accept_encoding, encodings):
+    """Pick the best encoding the client accepts, or None for identity."""
+    if not accept_encoding:
+        return None
+    
+    accepted = {}
+    for part in accept_encoding.split(','):
+        pieces = part.strip().split(';')
+        coding = pieces[0].strip().lower()
+        quality = 1.0
+        for param in pieces[1:]:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding] = quality
+    
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+def compress_bytes(data, encoding, level=6):
+    """Compress a payload with the given content coding."""
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+class ResponseCompressor:
+    """Compress eligible responses and keep an ETag-keyed cache of the encoded bytes.
+    
+    Responses above COMPRESS_MIN_SIZE with an allow-listed mimetype are encoded
+    with the best coding the client accepts. GET responses get a weak ETag of
+    the uncompressed body, so a matching If-None-Match short-circuits to a 304,
+    and identical payloads reuse the cached compressed bytes instead of
+    compressing again.
+    """
+    
+    def __init__(self, app=None):
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+        app.config.setdefault('COMPRESS_CACHE_MAX_BYTES', 8 * 1024 * 1024)
+        app.config.setdefault('COMPRESS_ETAG', True)
+        app.extensions['response_compressor'] = self
+        app.after_request(self.after_request)
+    
+    def after_request(self, response):
+        config = current_app.config
+        
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        if response.status_code < 200 or response.status_code >= 300 or response.status_code == 204:
+            return response
+        if response.mimetype not in config['COMPRESS_MIMETYPES']:
+            return response
+        
+        data = response.get_data()
+        digest = None
+        
+        # Weak ETag over the uncompressed body, shared by every encoding
+        if config['COMPRESS_ETAG'] and request.method == 'GET' and response.status_code == 200:
+            digest = response.get_etag()[0]
+            if not digest:
+                digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+                response.set_etag(digest, weak=True)
+            if request.if_none_match.contains_weak(digest):
+                response.status_code = 304
+                response.set_data(b'')
+                response.headers.pop('Content-Length', None)
+                response.headers.pop('Content-Type', None)
+                return response
+        
+        if not config['COMPRESS_ENABLED'] or 'Content-Encoding' in response.headers:
+            return response
+        
+        response.vary.add('Accept-Encoding')
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''), available_encodings())
+        if encoding is None:
+            return response
+        
+        compressed = None
+        if digest is not None:
+            compressed = self._cache_get((digest, encoding))
+        if compressed is None:
+            compressed = compress_bytes(data, encoding, config['COMPRESS_LEVEL'])
+            if digest is not None:
+                self._cache_put((digest, encoding), compressed, config['COMPRESS_CACHE_MAX_BYTES'])
+        
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = str(len(compressed))
+        return response
+    
+    def cache_stats(self):
+        """Get hit/miss counters and current size of the compressed-bytes cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._cache),
+                'bytes': self._cache_bytes
+            }
+    
+    def _cache_get(self, key):
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def _cache_put(self, key, value, max_bytes):
+        if len(value) > max_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = value
+            self._cache_bytes += len(value)
+            while self._cache_bytes > max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+response_compressor = ResponseCompressor()
\ No newline at end of file
@@ -0,0 +1,235 @@
+from flask import g, request, jsonify, current_app
+from collections import defaultdict, deque
+from app.utils.metrics import Histogram
+import math
+import threading
+import time
+
+# Highest priority first; under overload the last class is shed first
+PRIORITY_CLASSES = ['auth', 'write', 'read', 'admin']
+
+# Queue wait (seconds) each class tolerates before it is shed
+DEFAULT_TARGETS = {'auth': 1.0, 'write': 0.5, 'read': 0.25, 'admin': 0.1}
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+EXEMPT_ENDPOINTS = {'health_check', 'metrics', 'static'}
+
+ADMIN_ENDPOINTS = {'users.get_users'}
+ADMIN_BLUEPRINTS = {'admin', 'bulk'}
+
+# POST endpoints that only read
+READ_ENDPOINTS = {'batch.run_batch'}
+
+def classify(endpoint, method):
+    """Get the priority class of a request, or None if it is never shed."""
+    if endpoint is None or endpoint in EXEMPT_ENDPOINTS:
+        return None
+    blueprint = endpoint.partition('.')[0]
+    if blueprint == 'auth':
+        return 'auth'
+    if blueprint in ADMIN_BLUEPRINTS or endpoint in ADMIN_ENDPOINTS:
+        return 'admin'
+    if method in ('GET', 'HEAD') or endpoint in READ_ENDPOINTS:
+        return 'read'
+    return 'write'
+
+class DecayingAverage:
+    """Exponentially weighted average that also fades towards zero over time."""
+    
+    def __init__(self, alpha=0.2, half_life=2.0):
+        self.alpha = alpha
+        self.half_life = half_life
+        self.value = 0.0
+        self.updated = time.monotonic()
+    
+    def current(self, now):
+        return self.value * 0.5 ** ((now - self.updated) / self.half_life)
+    
+    def observe(self, sample, now):
+        self.value = self.current(now) * (1 - self.alpha) + sample * self.alpha
+        self.updated = now
+
+class Waiter:
+    __slots__ = ('event', 'granted')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+class LoadShedder:
+    """Admission control with priority classes for the worker's request threads.
+    
+    At most LOADSHED_MAX_CONCURRENCY requests run at once; the rest wait, and
+    a freed slot always goes to the oldest waiter of the highest class. Each
+    class keeps an average of its queue wait. Once the average of a class
+    passes its target, new requests of that class and of every lower class are
+    answered with 503 and Retry-After instead of queueing, and requests that
+    are already waiting give up after LOADSHED_WAIT_FACTOR times their target.
+    Lower classes have tighter targets, so admin listings go first, then
+    chart and usage reads, then booking writes, and auth last. Averages fade
+    over time, so shedding stops once the queue drains.
+    """
+    
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._waiting = {name: deque() for name in PRIORITY_CLASSES}
+        self._running = defaultdict(int)
+        self._wait = {name: DecayingAverage() for name in PRIORITY_CLASSES}
+        self._wait_histogram = {name: Histogram(WAIT_BUCKETS) for name in PRIORITY_CLASSES}
+        self._admitted = defaultdict(int)
+        self._shed = defaultdict(int)
+        self.in_flight = 0
+        self.targets = dict(DEFAULT_TARGETS)
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('LOADSHED_ENABLED', True)
+        app.config.setdefault('LOADSHED_MAX_CONCURRENCY', 16)
+        app.config.setdefault('LOADSHED_TARGETS', DEFAULT_TARGETS)
+        app.config.setdefault('LOADSHED_WAIT_FACTOR', 4)
+        app.config.setdefault('LOADSHED_RETRY_AFTER', 2)
+        self.targets = {**DEFAULT_TARGETS, **app.config['LOADSHED_TARGETS']}
+        app.extensions['load_shedder'] = self
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        
+        from app.utils.metrics import request_metrics
+        request_metrics.register_collector(self.render_metrics)
+    
+    def overloaded(self, priority, now):
+        """Check whether this class or any class above it is past its target."""
+        target = self.targets[priority]
+        for name in PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority) + 1]:
+            if self._wait[name].current(now) > target:
+                return True
+        return False
+    
+    def admit(self, priority, max_concurrency, wait_factor):
+        """Take a run slot for a request, waiting if needed.
+        
+        Returns None once admitted, or the reason the request was shed.
+        """
+        started = time.monotonic()
+        with self._lock:
+            higher_waiting = any(self._waiting[name] for name in PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority) + 1])
+            if self.in_flight < max_concurrency and not higher_waiting:
+                self._start(priority, 0.0, started)
+                return None
+            if self.overloaded(priority, started):
+                self._shed[(priority, 'overload')] += 1
+                return 'overload'
+            waiter = Waiter()
+            self._waiting[priority].append(waiter)
+        
+        waiter.event.wait(self.targets[priority] * wait_factor)
+        now = time.monotonic()
+        with self._lock:
+            if waiter.granted:
+                self._record_wait(priority, now - started, now)
+                return None
+            self._waiting[priority].remove(waiter)
+            self._record_wait(priority, now - started, now)
+            self._shed[(priority, 'timeout')] += 1
+            return 'timeout'
+    
+    def release(self, priority):
+        with self._lock:
+            self.in_flight -= 1
+            self._running[priority] -= 1
+            for name in PRIORITY_CLASSES:
+                if self._waiting[name]:
+                    waiter = self._waiting[name].popleft()
+                    waiter.granted = True
+                    self.in_flight += 1
+                    self._running[name] += 1
+                    self._admitted[name] += 1
+                    waiter.event.set()
+                    break
+    
+    def _start(self, priority, wait, now):
+        self.in_flight += 1
+        self._running[priority] += 1
+        self._admitted[priority] += 1
+        self._record_wait(priority, wait, now)
+    
+    def _record_wait(self, priority, wait, now):
+        self._wait[priority].observe(wait, now)
+        self._wait_histogram[priority].observe(wait)
+    
+    def _before_request(self):
+        if not current_app.config['LOADSHED_ENABLED'] or request.method == 'OPTIONS':
+            return None
+        priority = classify(request.endpoint, request.method)
+        if priority is None:
+            return None
+        
+        config = current_app.config
+        reason = self.admit(priority, config['LOADSHED_MAX_CONCURRENCY'], config['LOADSHED_WAIT_FACTOR'])
+        if reason is None:
+            g.loadshed_priority = priority
+            return None
+        
+        current_app.logger.warning('Shed %s request to %s (%s)', priority, request.endpoint, reason)
+        response = jsonify({'error': 'Server is busy, please try again shortly'})
+        response.status_code = 503
+        retry_after = config['LOADSHED_RETRY_AFTER']
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after * (PRIORITY_CLASSES.index(priority) + 1))))
+        return response
+    
+    def _teardown_request(self, exc):
+        priority = g.pop('loadshed_priority', None)
+        if priority is not None:
+            self.release(priority)
+    
+    def snapshot(self):
+        """Get the current state of each priority class."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    'running': self._running[name],
+                    'waiting': len(self._waiting[name]),
+                    'queue_wait_seconds': self._wait[name].current(now),
+                    'target_seconds': self.targets[name],
+                    'shedding': self.overloaded(name, now)
+                }
+                for name in PRIORITY_CLASSES
+            }
+    
+    def render_metrics(self):
+        state = self.snapshot()
+        lines = [
+            '# HELP roomieflow_loadshed_in_flight Requests running, by priority class.',
+            '# TYPE roomieflow_loadshed_in_flight gauge'
+        ]
+        lines.extend(f'roomieflow_loadshed_in_flight{{class="{name}"}} {state[name]["running"]}' for name in PRIORITY_CLASSES)
+        lines.append('# HELP roomieflow_loadshed_queued Requests waiting for a slot, by priority class.')
+        lines.append('# TYPE roomieflow_loadshed_queued gauge')
+        lines.extend(f'roomieflow_loadshed_queued{{class="{name}"}} {state[name]["waiting"]}' for name in PRIORITY_CLASSES)
+        lines.append('# HELP roomieflow_loadshed_queue_wait_average_seconds Decaying average queue wait, by priority class.')
+        lines.append('# TYPE roomieflow_loadshed_queue_wait_average_seconds gauge')
+        lines.extend(
+            f'roomieflow_loadshed_queue_wait_average_seconds{{class="{name}"}} {state[name]["queue_wait_seconds"]:.6f}'
+            for name in PRIORITY_CLASSES
+        )
+        lines.append('# HELP roomieflow_loadshed_shedding Whether new requests of a class are being shed.')
+        lines.append('# TYPE roomieflow_loadshed_shedding gauge')
+        lines.extend(f'roomieflow_loadshed_shedding{{class="{name}"}} {int(state[name]["shedding"])}' for name in PRIORITY_CLASSES)
+        
+        with self._lock:
+            lines.append('# HELP roomieflow_loadshed_queue_wait_seconds Time spent waiting for a slot.')
+            lines.append('# TYPE roomieflow_loadshed_queue_wait_seconds histogram')
+            for name in PRIORITY_CLASSES:
+                lines.extend(self._wait_histogram[name].render('roomieflow_loadshed_queue_wait_seconds', **{'class': name}))
+            lines.append('# HELP roomieflow_loadshed_admitted_total Requests admitted, by priority class.')
+            lines.append('# TYPE roomieflow_loadshed_admitted_total counter')
+            lines.extend(f'roomieflow_loadshed_admitted_total{{class="{name}"}} {self._admitted[name]}' for name in PRIORITY_CLASSES)
+            lines.append('# HELP roomieflow_loadshed_shed_total Requests rejected with 503, by priority class and reason.')
+            lines.append('# TYPE roomieflow_loadshed_shed_total counter')
+            for (name, reason), count in sorted(self._shed.items()):
+                lines.append(f'roomieflow_loadshed_shed_total{{class="{name}",reason="{reason}"}} {count}')
+        return lines
+
+load_shedder = LoadShedder()
\ No newline at end of file
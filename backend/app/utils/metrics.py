@@ -0,0 +1,189 @@
+from flask import g, request, has_request_context, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import defaultdict
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in fail mode when a request runs more SQL statements than its budget."""
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+class Histogram:
+    """Cumulative Prometheus-style histogram."""
+    
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+    
+    def render(self, name, **labels):
+        lines = []
+        for bound, count in zip(self.buckets, self.counts):
+            lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {count}')
+        lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {self.count}')
+        lines.append(f'{name}_sum{_labels(**labels)} {self.total:.6f}')
+        lines.append(f'{name}_count{_labels(**labels)} {self.count}')
+        return lines
+
+class RequestMetrics:
+    """Per-endpoint request latency and SQL statistics, rendered for Prometheus.
+    
+    Flask request hooks time each request and record it on teardown, which
+    also runs for requests that ended in an unhandled exception (counted as
+    500 when no response was built); SQLAlchemy cursor events count the
+    statements it runs and the time spent in them. With SQL_QUERY_BUDGET set,
+    requests over the budget are logged (warn mode) or fail at the offending
+    statement (fail mode), which catches N+1 query patterns in dev and tests.
+    """
+    
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self._queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self._sql_time = defaultdict(float)
+        self._responses = defaultdict(int)
+        self._collectors = []
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('SQL_QUERY_BUDGET', 0)
+        app.config.setdefault('SQL_QUERY_BUDGET_MODE', 'warn')
+        app.config.setdefault('SQL_QUERY_BUDGETS', {})
+        app.extensions['request_metrics'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+    
+    def register_collector(self, collector):
+        """Add a callable returning extra exposition lines for /api/metrics."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+    
+    def budget_for(self, endpoint):
+        """Get the SQL statement budget for an endpoint (0 means unlimited)."""
+        config = current_app.config
+        return config['SQL_QUERY_BUDGETS'].get(endpoint, config['SQL_QUERY_BUDGET'])
+    
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+    
+    def _after_request(self, response):
+        if 'metrics_started' not in g:
+            return response
+        g.metrics_status = response.status_code
+        
+        endpoint = request.endpoint or 'unmatched'
+        sql_count = g.get('sql_count', 0)
+        budget = self.budget_for(endpoint)
+        if budget:
+            response.headers['X-SQL-Queries'] = str(sql_count)
+            if sql_count > budget:
+                current_app.logger.warning(
+                    'Query budget exceeded on %s: %d statements (budget %d)', endpoint, sql_count, budget
+                )
+        return response
+    
+    def _teardown_request(self, exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        # No status when the exception escaped before a response was built
+        status = g.pop('metrics_status', 500)
+        
+        with self._lock:
+            self._latency[endpoint].observe(elapsed)
+            self._queries[endpoint].observe(g.get('sql_count', 0))
+            self._sql_time[endpoint] += g.get('sql_time', 0.0)
+            self._responses[(endpoint, request.method, status)] += 1
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g.sql_started = time.perf_counter()
+    
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context() or 'sql_count' not in g:
+            return
+        
+        g.sql_count += 1
+        started = g.pop('sql_started', None)
+        if started is not None:
+            g.sql_time += time.perf_counter() - started
+        
+        if current_app.config['SQL_QUERY_BUDGET_MODE'] == 'fail':
+            budget = self.budget_for(request.endpoint or 'unmatched')
+            if budget and g.sql_count > budget:
+                raise QueryBudgetExceeded(
+                    f'{request.endpoint} ran {g.sql_count} SQL statements (budget {budget}): {statement}'
+                )
+    
+    def snapshot(self):
+        """Get a plain-dict copy of the per-endpoint statistics."""
+        with self._lock:
+            return {
+                endpoint: {
+                    'requests': histogram.count,
+                    'latency_seconds': histogram.total,
+                    'sql_queries': self._queries[endpoint].total,
+                    'sql_seconds': self._sql_time[endpoint]
+                }
+                for endpoint, histogram in self._latency.items()
+            }
+    
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines.append('# HELP roomieflow_requests_total Requests handled, by endpoint, method and status.')
+            lines.append('# TYPE roomieflow_requests_total counter')
+            for (endpoint, method, status), count in sorted(self._responses.items()):
+                lines.append(f'roomieflow_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+            
+            lines.append('# HELP roomieflow_request_duration_seconds Request latency by endpoint.')
+            lines.append('# TYPE roomieflow_request_duration_seconds histogram')
+            for endpoint in sorted(self._latency):
+                lines.extend(self._latency[endpoint].render('roomieflow_request_duration_seconds', endpoint=endpoint))
+            
+            lines.append('# HELP roomieflow_sql_queries_per_request SQL statements executed per request.')
+            lines.append('# TYPE roomieflow_sql_queries_per_request histogram')
+            for endpoint in sorted(self._queries):
+                lines.extend(self._queries[endpoint].render('roomieflow_sql_queries_per_request', endpoint=endpoint))
+            
+            lines.append('# HELP roomieflow_sql_duration_seconds_total Time spent executing SQL by endpoint.')
+            lines.append('# TYPE roomieflow_sql_duration_seconds_total counter')
+            for endpoint in sorted(self._sql_time):
+                lines.append(f'roomieflow_sql_duration_seconds_total{_labels(endpoint=endpoint)} {self._sql_time[endpoint]:.6f}')
+        
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+request_metrics = RequestMetrics()
\ No newline at end of file
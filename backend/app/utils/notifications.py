@@ -0,0 +1,319 @@
+from flask import current_app
+from email.message import EmailMessage
+from sqlalchemy import or_, and_
+from collections import defaultdict
+from app import db
+from app.models.user import User
+from app.models.property import PropertyMember
+from app.models.notification import NotificationOutbox
+from app.utils.sharding import shard_router
+from datetime import datetime, timedelta
+import importlib
+import random
+import smtplib
+import socket
+import json
+import time
+import uuid
+import os
+import click
+
+SESSION_LABELS = {'morning': 'Morning', 'midday': 'Midday', 'evening': 'Evening'}
+
+def enqueue(recipient_id, event_type, payload, source=None):
+    """Add a notification to the outbox in the caller's transaction.
+    
+    Nothing is sent here: the row commits or rolls back together with the
+    change it describes (source, when sharded, is written to the same shard)
+    and the outbox worker delivers it later.
+    """
+    entry = NotificationOutbox(
+        recipient_id=recipient_id,
+        event_type=event_type,
+        payload=json.dumps(payload)
+    )
+    if source is not None:
+        shard_router.colocate(entry, source)
+    db.session.add(entry)
+    return entry
+
+def booking_payload(booking):
+    room = booking.room
+    property_obj = room.property if room else None
+    return {
+        'booking_id': booking.id,
+        'username': booking.user.username if booking.user else 'Unknown',
+        'room_name': room.name if room else 'Unknown Room',
+        'property_name': property_obj.name if property_obj else 'Unknown Property',
+        'booking_date': booking.booking_date.isoformat(),
+        'session_type': booking.session_type,
+        'status': booking.status,
+        'notes': booking.notes,
+        'approval_notes': booking.approval_notes
+    }
+
+def notify_booking_created(booking):
+    """Tell the property owner and admins about a new booking application."""
+    property_obj = booking.room.property
+    recipients = {property_obj.owner_id}
+    admins = db.session.query(PropertyMember.user_id).filter(
+        PropertyMember.property_id == property_obj.id,
+        PropertyMember.role == 'admin',
+        PropertyMember.invitation_status == 'accepted'
+    ).all()
+    recipients.update(user_id for (user_id,) in admins)
+    recipients.discard(booking.user_id)
+    
+    payload = booking_payload(booking)
+    for recipient_id in sorted(recipients):
+        enqueue(recipient_id, 'booking_created', payload, source=booking)
+
+def notify_booking_decided(booking):
+    """Tell the applicant that their booking was approved or rejected."""
+    enqueue(booking.user_id, f'booking_{booking.status}', booking_payload(booking), source=booking)
+
+def describe_event(event_type, payload):
+    """Get a (subject, text) pair for one outbox event."""
+    slot = (f"{payload['room_name']} ({payload['property_name']}), "
+            f"{payload['booking_date']} {SESSION_LABELS.get(payload['session_type'], payload['session_type'])}")
+    if event_type == 'booking_created':
+        subject = f'New booking request: {slot}'
+        text = f"{payload['username']} applied for {slot}."
+        if payload.get('notes'):
+            text += f"\nNotes: {payload['notes']}"
+    elif event_type == 'booking_approved':
+        subject = f'Booking approved: {slot}'
+        text = f'Your booking for {slot} was approved.'
+    elif event_type == 'booking_rejected':
+        subject = f'Booking rejected: {slot}'
+        text = f'Your booking for {slot} was rejected.'
+    else:
+        subject = 'RoomieFlow notification'
+        text = json.dumps(payload)
+    if event_type in ('booking_approved', 'booking_rejected') and payload.get('approval_notes'):
+        text += f"\nNotes: {payload['approval_notes']}"
+    return subject, text
+
+def build_digest(user, entries, sender):
+    """Coalesce every pending event of one recipient into a single email."""
+    described = [describe_event(entry.event_type, entry.data) for entry in entries]
+    
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = user.email
+    if len(described) == 1:
+        message['Subject'] = described[0][0]
+        body = described[0][1]
+    else:
+        message['Subject'] = f'RoomieFlow: {len(described)} booking updates'
+        body = '\n\n'.join(f'- {text}' for _, text in described)
+    message.set_content(f'Hi {user.username},\n\n{body}\n\n-- \nRoomieFlow\n')
+    return message
+
+class LogTransport:
+    """Write messages to the application log instead of sending them."""
+    
+    def __init__(self, config):
+        self.config = config
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def send(self, message):
+        current_app.logger.info('Notification to %s: %s\n%s', message['To'], message['Subject'], message.get_content())
+
+class SMTPTransport:
+    """Send messages over one SMTP connection per batch."""
+    
+    def __init__(self, config):
+        self.host = config['MAIL_SERVER']
+        self.port = config['MAIL_PORT']
+        self.username = config['MAIL_USERNAME']
+        self.password = config['MAIL_PASSWORD']
+        self.use_tls = config['MAIL_USE_TLS']
+        self.timeout = config['MAIL_TIMEOUT']
+        self.connection = None
+    
+    def __enter__(self):
+        self.connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            self.connection.starttls()
+        if self.username:
+            self.connection.login(self.username, self.password)
+        return self
+    
+    def __exit__(self, *exc):
+        try:
+            self.connection.quit()
+        except smtplib.SMTPException:
+            pass
+        self.connection = None
+        return False
+    
+    def send(self, message):
+        self.connection.send_message(message)
+
+TRANSPORTS = {
+    'log': LogTransport,
+    'smtp': SMTPTransport
+}
+
+def load_transport(config):
+    """Build the transport named by NOTIFY_TRANSPORT (a built-in name or 'module:Class')."""
+    name = config['NOTIFY_TRANSPORT']
+    if name in TRANSPORTS:
+        return TRANSPORTS[name](config)
+    module_name, _, class_name = name.partition(':')
+    return getattr(importlib.import_module(module_name), class_name)(config)
+
+class OutboxSender:
+    """Batched background delivery of the notification outbox.
+    
+    Each run claims up to NOTIFY_BATCH_SIZE due rows, groups them by
+    recipient into one digest email each and sends the digests over a single
+    transport connection. Failed digests go back to pending with exponential
+    backoff and are marked failed after NOTIFY_MAX_ATTEMPTS. Rows left in
+    'sending' by a crashed worker are reclaimed once their lease expires.
+    """
+    
+    def __init__(self, app=None):
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('NOTIFY_TRANSPORT', 'log')
+        app.config.setdefault('NOTIFY_BATCH_SIZE', 100)
+        app.config.setdefault('NOTIFY_MAX_ATTEMPTS', 6)
+        app.config.setdefault('NOTIFY_BACKOFF_SECONDS', 30)
+        app.config.setdefault('NOTIFY_BACKOFF_MAX_SECONDS', 3600)
+        app.config.setdefault('NOTIFY_LEASE_SECONDS', 300)
+        app.config.setdefault('NOTIFY_POLL_SECONDS', 5)
+        app.config.setdefault('MAIL_SERVER', 'localhost')
+        app.config.setdefault('MAIL_PORT', 25)
+        app.config.setdefault('MAIL_USERNAME', None)
+        app.config.setdefault('MAIL_PASSWORD', None)
+        app.config.setdefault('MAIL_USE_TLS', False)
+        app.config.setdefault('MAIL_TIMEOUT', 10)
+        app.config.setdefault('MAIL_SENDER', 'RoomieFlow <noreply@roomieflow.local>')
+        app.extensions['outbox_sender'] = self
+        
+        @app.cli.command('send-notifications')
+        @click.option('--once', is_flag=True, help='Deliver one batch and exit.')
+        def send_notifications_command(once):
+            """Deliver queued notifications from the outbox."""
+            if once:
+                click.echo(self.run_once())
+            else:
+                self.run_forever()
+    
+    def claim(self, batch_size):
+        """Claim a batch of due outbox rows for this worker and return them."""
+        now = datetime.utcnow()
+        lease_expired = now - timedelta(seconds=current_app.config['NOTIFY_LEASE_SECONDS'])
+        due = or_(
+            and_(NotificationOutbox.status == 'pending', NotificationOutbox.available_at <= now),
+            and_(NotificationOutbox.status == 'sending', NotificationOutbox.claimed_at < lease_expired)
+        )
+        
+        # SKIP LOCKED lets several workers claim side by side on PostgreSQL;
+        # the conditional UPDATE below keeps the claim safe everywhere else
+        candidates = db.session.query(NotificationOutbox.id).filter(due).order_by(
+            NotificationOutbox.created_at
+        ).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not candidates:
+            db.session.rollback()
+            return []
+        
+        claim_token = f'{self.worker_id}:{uuid.uuid4().hex[:12]}'[-64:]
+        NotificationOutbox.query.filter(
+            NotificationOutbox.id.in_([row.id for row in candidates]),
+            due
+        ).update({
+            NotificationOutbox.status: 'sending',
+            NotificationOutbox.claimed_by: claim_token,
+            NotificationOutbox.claimed_at: now
+        }, synchronize_session=False)
+        db.session.commit()
+        
+        return NotificationOutbox.query.filter_by(claimed_by=claim_token, status='sending').order_by(
+            NotificationOutbox.created_at
+        ).all()
+    
+    def backoff(self, attempts):
+        """Get the delay before retry number attempts, with jitter."""
+        config = current_app.config
+        delay = min(config['NOTIFY_BACKOFF_SECONDS'] * 2 ** (attempts - 1), config['NOTIFY_BACKOFF_MAX_SECONDS'])
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+    
+    def run_once(self):
+        """Deliver one batch and return counts of what happened."""
+        config = current_app.config
+        entries = self.claim(config['NOTIFY_BATCH_SIZE'])
+        result = {'claimed': len(entries), 'emails': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+        if not entries:
+            return result
+        
+        by_recipient = defaultdict(list)
+        for entry in entries:
+            by_recipient[entry.recipient_id].append(entry)
+        users = {user.id: user for user in User.query.filter(User.id.in_(list(by_recipient))).all()}
+        
+        outcomes = {}
+        try:
+            with load_transport(config) as transport:
+                for recipient_id, recipient_entries in by_recipient.items():
+                    user = users.get(recipient_id)
+                    if not user or not user.email:
+                        outcomes[recipient_id] = ('failed', 'Recipient has no email address')
+                        continue
+                    try:
+                        transport.send(build_digest(user, recipient_entries, config['MAIL_SENDER']))
+                        outcomes[recipient_id] = ('sent', None)
+                        result['emails'] += 1
+                    except (smtplib.SMTPException, OSError) as e:
+                        outcomes[recipient_id] = ('retry', str(e))
+        except (smtplib.SMTPException, OSError) as e:
+            # Could not open the connection: the whole batch is retried
+            current_app.logger.warning('Notification transport unavailable: %s', e)
+            for recipient_id in by_recipient:
+                outcomes.setdefault(recipient_id, ('retry', str(e)))
+        
+        now = datetime.utcnow()
+        for recipient_id, recipient_entries in by_recipient.items():
+            outcome, error = outcomes.get(recipient_id, ('retry', 'Not attempted'))
+            for entry in recipient_entries:
+                entry.attempts += 1
+                entry.claimed_by = None
+                entry.last_error = error
+                if outcome == 'sent':
+                    entry.status = 'sent'
+                    entry.sent_at = now
+                    result['sent'] += 1
+                elif outcome == 'failed' or entry.attempts >= config['NOTIFY_MAX_ATTEMPTS']:
+                    entry.status = 'failed'
+                    result['failed'] += 1
+                else:
+                    entry.status = 'pending'
+                    entry.available_at = now + self.backoff(entry.attempts)
+                    result['retried'] += 1
+        db.session.commit()
+        return result
+    
+    def run_forever(self):
+        """Deliver batches until interrupted, sleeping while the outbox is empty."""
+        poll = current_app.config['NOTIFY_POLL_SECONDS']
+        while True:
+            try:
+                result = self.run_once()
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception('Notification batch failed')
+                result = {'claimed': 0}
+            if result['claimed'] < current_app.config['NOTIFY_BATCH_SIZE']:
+                time.sleep(poll)
+
+outbox_sender = OutboxSender()
\ No newline at end of file
@@ -0,0 +1,140 @@
+from flask import g, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from datetime import datetime
+import cProfile
+import pstats
+import random
+import threading
+import time
+import os
+import re
+
+PROFILE_HEADER = 'X-Profile'
+
+class RequestProfiler:
+    """Opt-in cProfile capture of whole requests.
+    
+    A request is profiled when an admin sends the X-Profile header, or when it
+    is picked by PROFILE_SAMPLE_RATE. Each capture is written as a .pstats file
+    to PROFILE_DIR, which keeps at most PROFILE_MAX_FILES files.
+    """
+    
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.directory = None
+        self.max_files = 50
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILE_MAX_FILES', 50)
+        self.directory = app.config['PROFILE_DIR']
+        self.max_files = app.config['PROFILE_MAX_FILES']
+        self.sample_rate = app.config['PROFILE_SAMPLE_RATE']
+        app.extensions['request_profiler'] = self
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+    
+    def _requested_by_admin(self):
+        if not request.headers.get(PROFILE_HEADER):
+            return False
+        from app.models.user import User
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+        except Exception:
+            return False
+        if not user_id:
+            return False
+        user = User.query.get(user_id)
+        return user is not None and user.role == 'admin'
+    
+    def _before_request(self):
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not (sampled or self._requested_by_admin()):
+            return
+        profile = cProfile.Profile()
+        g.profile = profile
+        g.profile_started = time.perf_counter()
+        profile.enable()
+    
+    def _teardown_request(self, exc):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return
+        profile.disable()
+        elapsed_ms = (time.perf_counter() - g.pop('profile_started')) * 1000
+        try:
+            self._save(profile, request.endpoint or 'unmatched', elapsed_ms)
+        except OSError:
+            pass
+    
+    def _save(self, profile, endpoint, elapsed_ms):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        safe_endpoint = re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint)
+        name = f'{stamp}-{safe_endpoint}-{int(elapsed_ms)}ms.pstats'
+        profile.dump_stats(os.path.join(self.directory, name))
+        with self._lock:
+            self._rotate()
+    
+    def _rotate(self):
+        names = sorted(self.list_names())
+        for name in names[:max(len(names) - self.max_files, 0)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+    
+    def list_names(self):
+        """Get the names of the stored .pstats files."""
+        if not os.path.isdir(self.directory):
+            return []
+        return [name for name in os.listdir(self.directory) if name.endswith('.pstats')]
+    
+    def list_profiles(self):
+        """Describe stored profiles, newest first."""
+        profiles = []
+        for name in sorted(self.list_names(), reverse=True):
+            match = re.match(r'^(\d{8}T\d{12})-(.+)-(\d+)ms\.pstats$', name)
+            path = os.path.join(self.directory, name)
+            profiles.append({
+                'name': name,
+                'captured_at': datetime.strptime(match.group(1), '%Y%m%dT%H%M%S%f').isoformat() if match else None,
+                'endpoint': match.group(2) if match else None,
+                'duration_ms': int(match.group(3)) if match else None,
+                'size_bytes': os.path.getsize(path)
+            })
+        return profiles
+    
+    def top_functions(self, name, limit=30, sort='cumulative'):
+        """Get the top functions of a stored profile, or None if it does not exist."""
+        if os.path.basename(name) != name or name not in self.list_names():
+            return None
+        stats = pstats.Stats(os.path.join(self.directory, name))
+        stats.sort_stats(sort)
+        
+        functions = []
+        for func in stats.fcn_list[:limit]:
+            primitive_calls, total_calls, total_time, cumulative_time, _ = stats.stats[func]
+            filename, line, function = func
+            functions.append({
+                'function': function,
+                'file': filename,
+                'line': line,
+                'calls': total_calls,
+                'primitive_calls': primitive_calls,
+                'total_time_ms': round(total_time * 1000, 3),
+                'cumulative_time_ms': round(cumulative_time * 1000, 3)
+            })
+        return {
+            'name': name,
+            'total_calls': stats.total_calls,
+            'total_time_ms': round(stats.total_tt * 1000, 3),
+            'sort': sort,
+            'functions': functions
+        }
+
+request_profiler = RequestProfiler()
\ No newline at end of file
@@ -0,0 +1,112 @@
+from sqlalchemy import select, update, func, bindparam, inspect, text
+from app import db
+from app.models.property import Property
+from app.models.room import Room
+from app.models.time_allocation import TimeAllocation, quota_week_start
+from app.models.booking import BookingApplication, ArchivedBooking
+from app.utils.sharding import shard_router
+from datetime import timedelta
+import click
+
+class QuotaWeeks:
+    """Stored quota-week keys of bookings.
+    
+    Every booking carries quota_week, the first day of the week its
+    property's weekly limit counts in, as set by
+    TimeAllocation.reset_day_of_week (Monday when a property has none).
+    Writers fill it in with TimeAllocation.week_start(); reads for a quota
+    week are then an equality lookup on the indexed column instead of a date
+    range that assumes Monday weeks. Changing a property's reset day rewrites the keys
+    of its bookings, hot and archived, in the same transaction through
+    recompute(). On databases created before the column existed,
+    `flask rebuild-quota-weeks` adds it and its indexes, then fills it.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.extensions['quota_weeks'] = self
+        
+        @app.cli.command('rebuild-quota-weeks')
+        def rebuild_quota_weeks_command():
+            """Add the quota week column where it is missing and recompute it for every booking."""
+            click.echo(f'Recomputed quota weeks for {self.rebuild()} properties')
+    
+    def recompute(self, property_id, reset_day_of_week):
+        """Rewrite the quota weeks of a property's bookings for a new reset day, in the current transaction."""
+        room_ids = select(Room.id).where(Room.property_id == property_id)
+        bind_arguments = shard_router.bind_arguments(
+            shard_router.shard_for_property(property_id) if shard_router.enabled else None
+        )
+        for model in (BookingApplication, ArchivedBooking):
+            table = model.__table__
+            first, last = db.session.execute(
+                select(func.min(table.c.booking_date), func.max(table.c.booking_date)).where(
+                    table.c.room_id.in_(room_ids)
+                ),
+                bind_arguments=bind_arguments
+            ).one()
+            if first is None:
+                continue
+            
+            # One parameter set per week in the property's date span; updated_at is
+            # kept since the booking itself did not change
+            weeks = []
+            week = quota_week_start(first, reset_day_of_week)
+            while week <= last:
+                weeks.append({'first_day': week, 'last_day': week + timedelta(days=6), 'week': week})
+                week += timedelta(weeks=1)
+            db.session.execute(
+                update(table).where(
+                    table.c.room_id.in_(room_ids),
+                    table.c.booking_date >= bindparam('first_day'),
+                    table.c.booking_date <= bindparam('last_day')
+                ).values(quota_week=bindparam('week'), updated_at=table.c.updated_at),
+                weeks,
+                bind_arguments=bind_arguments
+            )
+    
+    def _add_columns(self):
+        """Add quota_week to booking tables that predate it; returns the (connection, table) pairs changed."""
+        added = []
+        for shard in shard_router.all_shards():
+            connection = db.session.connection(bind_arguments=shard_router.bind_arguments(shard))
+            inspector = inspect(connection)
+            for model in (BookingApplication, ArchivedBooking):
+                table = model.__table__
+                if not inspector.has_table(table.name):
+                    continue
+                if 'quota_week' in {column['name'] for column in inspector.get_columns(table.name)}:
+                    continue
+                if connection.dialect.name == 'sqlite':
+                    # SQLite only adds a NOT NULL column with a default; the recompute overwrites it
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN quota_week DATE NOT NULL DEFAULT '1970-01-01'"))
+                else:
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN quota_week DATE'))
+                added.append((connection, table))
+        return added
+    
+    def rebuild(self):
+        """Recompute every property's quota weeks, adding the column first where it is missing.
+        
+        Run while bookings are not being written.
+        """
+        added = self._add_columns()
+        properties = db.session.query(Property.id, TimeAllocation.reset_day_of_week).outerjoin(
+            TimeAllocation, TimeAllocation.property_id == Property.id
+        ).all()
+        for property_id, reset_day in properties:
+            self.recompute(property_id, reset_day or 1)
+        
+        for connection, table in added:
+            if connection.dialect.name == 'postgresql':
+                connection.execute(text(f'ALTER TABLE {table.name} ALTER COLUMN quota_week SET NOT NULL'))
+            for index in table.indexes:
+                if 'quota_week' in index.columns:
+                    index.create(connection, checkfirst=True)
+        db.session.commit()
+        return len(properties)
+
+quota_weeks = QuotaWeeks()
\ No newline at end of file
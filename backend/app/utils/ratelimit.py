@@ -0,0 +1,206 @@
+from flask import request, jsonify, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from collections import defaultdict
+import math
+import sqlite3
+import threading
+import time
+import os
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# endpoint -> [(key kind, "count/period")]; the count is also the burst size
+DEFAULT_POLICIES = {
+    'auth.login': [('ip', '20/minute'), ('username', '10/minute')],
+    'auth.register': [('ip', '10/hour')],
+    'bookings.create_booking': [('user', '30/minute'), ('ip', '120/minute')]
+}
+
+def parse_rate(rate):
+    """Parse "count/period" into (capacity, tokens refilled per second)."""
+    count, _, period = rate.partition('/')
+    count = int(count)
+    return count, count / PERIODS[period.strip().rstrip('s')]
+
+def take_token(tokens, updated, now, capacity, refill):
+    """Refill a bucket and try to take one token.
+    
+    Returns (allowed, tokens, seconds until a token is available).
+    """
+    tokens = min(capacity, tokens + (now - updated) * refill)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / refill
+
+class MemoryBackend:
+    """Token buckets in a dict, private to one process."""
+    
+    def __init__(self, max_keys=100000):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.max_keys = max_keys
+    
+    def consume(self, key, capacity, refill, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = take_token(tokens, updated, now, capacity, refill)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return allowed, retry_after
+    
+    def _prune(self, now):
+        # Drop buckets idle for an hour; those would be full again anyway
+        stale = [key for key, (_, updated) in self._buckets.items() if now - updated > 3600]
+        for key in stale:
+            del self._buckets[key]
+    
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+class SQLiteBackend:
+    """Token buckets in a small SQLite file shared by every worker on the host.
+    
+    Each check is one short BEGIN IMMEDIATE transaction on its own
+    connection, in WAL mode without fsync, so workers serialize on the
+    bucket row and not on the application database.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS rate_buckets '
+            '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL) WITHOUT ROWID'
+        )
+    
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            self._local.connection = connection
+        return connection
+    
+    def consume(self, key, capacity, refill, now):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated FROM rate_buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            allowed, tokens, retry_after = take_token(tokens, updated, now, capacity, refill)
+            connection.execute(
+                'INSERT INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                (key, tokens, now)
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return allowed, retry_after
+    
+    def reset(self):
+        self._connection().execute('DELETE FROM rate_buckets')
+
+def create_backend(url):
+    """Build a backend from RATELIMIT_STORAGE: 'memory' or 'sqlite:///path/to/file.db'."""
+    if url == 'memory':
+        return MemoryBackend()
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):])
+    raise ValueError(f'Unsupported RATELIMIT_STORAGE: {url}')
+
+class RateLimiter:
+    """Per-route token-bucket rate limiting keyed by client IP, username or user id.
+    
+    Policies map an endpoint to a list of (key kind, rate) limits. Every limit
+    whose key is present in the request must have a token, otherwise the
+    request is answered with 429 and a Retry-After header before the view
+    (and its bcrypt call or commit) runs. Endpoints without a policy only pay
+    for one dict lookup.
+    """
+    
+    def __init__(self, app=None):
+        self.backend = None
+        self.policies = {}
+        self._limited = defaultdict(int)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_STORAGE', 'memory')
+        app.config.setdefault('RATELIMIT_POLICIES', DEFAULT_POLICIES)
+        app.config.setdefault('RATELIMIT_TRUST_FORWARDED_FOR', False)
+        self.backend = create_backend(app.config['RATELIMIT_STORAGE'])
+        self.policies = {
+            endpoint: [(kind, *parse_rate(rate)) for kind, rate in limits]
+            for endpoint, limits in app.config['RATELIMIT_POLICIES'].items()
+        }
+        app.extensions['rate_limiter'] = self
+        app.before_request(self._before_request)
+        
+        from app.utils.metrics import request_metrics
+        request_metrics.register_collector(self.render_metrics)
+    
+    def client_ip(self):
+        if current_app.config['RATELIMIT_TRUST_FORWARDED_FOR']:
+            forwarded = request.headers.get('X-Forwarded-For')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return request.remote_addr or 'unknown'
+    
+    def _key(self, kind):
+        if kind == 'ip':
+            return self.client_ip()
+        if kind == 'username':
+            data = request.get_json(silent=True)
+            username = data.get('username') if isinstance(data, dict) else None
+            return username.strip().lower() if isinstance(username, str) and username.strip() else None
+        if kind == 'user':
+            try:
+                verify_jwt_in_request(optional=True)
+                return get_jwt_identity()
+            except Exception:
+                return None
+        return None
+    
+    def _before_request(self):
+        limits = self.policies.get(request.endpoint)
+        if not limits or not current_app.config['RATELIMIT_ENABLED'] or request.method == 'OPTIONS':
+            return None
+        
+        now = time.time()
+        for kind, capacity, refill in limits:
+            key = self._key(kind)
+            if key is None:
+                continue
+            allowed, retry_after = self.backend.consume(f'{request.endpoint}:{kind}:{key}', capacity, refill, now)
+            if not allowed:
+                with self._lock:
+                    self._limited[(request.endpoint, kind)] += 1
+                response = jsonify({'error': 'Too many requests, please try again later'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return response
+        return None
+    
+    def render_metrics(self):
+        lines = [
+            '# HELP roomieflow_rate_limited_total Requests rejected by the rate limiter.',
+            '# TYPE roomieflow_rate_limited_total counter'
+        ]
+        with self._lock:
+            for (endpoint, kind), count in sorted(self._limited.items()):
+                lines.append(f'roomieflow_rate_limited_total{{endpoint="{endpoint}",key="{kind}"}} {count}')
+        return lines
+
+rate_limiter = RateLimiter()
\ No newline at end of file
@@ -0,0 +1,325 @@
+from flask import current_app
+from app.utils.chart_cache import chart_cache
+from collections import OrderedDict, defaultdict
+import hashlib
+import sqlite3
+import threading
+import time
+import uuid
+import os
+
+# Optional shared tier on a local Redis server, used only when installed
+try:
+    import redis
+except ImportError:
+    redis = None
+
+def new_generation():
+    return uuid.uuid4().hex[:16]
+
+class MemoryTier:
+    """In-process LRU of response bodies, bounded by total size."""
+    
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key, max_age):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, stored = entry
+            if time.time() - stored >= max_age:
+                del self._entries[key]
+                self._bytes -= len(body)
+                return None
+            self._entries.move_to_end(key)
+            return body
+    
+    def put(self, key, body, max_bytes):
+        if len(body) > max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[0])
+            self._entries[key] = (body, time.time())
+            self._bytes += len(body)
+            while self._bytes > max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+    
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes}
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+class SQLiteTier:
+    """Response bodies and generations in a SQLite file shared by every worker on the host."""
+    
+    def __init__(self, path, max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._puts = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS responses '
+            '(key TEXT PRIMARY KEY, body BLOB NOT NULL, stored REAL NOT NULL) WITHOUT ROWID'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_responses_stored ON responses (stored)')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS generations (name TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID'
+        )
+    
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            self._local.connection = connection
+        return connection
+    
+    def get(self, key, max_age):
+        row = self._connection().execute(
+            'SELECT body FROM responses WHERE key = ? AND stored > ?', (key, time.time() - max_age)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def put(self, key, body, max_age):
+        connection = self._connection()
+        now = time.time()
+        connection.execute('INSERT OR REPLACE INTO responses (key, body, stored) VALUES (?, ?, ?)', (key, body, now))
+        self._puts += 1
+        if self._puts % 500 == 0:
+            # Expired rows first, then the oldest beyond max_entries
+            connection.execute('DELETE FROM responses WHERE stored <= ?', (now - max_age,))
+            connection.execute(
+                'DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY stored DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+    
+    def generations(self, names):
+        placeholders = ','.join('?' * len(names))
+        rows = self._connection().execute(
+            f'SELECT name, value FROM generations WHERE name IN ({placeholders})', list(names)
+        ).fetchall()
+        return dict(rows)
+    
+    def set_generations(self, generations):
+        self._connection().executemany(
+            'INSERT OR REPLACE INTO generations (name, value) VALUES (?, ?)', list(generations.items())
+        )
+    
+    def clear(self):
+        connection = self._connection()
+        connection.execute('DELETE FROM responses')
+        connection.execute('DELETE FROM generations')
+
+class RedisTier:
+    """Response bodies and generations on a Redis server, usually on localhost."""
+    
+    def __init__(self, url, prefix='roomieflow:response:'):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+    
+    def get(self, key, max_age):
+        return self.client.get(self.prefix + key)
+    
+    def put(self, key, body, max_age):
+        self.client.set(self.prefix + key, body, ex=max(1, int(max_age)))
+    
+    def generations(self, names):
+        values = self.client.mget([self.prefix + 'generation:' + name for name in names])
+        return {name: value.decode() for name, value in zip(names, values) if value is not None}
+    
+    def set_generations(self, generations):
+        self.client.mset({self.prefix + 'generation:' + name: value for name, value in generations.items()})
+    
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+def create_shared_tier(url):
+    """Build the shared tier from RESPONSE_CACHE_SHARED: '', 'sqlite:///path/to/file.db' or 'redis://host:port/db'."""
+    if not url:
+        return None
+    if url.startswith('sqlite:///'):
+        return SQLiteTier(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'unix://')):
+        if redis is None:
+            raise ValueError('RESPONSE_CACHE_SHARED needs the redis package for a Redis URL')
+        return RedisTier(url)
+    raise ValueError(f'Unsupported RESPONSE_CACHE_SHARED: {url}')
+
+class ResponseCache:
+    """Two-tier cache of rendered JSON responses for the weekly chart and usage.
+    
+    Keys combine the endpoint, its scope and week, the viewer-specific bits
+    of the body and, for every property shown, the stamp from the chart
+    cache and a generation. The stamp covers the property's bookings, its
+    change log entries and its time allocation, so a commit in any worker
+    changes the keys of every response it affects, and the in-process LRU
+    alone stays correct with several workers. Generations only add what a
+    stamp cannot see: a commit here bumps those of the affected properties
+    (a username change the global one) at once, and the optional shared
+    tier also holds them, so chart fragments of other workers are dropped
+    too. RESPONSE_CACHE_TTL only bounds how long unused entries linger.
+    """
+    
+    def __init__(self, app=None):
+        self.memory = MemoryTier()
+        self.shared = None
+        self._generations = {}
+        self._lookups = defaultdict(int)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_ENABLED', True)
+        app.config.setdefault('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+        app.config.setdefault('RESPONSE_CACHE_SHARED', '')
+        app.config.setdefault('RESPONSE_CACHE_TTL', 600)
+        self.shared = create_shared_tier(app.config['RESPONSE_CACHE_SHARED'])
+        app.extensions['response_cache'] = self
+        chart_cache.register_listener(self.bump)
+        
+        from app.utils.metrics import request_metrics
+        request_metrics.register_collector(self.render_metrics)
+    
+    def generations(self, property_ids):
+        """Get the current generation of the global scope and each property."""
+        names = ['global'] + [f'property:{property_id}' for property_id in property_ids]
+        if self.shared is None:
+            with self._lock:
+                return {name: self._generations[name] for name in names if name in self._generations}
+        
+        try:
+            generations = self.shared.generations(names)
+        except Exception:
+            current_app.logger.warning('Shared response cache unavailable', exc_info=True)
+            return None
+        
+        # A generation bumped by another worker also makes this worker's chart fragments stale
+        with self._lock:
+            changed = [name for name, value in generations.items() if self._generations.get(name) != value]
+            self._generations.update(generations)
+        if 'global' in changed:
+            chart_cache.invalidate(notify=False)
+        elif changed:
+            chart_cache.invalidate([name.partition(':')[2] for name in changed], notify=False)
+        return generations
+    
+    def bump(self, property_ids=None):
+        """Invalidate every response showing these properties (None means all)."""
+        names = ['global'] if property_ids is None else [f'property:{property_id}' for property_id in property_ids]
+        if not names:
+            return
+        generations = {name: new_generation() for name in names}
+        with self._lock:
+            self._generations.update(generations)
+        if self.shared is not None:
+            try:
+                self.shared.set_generations(generations)
+            except Exception:
+                # Readers treat an unreachable shared tier as a miss
+                current_app.logger.warning('Could not bump shared response cache generations', exc_info=True)
+    
+    def lookup(self, endpoint, parts, stamps):
+        """Get (key, cached body or None) for a response.
+        
+        parts holds everything besides the stamped properties that the body
+        depends on; stamps maps each property shown to its booking stamp.
+        """
+        config = current_app.config
+        if not config['RESPONSE_CACHE_ENABLED']:
+            return None, None
+        generations = self.generations(stamps)
+        if generations is None:
+            return None, None
+        
+        raw = repr((
+            endpoint, parts, generations.get('global'),
+            sorted((property_id, stamp, generations.get(f'property:{property_id}')) for property_id, stamp in stamps.items())
+        ))
+        key = hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+        
+        result = 'miss'
+        body = self.memory.get(key, config['RESPONSE_CACHE_TTL'])
+        if body is not None:
+            result = 'memory'
+        elif self.shared is not None:
+            try:
+                body = self.shared.get(key, config['RESPONSE_CACHE_TTL'])
+            except Exception:
+                current_app.logger.warning('Shared response cache unavailable', exc_info=True)
+            if body is not None:
+                result = 'shared'
+                self.memory.put(key, body, config['RESPONSE_CACHE_MAX_BYTES'])
+        with self._lock:
+            self._lookups[(endpoint, result)] += 1
+        return key, body
+    
+    def store(self, key, response):
+        """Keep the body of a freshly built response under key (from lookup)."""
+        if key is None:
+            return
+        config = current_app.config
+        body = response.get_data()
+        self.memory.put(key, body, config['RESPONSE_CACHE_MAX_BYTES'])
+        if self.shared is not None:
+            try:
+                self.shared.put(key, body, config['RESPONSE_CACHE_TTL'])
+            except Exception:
+                current_app.logger.warning('Could not write to the shared response cache', exc_info=True)
+    
+    def respond(self, body):
+        """Build a JSON response from a cached body."""
+        return current_app.response_class(body, mimetype='application/json')
+    
+    def clear(self):
+        self.memory.clear()
+        with self._lock:
+            self._generations.clear()
+        if self.shared is not None:
+            self.shared.clear()
+    
+    def stats(self):
+        """Get tier sizes and lookup counts by endpoint and result."""
+        with self._lock:
+            lookups = defaultdict(dict)
+            for (endpoint, result), count in sorted(self._lookups.items()):
+                lookups[endpoint][result] = count
+        return {
+            'memory': self.memory.stats(),
+            'shared': type(self.shared).__name__ if self.shared is not None else None,
+            'lookups': dict(lookups)
+        }
+    
+    def render_metrics(self):
+        lines = [
+            '# HELP roomieflow_response_cache_lookups_total Response cache lookups by endpoint and tier (memory, shared, miss).',
+            '# TYPE roomieflow_response_cache_lookups_total counter'
+        ]
+        with self._lock:
+            for (endpoint, result), count in sorted(self._lookups.items()):
+                lines.append(f'roomieflow_response_cache_lookups_total{{endpoint="{endpoint}",result="{result}"}} {count}')
+        memory = self.memory.stats()
+        lines.append('# HELP roomieflow_response_cache_memory_bytes Size of the in-process response cache.')
+        lines.append('# TYPE roomieflow_response_cache_memory_bytes gauge')
+        lines.append(f'roomieflow_response_cache_memory_bytes {memory["bytes"]}')
+        return lines
+
+response_cache = ResponseCache()
\ No newline at end of file
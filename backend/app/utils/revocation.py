@@ -0,0 +1,145 @@
+from app import db
+from app.models.token_revocation import TokenRevocation
+from app.utils.changelog import CURRENT_TXID, SNAPSHOT_XMIN
+from sqlalchemy import BigInteger, func, literal, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+import threading
+import time
+
+def new_session_epoch():
+    """Return a fresh session epoch (milliseconds since the Unix epoch)."""
+    return time.time_ns() // 1000000
+
+class TokenRevocationRegistry:
+    """In-memory mirror of the token_revocations table.
+    
+    Tokens carry a session epoch claim. A token is revoked when its
+    (user_id, epoch) pair was logged out, or when its epoch is at or below the
+    user's "all sessions" floor. Checks never hit the database; the table is
+    loaded on first use and new rows are pulled at most once per sync interval.
+    Pulls carry on after the last (txid, seq) position read, so a revocation
+    that commits late is still picked up, whatever the clocks say.
+    """
+    
+    def __init__(self, app=None):
+        self._sessions = {}  # (user_id, epoch) -> expires_at
+        self._floors = {}    # user_id -> (epoch, expires_at)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._synced_at = 0.0
+        self._position = (0, 0)  # (txid, seq) of the last row pulled
+        self.sync_interval = 30
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.sync_interval = app.config.get('TOKEN_REVOCATION_SYNC_SECONDS', 30)
+        app.extensions['token_revocations'] = self
+    
+    def is_revoked(self, user_id, epoch):
+        """Check whether a token for this user and session epoch is revoked."""
+        self._maybe_sync()
+        floor = self._floors.get(user_id)
+        if floor is not None and epoch <= floor[0]:
+            return True
+        return (user_id, epoch) in self._sessions
+    
+    def revoke(self, user_id, epoch, expires_at, all_sessions=False):
+        """Persist a revocation and apply it to this process immediately."""
+        revocation = TokenRevocation(
+            user_id=user_id,
+            epoch=epoch,
+            all_sessions=all_sessions,
+            expires_at=expires_at
+        )
+        if self._postgresql():
+            revocation.txid = CURRENT_TXID
+        
+        # Expired rows can no longer match a valid token, keep the table small
+        TokenRevocation.query.filter(TokenRevocation.expires_at < datetime.utcnow()).delete()
+        db.session.add(revocation)
+        db.session.commit()
+        
+        with self._lock:
+            self._apply(revocation)
+        return revocation
+    
+    def reset(self):
+        """Drop the in-memory state so the next check reloads from the table."""
+        with self._lock:
+            self._sessions.clear()
+            self._floors.clear()
+            self._loaded = False
+            self._position = (0, 0)
+    
+    def preload(self):
+        """Load the table now rather than on the first check."""
+        self._maybe_sync()
+    
+    def _apply(self, revocation):
+        if revocation.all_sessions:
+            current = self._floors.get(revocation.user_id)
+            if current is None or revocation.epoch > current[0]:
+                self._floors[revocation.user_id] = (revocation.epoch, revocation.expires_at)
+        else:
+            self._sessions[(revocation.user_id, revocation.epoch)] = revocation.expires_at
+    
+    def _postgresql(self):
+        # Revocations stay in the main database, sharded or not
+        return db.engine.dialect.name == 'postgresql'
+    
+    def _pending(self, utcnow):
+        """Query the unexpired rows after the last position pulled, in the order they became visible."""
+        query = TokenRevocation.query.filter(TokenRevocation.expires_at >= utcnow)
+        txid, seq = self._position
+        if not self._postgresql():
+            return query.filter(TokenRevocation.seq > seq).order_by(TokenRevocation.seq)
+        # Stop below the snapshot's xmin, where every writer has finished
+        row_txid = func.coalesce(TokenRevocation.txid, 0)
+        return query.filter(
+            tuple_(row_txid, TokenRevocation.seq) > tuple_(literal(txid, BigInteger), literal(seq, BigInteger)),
+            row_txid < SNAPSHOT_XMIN
+        ).order_by(row_txid, TokenRevocation.seq)
+    
+    def _maybe_sync(self):
+        now = time.monotonic()
+        if self._loaded and now - self._synced_at < self.sync_interval:
+            return
+        
+        # Once loaded, checks that find a sync under way go on with the current state
+        # instead of queueing behind it
+        if not self._lock.acquire(blocking=not self._loaded):
+            return
+        try:
+            if self._loaded and now - self._synced_at < self.sync_interval:
+                return
+            
+            utcnow = datetime.utcnow()
+            try:
+                revocations = self._pending(utcnow).all()
+            except SQLAlchemyError:
+                # Table not created yet; nothing can have been revoked
+                db.session.rollback()
+                revocations = []
+            
+            for revocation in revocations:
+                self._apply(revocation)
+                self._position = (revocation.txid or 0, revocation.seq)
+            
+            # Forget entries whose tokens have expired on their own
+            self._sessions = {
+                key: expires_at for key, expires_at in self._sessions.items()
+                if expires_at >= utcnow
+            }
+            self._floors = {
+                user_id: floor for user_id, floor in self._floors.items()
+                if floor[1] >= utcnow
+            }
+            
+            self._loaded = True
+            self._synced_at = now
+        finally:
+            self._lock.release()
+
+revocation_registry = TokenRevocationRegistry()
\ No newline at end of file
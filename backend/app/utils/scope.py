@@ -0,0 +1,59 @@
+from flask import g
+from app import db
+from app.models.property import Property, PropertyMember
+
+def property_scope_query(user):
+    """Get a query of property IDs the user owns or is an accepted member of."""
+    owned = db.session.query(Property.id).filter(Property.owner_id == user.id)
+    member = db.session.query(PropertyMember.property_id).filter(
+        PropertyMember.user_id == user.id,
+        PropertyMember.invitation_status == 'accepted'
+    )
+    return owned.union(member)
+
+def administered_property_ids(user):
+    """Get a query of property IDs the user owns or is an accepted admin of."""
+    owned = db.session.query(Property.id).filter(Property.owner_id == user.id)
+    admin_of = db.session.query(PropertyMember.property_id).filter(
+        PropertyMember.user_id == user.id,
+        PropertyMember.role == 'admin',
+        PropertyMember.invitation_status == 'accepted'
+    )
+    return owned.union(admin_of)
+
+def share_property_scope():
+    """Resolve each user's property scope once for the rest of this request.
+    
+    The batch endpoint turns this on so its sub-requests load the scope with
+    one query and then check access against it in memory.
+    """
+    g.property_scopes = {}
+
+def shared_property_scope(user):
+    """Get the user's property IDs as a set when the scope is shared, else None."""
+    scopes = g.get('property_scopes')
+    if scopes is None:
+        return None
+    if user.id not in scopes:
+        scopes[user.id] = {property_id for (property_id,) in property_scope_query(user).all()}
+    return scopes[user.id]
+
+def accessible_property_ids(user):
+    """Get the property IDs the user owns or is an accepted member of, for an IN filter."""
+    scope = shared_property_scope(user)
+    if scope is not None:
+        return sorted(scope)
+    return property_scope_query(user)
+
+def can_access_property(user, property_obj):
+    """Check whether the user owns the property or is an accepted member of it."""
+    if property_obj.owner_id == user.id:
+        return True
+    scope = shared_property_scope(user)
+    if scope is not None:
+        return property_obj.id in scope
+    return PropertyMember.query.filter_by(
+        property_id=property_obj.id,
+        user_id=user.id,
+        invitation_status='accepted'
+    ).first() is not None
\ No newline at end of file
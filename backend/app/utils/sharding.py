@@ -0,0 +1,372 @@
+from flask import current_app
+from sqlalchemy import event, inspect, select, Table, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+from app import db
+import hashlib
+import threading
+import uuid
+import click
+
+GLOBAL_SHARD = 'global'
+
+# Tables that live on the shard of their property. Everything else is global;
+# users are also copied to every shard so shard-local joins can read them.
+PROPERTY_TABLES = {
+    'properties', 'property_members', 'rooms', 'time_allocations',
+    'booking_applications', 'booking_applications_archive', 'booking_slots', 'notification_outbox', 'change_log'
+}
+
+# Columns of users that stay on the main database; changes to them are not copied
+UNREPLICATED_USER_COLUMNS = {'last_login'}
+
+def normalize_key(value):
+    """Get the canonical 16 bytes of an id, or None if it is not a UUID."""
+    try:
+        return uuid.UUID(str(value)).bytes
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+def statement_tables(statement):
+    """Get the names of the tables a statement reads or writes."""
+    return {element.name for element in visitors.iterate(statement) if isinstance(element, Table)}
+
+def _conjuncts(clause):
+    if isinstance(clause, BooleanClauseList) and clause.operator is operators.and_:
+        for inner in clause.clauses:
+            yield from _conjuncts(inner)
+    else:
+        yield clause
+
+def routing_criteria(statement, parameters=None):
+    """Yield (table, column, values) for each top-level "column = value" or "column IN (...)" filter.
+    
+    Only conjuncts of the WHERE clause are considered, so a filter inside an
+    OR can never narrow the shards a statement runs on. Values of bind
+    parameters passed at execution (as primary key loads do) come from
+    parameters.
+    """
+    for criterion in getattr(statement, '_where_criteria', ()):
+        for clause in _conjuncts(criterion):
+            if not isinstance(clause, BinaryExpression) or not isinstance(clause.right, BindParameter):
+                continue
+            if clause.operator not in (operators.eq, operators.in_op):
+                continue
+            table = getattr(clause.left, 'table', None)
+            if not isinstance(table, Table):
+                continue
+            value = clause.right.effective_value
+            if value is None and parameters and clause.right.key in parameters:
+                value = parameters[clause.right.key]
+            values = list(value) if clause.operator is operators.in_op else [value]
+            yield table.name, clause.left.name, values
+
+class ShardedFlaskSession(ShardedSession):
+    """db.session for a sharded deployment, routed by the app's shard router."""
+    
+    def __init__(self, db, **kwargs):
+        engines = db.engines
+        router = shard_router
+        shards = {GLOBAL_SHARD: engines[None]}
+        shards.update({name: engines[name] for name in router.shard_ids})
+        super().__init__(
+            shard_chooser=router.shard_chooser,
+            identity_chooser=router.identity_chooser,
+            execute_chooser=router.execute_chooser,
+            shards=shards,
+            **kwargs
+        )
+        self._db = db
+        self._model_changes = {}
+
+class ShardRouter:
+    """Optional horizontal sharding of property data by property_id.
+    
+    With SHARD_DATABASE_URLS set, each property and everything scoped to it
+    (members, rooms, time allocation, bookings, archived bookings, slot
+    counts, their notifications and change log entries) lives on one of N
+    shard databases. The shard comes from the SHARD_MAP lookup table, or
+    else from a stable hash of the property id;
+    the hash depends on N, so existing properties must be pinned in SHARD_MAP
+    before a shard is added. Users and token revocations stay in the main
+    database, and users are upserted into every shard after each commit that
+    changes them (last_login excepted).
+    
+    Statements that filter on a property id or a room id run on that shard
+    only. The rest (a member's bookings across properties, for example) fan
+    out to every shard and their rows are concatenated, so ordering, LIMIT and
+    aggregates apply per shard. Without SHARD_DATABASE_URLS nothing changes.
+    """
+    
+    def __init__(self, app=None):
+        self.shard_ids = []
+        self.shard_map = {}
+        self.enabled = False
+        self._room_shards = {}
+        self._lock = threading.Lock()
+        self._plain_session = None
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Register the shard binds; must run before db.init_app."""
+        app.config.setdefault('SHARD_DATABASE_URLS', [])
+        app.config.setdefault('SHARD_MAP', {})
+        urls = app.config['SHARD_DATABASE_URLS']
+        if isinstance(urls, str):
+            urls = [url.strip() for url in urls.split(',') if url.strip()]
+        
+        self.shard_ids = [f'shard{index}' for index in range(len(urls))]
+        self.enabled = bool(urls)
+        self.shard_map = {}
+        for property_id, shard in app.config['SHARD_MAP'].items():
+            if shard not in self.shard_ids:
+                raise ValueError(f'SHARD_MAP points {property_id} to unknown shard {shard}')
+            self.shard_map[normalize_key(property_id)] = shard
+        app.extensions['shard_router'] = self
+        self._register_commands(app)
+        
+        if self._plain_session is None:
+            self._plain_session = db.session
+        if not self.enabled:
+            db.session = self._plain_session
+            return
+        
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.update(zip(self.shard_ids, urls))
+        app.config['SQLALCHEMY_BINDS'] = binds
+        db.session = db._make_scoped_session({'class_': ShardedFlaskSession})
+        
+        from app.models.room import Room
+        if not event.contains(Room, 'load', self._remember_room):
+            event.listen(Room, 'load', self._remember_room)
+        if not event.contains(ShardedFlaskSession, 'after_flush', self._collect_users):
+            event.listen(ShardedFlaskSession, 'after_flush', self._collect_users)
+            event.listen(ShardedFlaskSession, 'after_commit', self._replicate_users)
+            event.listen(ShardedFlaskSession, 'after_rollback', self._forget_users)
+    
+    def shard_for_property(self, property_id):
+        """Get the shard of a property from SHARD_MAP or the id hash, or None for an invalid id."""
+        key = normalize_key(property_id)
+        if key is None:
+            return None
+        shard = self.shard_map.get(key)
+        if shard is None:
+            digest = hashlib.blake2b(key, digest_size=8).digest()
+            shard = self.shard_ids[int.from_bytes(digest, 'big') % len(self.shard_ids)]
+        return shard
+    
+    def shard_for_room(self, room_id):
+        """Get the shard holding a room, probing the shards on a cache miss."""
+        key = normalize_key(room_id)
+        if key is None:
+            return None
+        shard = self._room_shards.get(key)
+        if shard is not None:
+            return shard
+        
+        from app.models.room import Room
+        for shard_id in self.shard_ids:
+            with db.engines[shard_id].connect() as connection:
+                property_id = connection.execute(
+                    select(Room.__table__.c.property_id).where(Room.__table__.c.id == str(room_id))
+                ).scalar()
+            if property_id is not None:
+                self._room_shards[key] = shard_id
+                return shard_id
+        return None
+    
+    def _remember_room(self, room, context):
+        token = inspect(room).identity_token
+        if token is not None:
+            with self._lock:
+                self._room_shards[normalize_key(room.id)] = token
+    
+    def shard_of_row(self, table_name, row):
+        """Get the shard for a new row of a property-scoped table."""
+        if table_name == 'properties':
+            return self.shard_for_property(row['id'])
+        if row.get('property_id') is not None:
+            return self.shard_for_property(row['property_id'])
+        if row.get('room_id') is not None:
+            return self.shard_for_room(row['room_id'])
+        if row.get('recipient_id') is not None:
+            # Notifications are colocated with their booking; this only covers strays
+            return self.shard_for_property(row['recipient_id'])
+        return None
+    
+    def shard_chooser(self, mapper, instance, clause=None, **kw):
+        """Pick the shard a new instance is written to."""
+        if instance is None or mapper is None:
+            return GLOBAL_SHARD
+        table_name = mapper.local_table.name
+        if table_name not in PROPERTY_TABLES:
+            return GLOBAL_SHARD
+        
+        if getattr(instance, 'id', False) is None:
+            # Ids are normally generated at INSERT time, after the shard is chosen
+            from app.models.types import new_id
+            instance.id = new_id()
+        row = {column.key: getattr(instance, column.key, None) for column in mapper.column_attrs}
+        shard = self.shard_of_row(table_name, row)
+        if shard is None:
+            raise ValueError(f'Cannot choose a shard for {instance!r}')
+        if table_name == 'rooms':
+            self._room_shards[normalize_key(instance.id)] = shard
+        return shard
+    
+    def identity_chooser(self, mapper, primary_key, *, lazy_loaded_from=None, **kw):
+        """Get the shards an object with this primary key may be on."""
+        if lazy_loaded_from is not None and lazy_loaded_from.identity_token:
+            return [lazy_loaded_from.identity_token]
+        table_name = mapper.local_table.name
+        if table_name not in PROPERTY_TABLES:
+            return [GLOBAL_SHARD]
+        key = primary_key[0] if isinstance(primary_key, (list, tuple)) else primary_key
+        if table_name == 'properties':
+            shard = self.shard_for_property(key)
+            return [shard] if shard else []
+        if table_name == 'rooms':
+            shard = self._room_shards.get(normalize_key(key))
+            if shard:
+                return [shard]
+        return list(self.shard_ids)
+    
+    def execute_chooser(self, context):
+        """Get the shards a statement runs on: one shard when it filters on a routing key, else all."""
+        statement = context.statement
+        tables = statement_tables(statement)
+        if not tables & PROPERTY_TABLES:
+            return [GLOBAL_SHARD]
+        
+        parameters = context.parameters if isinstance(context.parameters, dict) else None
+        for table_name, column_name, values in routing_criteria(statement, parameters):
+            if table_name not in PROPERTY_TABLES:
+                continue
+            if column_name == 'property_id' or (table_name == 'properties' and column_name == 'id'):
+                shards = {self.shard_for_property(value) for value in values}
+            elif column_name == 'room_id' or (table_name == 'rooms' and column_name == 'id'):
+                shards = {self.shard_for_room(value) for value in values}
+            else:
+                continue
+            if None not in shards:
+                return sorted(shards)
+            # A key that cannot be placed falls through to the other filters or a fan-out
+        return list(self.shard_ids)
+    
+    def all_shards(self):
+        """Get every shard id, or [None] when sharding is off."""
+        return list(self.shard_ids) if self.enabled else [None]
+    
+    def bind_arguments(self, shard):
+        """Get Session.execute bind arguments that pin a statement to a shard."""
+        return {'shard_id': shard} if shard else None
+    
+    def partition(self, model, mappings):
+        """Group insert mappings by the shard they belong on."""
+        if not self.enabled:
+            return {None: mappings}
+        table_name = model.__table__.name
+        if table_name not in PROPERTY_TABLES:
+            return {GLOBAL_SHARD: mappings}
+        groups = {}
+        for mapping in mappings:
+            groups.setdefault(self.shard_of_row(table_name, mapping), []).append(mapping)
+        return groups
+    
+    def colocate(self, instance, other):
+        """Write a new instance to the same shard as another object, in its transaction."""
+        if not self.enabled:
+            return
+        state = inspect(other)
+        token = state.key[2] if state.key else state.identity_token
+        if token is not None:
+            inspect(instance).identity_token = token
+    
+    def _collect_users(self, session, flush_context):
+        from app.models.user import User
+        changed = session.info.setdefault('replicate_users', set())
+        for instance in list(session.new) + list(session.dirty):
+            if not isinstance(instance, User) or not instance.id:
+                continue
+            # A login only sets last_login, which shard-local reads never use
+            state = inspect(instance)
+            if instance in session.new or any(
+                state.attrs[name].history.has_changes() for name in self._replicated_columns(User.__table__)
+            ):
+                changed.add(instance.id)
+    
+    def _forget_users(self, session):
+        session.info.pop('replicate_users', None)
+    
+    def _replicate_users(self, session):
+        changed = session.info.pop('replicate_users', None)
+        if not changed:
+            return
+        # The request's own commit has already gone through; a shard that is
+        # behind is caught up by the next change or by `flask shards init`
+        try:
+            self.copy_users(sorted(changed))
+        except Exception:
+            current_app.logger.exception('Copying users to the shards failed')
+    
+    def _replicated_columns(self, table):
+        return [column.name for column in table.columns if column.name not in UNREPLICATED_USER_COLUMNS]
+    
+    def copy_users(self, user_ids=None):
+        """Upsert user rows from the main database into every shard.
+        
+        Rows are updated in place rather than deleted and reinserted, since
+        shard tables reference them by foreign key.
+        """
+        from app.models.user import User
+        table = User.__table__
+        columns = self._replicated_columns(table)
+        query = select(*[table.c[name] for name in columns])
+        if user_ids is not None:
+            query = query.where(table.c.id.in_(user_ids))
+        with db.engines[None].connect() as connection:
+            rows = [dict(row) for row in connection.execute(query).mappings()]
+        if not rows:
+            return 0
+        
+        for shard_id in self.shard_ids:
+            with db.engines[shard_id].begin() as connection:
+                dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+                statement = dialect.insert(table)
+                statement = statement.on_conflict_do_update(
+                    index_elements=['id'],
+                    set_={name: statement.excluded[name] for name in columns if name != 'id'}
+                )
+                connection.execute(statement, rows)
+        return len(rows)
+    
+    def _register_commands(self, app):
+        @app.cli.group('shards')
+        def shards_group():
+            """Manage property shards."""
+        
+        @shards_group.command('init')
+        def init_command():
+            """Create the schema on every shard and copy the users table."""
+            if not self.enabled:
+                raise click.ClickException('SHARD_DATABASE_URLS is not set.')
+            db.create_all()
+            for shard_id in self.shard_ids:
+                db.metadata.create_all(db.engines[shard_id])
+            click.echo(f'Created the schema on {len(self.shard_ids)} shards, copied {self.copy_users()} users.')
+        
+        @shards_group.command('status')
+        def status_command():
+            """Show how many properties, rooms and bookings each shard holds."""
+            for shard_id in self.shard_ids:
+                with db.engines[shard_id].connect() as connection:
+                    counts = [
+                        connection.execute(text(f'SELECT COUNT(*) FROM {name}')).scalar()
+                        for name in ('properties', 'rooms', 'booking_applications')
+                    ]
+                click.echo(f'{shard_id}: {counts[0]} properties, {counts[1]} rooms, {counts[2]} bookings')
+
+shard_router = ShardRouter()
\ No newline at end of file
@@ -0,0 +1,126 @@
+from collections import Counter
+from sqlalchemy import select, update, delete, func, case, literal, text
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.room import Room
+from app.models.booking import BookingApplication, BookingSlot, ACTIVE_PREDICATE
+from app.utils.allocation import slot_key
+from app.utils.changelog import change_log
+from app.utils.sharding import shard_router
+import click
+
+# Bookings in these states hold a place in their slot
+ACTIVE_STATUSES = ('pending', 'approved')
+
+class SlotCounter:
+    """Per-slot place counts that admit bookings up to the room's capacity.
+    
+    Each (room, date, session) slot has a booking_slots row counting its
+    pending and approved bookings. reserve() admits new bookings with one
+    INSERT ... ON CONFLICT DO UPDATE that only increments the count while it
+    stays within rooms.capacity, so the check and the increment are a single
+    atomic statement: concurrent requests for the last place cannot both
+    succeed, and the row lock holds later ones until the winner commits or
+    rolls back. claim() then inserts the booking itself with one
+    INSERT ... ON CONFLICT DO NOTHING against the partial unique index on
+    active bookings, so a member never holds two places in a slot, however
+    many requests race. release() gives places back when bookings are
+    rejected. Bookings written without reserve() (seed scripts, restores)
+    need `flask rebuild-slot-counts` afterwards.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.extensions['slot_counter'] = self
+        
+        @app.cli.command('rebuild-slot-counts')
+        def rebuild_slot_counts_command():
+            """Recount the places taken in every slot from the bookings table."""
+            click.echo(f'Counted bookings in {self.rebuild()} slots')
+    
+    def _bind(self, room_id):
+        return shard_router.bind_arguments(shard_router.shard_for_room(room_id) if shard_router.enabled else None)
+    
+    def _insert(self, table):
+        # Both dialects spell ON CONFLICT the same way, through their own insert()
+        return (postgresql if db.engine.dialect.name == 'postgresql' else sqlite).insert(table)
+    
+    def reserve(self, room_id, booking_date, session_type, count=1):
+        """Take count places in a slot in the current transaction; False if the room has too few left."""
+        table = BookingSlot.__table__
+        capacity = select(Room.capacity).where(Room.id == room_id).scalar_subquery()
+        statement = self._insert(table).from_select(
+            ['room_id', 'booking_date', 'session_type', 'booked'],
+            select(literal(room_id, Room.id.type), literal(booking_date, table.c.booking_date.type),
+                   literal(session_type, table.c.session_type.type), literal(count)).where(
+                Room.id == room_id,
+                Room.capacity >= count
+            )
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=['room_id', 'booking_date', 'session_type'],
+            set_={'booked': table.c.booked + statement.excluded.booked},
+            where=table.c.booked + statement.excluded.booked <= capacity
+        )
+        result = db.session.execute(statement, bind_arguments=self._bind(room_id))
+        return result.rowcount == 1
+    
+    def claim(self, values):
+        """Insert a booking row in the current transaction; False if its member already holds the slot."""
+        statement = self._insert(BookingApplication.__table__).values(**values).on_conflict_do_nothing(
+            index_elements=['room_id', 'booking_date', 'session_type', 'user_id'],
+            index_where=text(ACTIVE_PREDICATE)
+        )
+        result = db.session.execute(statement, bind_arguments=self._bind(values['room_id']))
+        if result.rowcount != 1:
+            return False
+        # Written around the ORM, so log it for delta sync like a bulk import
+        change_log.record_rows(BookingApplication, [values])
+        return True
+    
+    def release(self, bookings):
+        """Give back the places of bookings that stop being pending or approved, in the current transaction."""
+        table = BookingSlot.__table__
+        for (room_id, booking_date, session_type), count in Counter(map(slot_key, bookings)).items():
+            db.session.execute(
+                update(table).where(
+                    table.c.room_id == room_id,
+                    table.c.booking_date == booking_date,
+                    table.c.session_type == session_type
+                ).values(booked=case((table.c.booked > count, table.c.booked - count), else_=0)),
+                bind_arguments=self._bind(room_id)
+            )
+    
+    def prune(self, cutoff):
+        """Delete the counts of slots before cutoff, which take no new bookings."""
+        for shard in shard_router.all_shards():
+            db.session.execute(
+                delete(BookingSlot).where(BookingSlot.booking_date < cutoff),
+                bind_arguments=shard_router.bind_arguments(shard)
+            )
+    
+    def rebuild(self):
+        """Recount every slot from booking_applications; run while bookings are not being written."""
+        table = BookingSlot.__table__
+        slots = 0
+        for shard in shard_router.all_shards():
+            bind_arguments = shard_router.bind_arguments(shard)
+            db.session.execute(delete(table), bind_arguments=bind_arguments)
+            counts = select(
+                BookingApplication.room_id, BookingApplication.booking_date, BookingApplication.session_type,
+                func.count()
+            ).where(BookingApplication.status.in_(ACTIVE_STATUSES)).group_by(
+                BookingApplication.room_id, BookingApplication.booking_date, BookingApplication.session_type
+            )
+            result = db.session.execute(
+                table.insert().from_select(['room_id', 'booking_date', 'session_type', 'booked'], counts),
+                bind_arguments=bind_arguments
+            )
+            slots += result.rowcount
+        db.session.commit()
+        return slots
+
+slot_counter = SlotCounter()
\ No newline at end of file
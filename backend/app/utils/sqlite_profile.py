@@ -0,0 +1,179 @@
+from sqlalchemy import event
+from collections import deque
+from app.utils.metrics import Histogram
+import threading
+import time
+import os
+
+# Statements before which pysqlite opens a transaction
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+class WriterQueueTimeout(RuntimeError):
+    """Raised when a transaction waits longer than SQLITE_WRITER_TIMEOUT for the write slot."""
+
+class WriterQueue:
+    """FIFO hand-off of the single write slot of one SQLite database.
+    
+    The slot belongs to a thread; asking for it again while holding it is a
+    no-op, so nested transactions of one request do not deadlock.
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self.owner = None
+        self.timeouts = 0
+        self.wait_histogram = Histogram(WAIT_BUCKETS)
+        self._waiters = deque()
+        self._lock = threading.Lock()
+    
+    def holds(self):
+        return self.owner == threading.get_ident()
+    
+    def acquire(self, timeout):
+        me = threading.get_ident()
+        started = time.perf_counter()
+        with self._lock:
+            if self.owner == me:
+                return
+            if self.owner is None and not self._waiters:
+                self.owner = me
+                self.wait_histogram.observe(0.0)
+                return
+            waiter = (me, threading.Event())
+            self._waiters.append(waiter)
+        
+        waiter[1].wait(timeout)
+        with self._lock:
+            self.wait_histogram.observe(time.perf_counter() - started)
+            if self.owner == me:
+                return
+            self._waiters.remove(waiter)
+            self.timeouts += 1
+        raise WriterQueueTimeout(f'Waited more than {timeout}s for the {self.name} write slot')
+    
+    def release(self):
+        with self._lock:
+            if self.owner != threading.get_ident():
+                return
+            if self._waiters:
+                self.owner, event = self._waiters.popleft()
+                event.set()
+            else:
+                self.owner = None
+    
+    @property
+    def depth(self):
+        return len(self._waiters)
+
+class SQLiteProfile:
+    """Production settings for SQLite databases, enabled with SQLITE_PROFILE=production.
+    
+    Every new connection switches to WAL with synchronous=NORMAL, a busy
+    timeout, memory-mapped reads and a larger page cache. Reads keep running
+    outside a write transaction and never wait for each other or for writers.
+    A transaction's first INSERT, UPDATE or DELETE takes the database's write
+    slot from a FIFO queue before pysqlite opens the transaction, now with
+    BEGIN IMMEDIATE, and the slot passes to the next writer as soon as that
+    transaction commits or rolls back. Writers in one process therefore line
+    up in order instead of sleeping in SQLite's busy handler, and the busy
+    timeout only covers other processes.
+    """
+    
+    def __init__(self, app=None):
+        self.queues = {}
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('SQLITE_PROFILE', 'off')
+        app.config.setdefault('SQLITE_BUSY_TIMEOUT_MS', 5000)
+        app.config.setdefault('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+        app.config.setdefault('SQLITE_CACHE_SIZE_KB', 64 * 1024)
+        app.config.setdefault('SQLITE_WRITER_TIMEOUT', 30)
+        app.extensions['sqlite_profile'] = self
+        if app.config['SQLITE_PROFILE'] != 'production':
+            return
+        
+        db = app.extensions['sqlalchemy']
+        with app.app_context():
+            engines = [engine for engine in db.engines.values() if engine.dialect.name == 'sqlite']
+        for engine in engines:
+            self.configure(engine, app.config)
+        
+        from app.utils.metrics import request_metrics
+        request_metrics.register_collector(self.render_metrics)
+    
+    def configure(self, engine, config):
+        """Attach the pragmas and the writer queue to one SQLite engine."""
+        if engine in self.queues:
+            return
+        queue = WriterQueue(os.path.basename(engine.url.database or '') or 'memory')
+        self.queues[engine] = queue
+        pragmas = [
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+            f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+            f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}",
+            'PRAGMA temp_store=MEMORY'
+        ]
+        timeout = config['SQLITE_WRITER_TIMEOUT']
+        
+        def on_connect(dbapi_connection, record):
+            # pysqlite opens a transaction right before the first write; take the lock then
+            dbapi_connection.isolation_level = 'IMMEDIATE'
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+        
+        def on_before_execute(connection, cursor, statement, parameters, context, executemany):
+            if not queue.holds() and statement.lstrip()[:7].upper().startswith(WRITE_PREFIXES):
+                queue.acquire(timeout)
+        
+        def on_commit(connection):
+            # Commit here rather than leave it to SQLAlchemy so the slot is
+            # handed over as soon as the transaction ends
+            if queue.holds():
+                try:
+                    connection.connection.dbapi_connection.commit()
+                finally:
+                    queue.release()
+        
+        def on_rollback(connection):
+            if queue.holds():
+                try:
+                    connection.connection.dbapi_connection.rollback()
+                finally:
+                    queue.release()
+        
+        def on_checkin(dbapi_connection, record):
+            queue.release()
+        
+        event.listen(engine, 'commit', on_commit)
+        event.listen(engine, 'rollback', on_rollback)
+        event.listen(engine, 'connect', on_connect)
+        event.listen(engine, 'before_cursor_execute', on_before_execute)
+        event.listen(engine, 'checkin', on_checkin)
+        # Connections opened before the listeners existed lack the pragmas
+        engine.dispose()
+    
+    def render_metrics(self):
+        lines = [
+            '# HELP roomieflow_sqlite_writer_queue_depth Transactions waiting for the SQLite write slot.',
+            '# TYPE roomieflow_sqlite_writer_queue_depth gauge'
+        ]
+        for queue in self.queues.values():
+            lines.append(f'roomieflow_sqlite_writer_queue_depth{{database="{queue.name}"}} {queue.depth}')
+        lines.append('# HELP roomieflow_sqlite_writer_wait_seconds Time spent waiting for the SQLite write slot.')
+        lines.append('# TYPE roomieflow_sqlite_writer_wait_seconds histogram')
+        for queue in self.queues.values():
+            lines.extend(queue.wait_histogram.render('roomieflow_sqlite_writer_wait_seconds', database=queue.name))
+        lines.append('# HELP roomieflow_sqlite_writer_timeouts_total Transactions that gave up waiting for the write slot.')
+        lines.append('# TYPE roomieflow_sqlite_writer_timeouts_total counter')
+        for queue in self.queues.values():
+            lines.append(f'roomieflow_sqlite_writer_timeouts_total{{database="{queue.name}"}} {queue.timeouts}')
+        return lines
+
+sqlite_profile = SQLiteProfile()
\ No newline at end of file
@@ -0,0 +1,4 @@
+from app.read_tier import create_read_app
+
+# Async read tier for the chart, usage, property and room GETs: uvicorn asgi:app
+app = create_read_app()
\ No newline at end of file
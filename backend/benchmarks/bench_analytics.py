@@ -0,0 +1,46 @@
+"""
+Latency of the property analytics endpoint over a long booking history.
+
+Usage: python -m benchmarks.bench_analytics [--weeks 52] [--members 30] [--rooms 8]
+"""
+
+import argparse
+from datetime import timedelta
+
+from benchmarks.common import make_app, seed, login, measure, print_table, cleanup
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--weeks', type=int, default=52)
+    parser.add_argument('--members', type=int, default=30)
+    parser.add_argument('--rooms', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+    
+    app, path = make_app()
+    try:
+        data = seed(app, members=args.members, rooms=args.rooms, weeks=args.weeks, fill=0.8)
+        client = app.test_client()
+        owner = login(client, 'owner')
+        
+        print(f"Seeded {data['bookings']} bookings over {args.weeks} weeks, "
+              f"{args.members} members, {args.rooms} rooms")
+        print()
+        
+        rows = []
+        for weeks in sorted({4, 12, args.weeks}):
+            start = data['start'] + timedelta(weeks=args.weeks - weeks)
+            url = f"/api/properties/{data['property_id']}/analytics?weeks={weeks}&week_start={start.isoformat()}"
+            response = client.get(url, headers=owner)
+            timing = measure(lambda: client.get(url, headers=owner), iterations=args.iterations)
+            rows.append([
+                weeks, response.get_json()['total_bookings'],
+                f"{timing['median_ms']:.1f}", f"{timing['p95_ms']:.1f}"
+            ])
+        
+        print_table(['weeks', 'bookings', 'median ms', 'p95 ms'], rows)
+    finally:
+        cleanup(path)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Storage and join latency of compact keys against the old 36-character string keys.
+
+Seeds the real schema, copies it into a twin database whose key columns are
+VARCHAR(36), then compares table and index sizes (SQLite dbstat) and the
+latency of the joins the booking endpoints run.
+
+Usage: python -m benchmarks.bench_keys [--weeks 52] [--members 30] [--rooms 8]
+"""
+
+import argparse
+import os
+import tempfile
+from datetime import timedelta
+
+from sqlalchemy import create_engine, select, text, MetaData, String
+
+from benchmarks.common import make_app, seed, measure, print_table, cleanup
+
+def legacy_metadata(metadata):
+    """Copy the model tables with every compact key column turned back into VARCHAR(36)."""
+    from app.models.types import CompactUUID
+    
+    legacy = MetaData()
+    for table in metadata.sorted_tables:
+        copy = table.to_metadata(legacy)
+        for column in copy.columns:
+            if isinstance(column.type, CompactUUID):
+                column.type = String(36)
+    return legacy
+
+def copy_rows(source_engine, source_metadata, target_engine, target_metadata):
+    with source_engine.connect() as source, target_engine.begin() as target:
+        for table in source_metadata.sorted_tables:
+            rows = [dict(row) for row in source.execute(select(table)).mappings()]
+            if rows:
+                target.execute(target_metadata.tables[table.name].insert(), rows)
+
+def storage(engine):
+    """Get the bytes used by each table and index."""
+    with engine.connect() as connection:
+        return dict(connection.execute(text(
+            'SELECT name, SUM(pgsize) FROM dbstat GROUP BY name'
+        )).all())
+
+def join_queries(metadata, data):
+    """Build the statements to time against one schema."""
+    bookings = metadata.tables['booking_applications']
+    rooms = metadata.tables['rooms']
+    users = metadata.tables['users']
+    week_start = data['start'] + timedelta(weeks=1)
+    week_end = week_start + timedelta(days=6)
+    
+    weekly_chart = select(
+        bookings.c.id, bookings.c.session_type, bookings.c.status, users.c.username, rooms.c.name
+    ).join(rooms, rooms.c.id == bookings.c.room_id).join(
+        users, users.c.id == bookings.c.user_id
+    ).where(
+        rooms.c.property_id == data['property_id'],
+        bookings.c.booking_date >= week_start,
+        bookings.c.booking_date <= week_end
+    )
+    member_history = select(bookings, rooms.c.name).join(
+        rooms, rooms.c.id == bookings.c.room_id
+    ).where(bookings.c.user_id == data['member_ids'][1]).order_by(bookings.c.booking_date.desc())
+    slot_check = select(bookings.c.id).where(
+        bookings.c.room_id == data['room_ids'][0],
+        bookings.c.booking_date == week_start,
+        bookings.c.session_type == 'evening'
+    )
+    return [
+        ('weekly chart join', weekly_chart),
+        ('member history join', member_history),
+        ('slot uniqueness probe', slot_check)
+    ]
+
+def raw_statement(engine, query):
+    """Compile a statement to SQL and DBAPI parameters, so it can run without SQLAlchemy."""
+    compiled = query.compile(engine)
+    params = []
+    for name in compiled.positiontup:
+        bind_type = compiled.binds[name].type.dialect_impl(engine.dialect)
+        processor = bind_type.bind_processor(engine.dialect)
+        value = compiled.params[name]
+        params.append(processor(value) if processor else value)
+    return str(compiled), params
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--weeks', type=int, default=52)
+    parser.add_argument('--members', type=int, default=30)
+    parser.add_argument('--rooms', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+    
+    app, path = make_app()
+    fd, legacy_path = tempfile.mkstemp(prefix='roomieflow-bench-legacy-', suffix='.db')
+    os.close(fd)
+    try:
+        data = seed(app, members=args.members, rooms=args.rooms, weeks=args.weeks, fill=0.8)
+        
+        from app import db
+        with app.app_context():
+            compact_engine = db.engine
+            compact_metadata = db.metadata
+            legacy = legacy_metadata(compact_metadata)
+            legacy_engine = create_engine(f'sqlite:///{legacy_path}')
+            legacy.create_all(legacy_engine)
+            copy_rows(compact_engine, compact_metadata, legacy_engine, legacy)
+            for engine in (compact_engine, legacy_engine):
+                with engine.connect() as connection:
+                    connection.execute(text('VACUUM'))
+                    connection.execute(text('ANALYZE'))
+                    connection.commit()
+            
+            print(f"Seeded {data['bookings']} bookings over {args.weeks} weeks, "
+                  f"{args.members} members, {args.rooms} rooms")
+            print()
+            
+            compact_sizes = storage(compact_engine)
+            legacy_sizes = storage(legacy_engine)
+            rows = []
+            for name in sorted(set(compact_sizes) | set(legacy_sizes)):
+                if name.startswith('sqlite_') and not name.startswith('sqlite_autoindex'):
+                    continue
+                before = legacy_sizes.get(name, 0)
+                after = compact_sizes.get(name, 0)
+                if not before and not after:
+                    continue
+                rows.append([
+                    name, f'{before / 1024:.0f}', f'{after / 1024:.0f}',
+                    f'{(after / before * 100):.0f}%' if before else '-'
+                ])
+            rows.append([
+                'total', f'{sum(legacy_sizes.values()) / 1024:.0f}', f'{sum(compact_sizes.values()) / 1024:.0f}',
+                f'{sum(compact_sizes.values()) / sum(legacy_sizes.values()) * 100:.0f}%'
+            ])
+            print_table(['table / index', 'string KiB', 'compact KiB', 'ratio'], rows)
+            print()
+            
+            # "database" runs the SQL on the raw sqlite3 connection; "end to end"
+            # goes through SQLAlchemy and includes converting keys back to strings
+            rows = []
+            for (label, legacy_query), (_, compact_query) in zip(
+                join_queries(legacy, data), join_queries(compact_metadata, data)
+            ):
+                database = []
+                end_to_end = []
+                for engine, query in ((legacy_engine, legacy_query), (compact_engine, compact_query)):
+                    sql, params = raw_statement(engine, query)
+                    raw = engine.raw_connection()
+                    try:
+                        cursor = raw.cursor()
+                        database.append(measure(
+                            lambda: cursor.execute(sql, params).fetchall(), iterations=args.iterations
+                        ))
+                    finally:
+                        raw.close()
+                    with engine.connect() as connection:
+                        end_to_end.append(measure(
+                            lambda: connection.execute(query).all(), iterations=args.iterations
+                        ))
+                rows.append([
+                    label,
+                    f"{database[0]['median_ms']:.3f}", f"{database[1]['median_ms']:.3f}",
+                    f"{end_to_end[0]['median_ms']:.3f}", f"{end_to_end[1]['median_ms']:.3f}"
+                ])
+            print_table([
+                'median latency', 'string database ms', 'compact database ms',
+                'string end to end ms', 'compact end to end ms'
+            ], rows)
+            legacy_engine.dispose()
+    finally:
+        cleanup(path)
+        cleanup(legacy_path)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Payload size and latency of the chart and list endpoints, per content coding.
+
+Usage: python -m benchmarks.bench_payloads [--weeks 4] [--members 20] [--iterations 50]
+"""
+
+import argparse
+from datetime import timedelta
+
+from benchmarks.common import make_app, seed, login, measure, print_table, cleanup
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--members', type=int, default=20)
+    parser.add_argument('--rooms', type=int, default=6)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    
+    app, path = make_app()
+    try:
+        data = seed(app, members=args.members, rooms=args.rooms, weeks=args.weeks)
+        client = app.test_client()
+        owner = login(client, 'owner')
+        member = login(client, 'member000')
+        
+        from app.utils.compression import available_encodings
+        
+        week = data['start'].isoformat()
+        last_week = (data['start'] + timedelta(weeks=args.weeks - 1)).isoformat()
+        endpoints = [
+            ('chart (first week)', f'/api/bookings/weekly?week_start={week}', owner),
+            ('chart (last week)', f'/api/bookings/weekly?week_start={last_week}', owner),
+            ('usage', f'/api/usage/weekly?week_start={week}', member),
+            ('booking history', '/api/bookings/', member),
+            ('user list', '/api/users/', owner)
+        ]
+        
+        print(f"Seeded {data['bookings']} bookings over {args.weeks} weeks, "
+              f"{args.members} members, {args.rooms} rooms")
+        print()
+        
+        rows = []
+        for label, url, headers in endpoints:
+            identity = client.get(url, headers=headers)
+            etag = identity.headers.get('ETag')
+            identity_size = len(identity.get_data())
+            
+            for encoding in ['identity'] + available_encodings():
+                request_headers = dict(headers, **{'Accept-Encoding': encoding})
+                response = client.get(url, headers=request_headers)
+                size = len(response.get_data())
+                timing = measure(lambda: client.get(url, headers=request_headers), iterations=args.iterations)
+                rows.append([
+                    label, encoding, size, f'{size / identity_size:.1%}',
+                    f"{timing['median_ms']:.2f}", f"{timing['p95_ms']:.2f}"
+                ])
+            
+            if etag:
+                revalidate = dict(headers, **{'If-None-Match': etag})
+                response = client.get(url, headers=revalidate)
+                timing = measure(lambda: client.get(url, headers=revalidate), iterations=args.iterations)
+                rows.append([
+                    label, f'304 ({response.status_code})', len(response.get_data()), '-',
+                    f"{timing['median_ms']:.2f}", f"{timing['p95_ms']:.2f}"
+                ])
+        
+        print_table(['endpoint', 'encoding', 'bytes', 'ratio', 'median ms', 'p95 ms'], rows)
+        print()
+        print('compressed-bytes cache:', app.extensions['response_compressor'].cache_stats())
+    finally:
+        cleanup(path)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Concurrent booking requests hammering a single slot.
+
+Many threads are released at once against one room session: first each
+thread is a different member (a crowd racing for the room's places), then
+every thread is the same member (a double-submitting client). Runs with the
+default SQLite settings and with SQLITE_PROFILE=production, and checks that
+exactly the room's capacity (or one booking) gets through, that the rest
+get a clean 409, that nothing fails with a 5xx, and that the slot counter
+matches the booking rows.
+
+Usage: python -m benchmarks.bench_slot_race [--threads 32] [--rounds 5]
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+from datetime import timedelta
+
+from benchmarks.common import SESSIONS, make_app, seed, login, print_table, cleanup
+
+def hammer(app, headers, body):
+    """Send the same booking request from one thread per header set at once; return (statuses, latencies)."""
+    statuses = []
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(headers))
+    
+    def send(header):
+        client = app.test_client()
+        barrier.wait()
+        started = time.perf_counter()
+        response = client.post('/api/bookings/', headers=header, json=body)
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            statuses.append(response.status_code)
+            latencies.append(elapsed)
+    
+    threads = [threading.Thread(target=send, args=(header,)) for header in headers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses, latencies
+
+def slot_state(app, room_id, booking_date, session_type):
+    """Get (active booking rows, counted places) of one slot."""
+    from app import db
+    from app.models.booking import BookingApplication, BookingSlot
+    with app.app_context():
+        rows = BookingApplication.query.filter_by(
+            room_id=room_id, booking_date=booking_date, session_type=session_type
+        ).filter(BookingApplication.status.in_(['pending', 'approved'])).count()
+        slot = db.session.get(BookingSlot, (room_id, booking_date, session_type))
+        return rows, slot.booked if slot else 0
+
+def run(profile, args):
+    os.environ['SQLITE_PROFILE'] = profile
+    app, path = make_app(LOADSHED_ENABLED=False)
+    try:
+        data = seed(app, members=args.threads + 1, rooms=3, weeks=1)
+        from app.models.room import Room
+        with app.app_context():
+            # The seed gives rooms capacities 1, 2 and 3; race for the biggest
+            room = max(Room.query.all(), key=lambda room: room.capacity)
+            room_id, capacity = room.id, room.capacity
+        client = app.test_client()
+        headers = [login(client, f'member{i:03d}') for i in range(args.threads)]
+        first_day = data['start'] + timedelta(weeks=2)
+        
+        results = {}
+        for scenario in ('crowd', 'same member'):
+            statuses, latencies, broken = [], [], 0
+            for round_number in range(args.rounds):
+                booking_date = first_day + timedelta(days=round_number + (args.rounds if scenario == 'same member' else 0))
+                session_type = SESSIONS[round_number % len(SESSIONS)]
+                body = {'room_id': room_id, 'booking_date': booking_date.isoformat(), 'session_type': session_type}
+                senders = headers if scenario == 'crowd' else [headers[0]] * args.threads
+                round_statuses, round_latencies = hammer(app, senders, body)
+                statuses.extend(round_statuses)
+                latencies.extend(round_latencies)
+                
+                expected = capacity if scenario == 'crowd' else 1
+                rows, booked = slot_state(app, room_id, booking_date, session_type)
+                if round_statuses.count(201) != expected or rows != expected or booked != expected:
+                    broken += 1
+            latencies.sort()
+            results[scenario] = {
+                'requests': len(statuses),
+                'created': statuses.count(201),
+                'conflicts': statuses.count(409),
+                'errors': sum(1 for status in statuses if status >= 500),
+                'broken_rounds': broken,
+                'median_ms': statistics.median(latencies),
+                'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            }
+        return capacity, results
+    finally:
+        cleanup(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=32, help='Concurrent requests per round')
+    parser.add_argument('--rounds', type=int, default=5, help='Rounds per scenario, each on a fresh slot')
+    args = parser.parse_args()
+    
+    rows = []
+    for profile in ('off', 'production'):
+        capacity, results = run(profile, args)
+        for scenario, result in results.items():
+            rows.append([
+                profile, scenario, capacity if scenario == 'crowd' else 1, result['requests'],
+                result['created'], result['conflicts'], result['errors'], result['broken_rounds'],
+                f"{result['median_ms']:.1f}", f"{result['p95_ms']:.1f}"
+            ])
+    
+    print_table(['SQLITE_PROFILE', 'scenario', 'places', 'requests', '201', '409', '5xx',
+                 'broken rounds', 'median ms', 'p95 ms'], rows)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Booking write throughput on SQLite under concurrent writers and chart readers.
+
+Runs the same workload twice, with the default SQLite settings and with
+SQLITE_PROFILE=production (WAL, synchronous=NORMAL and the writer queue).
+Every writer thread creates bookings on its own dates while reader threads
+poll the weekly chart, so writes contend with each other and with reads.
+
+Usage: python -m benchmarks.bench_sqlite_writes [--writers 8] [--readers 4] [--bookings 40]
+"""
+
+import argparse
+import os
+import threading
+import time
+from datetime import timedelta
+
+from benchmarks.common import SESSIONS, make_app, seed, login, print_table, cleanup
+
+def run(profile, args):
+    os.environ['SQLITE_PROFILE'] = profile
+    app, path = make_app(LOADSHED_ENABLED=False)
+    try:
+        data = seed(app, members=args.writers + args.readers, rooms=args.rooms, weeks=2)
+        # Past the seeded weeks, so every requested slot is free
+        first_day = data['start'] + timedelta(weeks=2, days=1)
+        writer_headers = [login(app.test_client(), f'member{i:03d}') for i in range(args.writers)]
+        reader_headers = [login(app.test_client(), f'member{args.writers + i:03d}') for i in range(args.readers)]
+        
+        latencies = []
+        statuses = {}
+        reads = [0]
+        lock = threading.Lock()
+        done = threading.Event()
+        
+        def write(index):
+            client = app.test_client()
+            room_id = data['room_ids'][index % len(data['room_ids'])]
+            for i in range(args.bookings):
+                # Distinct slot per (writer, booking): no business-rule conflicts
+                day = first_day + timedelta(days=(index // len(data['room_ids'])) * args.bookings + i)
+                started = time.perf_counter()
+                response = client.post('/api/bookings/', headers=writer_headers[index], json={
+                    'room_id': room_id,
+                    'booking_date': day.isoformat(),
+                    'session_type': SESSIONS[i % len(SESSIONS)]
+                })
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed * 1000)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        
+        def read(index):
+            client = app.test_client()
+            while not done.is_set():
+                client.get(f"/api/bookings/weekly?property_id={data['property_id']}", headers=reader_headers[index])
+                with lock:
+                    reads[0] += 1
+        
+        readers = [threading.Thread(target=read, args=(i,)) for i in range(args.readers)]
+        writers = [threading.Thread(target=write, args=(i,)) for i in range(args.writers)]
+        for thread in readers:
+            thread.start()
+        started = time.perf_counter()
+        for thread in writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for thread in readers:
+            thread.join()
+        
+        latencies.sort()
+        return {
+            'created': statuses.get(201, 0),
+            'failed': sum(count for status, count in statuses.items() if status != 201),
+            'writes_per_s': statuses.get(201, 0) / elapsed,
+            'reads_per_s': reads[0] / elapsed,
+            'p50_ms': latencies[len(latencies) // 2],
+            'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        }
+    finally:
+        cleanup(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--bookings', type=int, default=40, help='Bookings per writer thread')
+    parser.add_argument('--rooms', type=int, default=4)
+    args = parser.parse_args()
+    
+    print(f'{args.writers} writers x {args.bookings} bookings, {args.readers} weekly chart readers')
+    print()
+    
+    rows = []
+    for profile in ('off', 'production'):
+        result = run(profile, args)
+        rows.append([
+            profile, result['created'], result['failed'],
+            f"{result['writes_per_s']:.1f}", f"{result['reads_per_s']:.1f}",
+            f"{result['p50_ms']:.1f}", f"{result['p99_ms']:.1f}"
+        ])
+    
+    print_table(['profile', 'created', 'failed', 'writes/s', 'reads/s', 'write p50 ms', 'write p99 ms'], rows)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
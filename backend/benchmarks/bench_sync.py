@@ -0,0 +1,70 @@
+"""
+Delta sync cost against data size.
+
+Seeds one property with more and more weeks of bookings, applies the same
+handful of changes through the API and compares a full sync (no cursor)
+with an incremental sync from the cursor taken before the changes.
+
+Usage: python -m benchmarks.bench_sync [--weeks 4,26,104] [--changes 20] [--repeat 20]
+"""
+
+import argparse
+from datetime import timedelta
+
+from benchmarks.common import SESSIONS, make_app, seed, login, measure, print_table, cleanup
+
+def run(weeks, args):
+    app, path = make_app()
+    try:
+        data = seed(app, members=20, rooms=6, weeks=weeks)
+        client = app.test_client()
+        member = login(client, 'member000')
+        owner = login(client, 'owner')
+        cursor = client.get('/api/sync', headers=member).get_json()['cursor']
+        
+        # Past the seeded weeks, so every slot is free
+        first_day = data['start'] + timedelta(weeks=weeks, days=1)
+        for i in range(args.changes):
+            response = client.post('/api/bookings/', headers=member, json={
+                'room_id': data['room_ids'][i % len(data['room_ids'])],
+                'booking_date': (first_day + timedelta(days=i // len(SESSIONS))).isoformat(),
+                'session_type': SESSIONS[i % len(SESSIONS)]
+            })
+            if i % 2 and response.status_code == 201:
+                client.put(f"/api/bookings/{response.get_json()['booking']['id']}/approve", headers=owner, json={})
+        
+        full = client.get('/api/sync', headers=member)
+        delta = client.get(f'/api/sync?cursor={cursor}', headers=member)
+        return {
+            'bookings': data['bookings'],
+            'full_changes': len(full.get_json()['changes']),
+            'full_kb': len(full.get_data()) / 1024,
+            'full_ms': measure(lambda: client.get('/api/sync', headers=member), args.repeat)['median_ms'],
+            'delta_changes': len(delta.get_json()['changes']),
+            'delta_kb': len(delta.get_data()) / 1024,
+            'delta_ms': measure(lambda: client.get(f'/api/sync?cursor={cursor}', headers=member), args.repeat)['median_ms']
+        }
+    finally:
+        cleanup(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--weeks', default='4,26,104', help='Comma-separated weeks of seeded bookings')
+    parser.add_argument('--changes', type=int, default=20, help='Bookings created (half of them approved) after the cursor')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    rows = []
+    for weeks in [int(value) for value in args.weeks.split(',')]:
+        result = run(weeks, args)
+        rows.append([
+            weeks, result['bookings'],
+            result['full_changes'], f"{result['full_kb']:.0f}", f"{result['full_ms']:.1f}",
+            result['delta_changes'], f"{result['delta_kb']:.1f}", f"{result['delta_ms']:.1f}"
+        ])
+    
+    print_table(['weeks', 'bookings', 'full changes', 'full KB', 'full median ms',
+                 'delta changes', 'delta KB', 'delta median ms'], rows)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+Shared helpers for the RoomieFlow benchmark scripts.
+
+Each benchmark builds the real app against a throwaway SQLite database,
+seeds a busy property and drives it through the Flask test client.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import random
+import statistics
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SESSIONS = ['morning', 'midday', 'evening']
+STATUSES = ['approved', 'approved', 'approved', 'pending', 'rejected']
+
+def make_app(database_url=None, **config):
+    """Create the app on a fresh database and return (app, database_path)."""
+    path = None
+    if database_url is None:
+        fd, path = tempfile.mkstemp(prefix='roomieflow-bench-', suffix='.db')
+        os.close(fd)
+        database_url = f'sqlite:///{path}'
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-secret-key-long-enough-for-hs256')
+    
+    from app import create_app, db
+    from app.models import token_revocation  # noqa: F401  (registers the table for create_all)
+    
+    app = create_app()
+    # Benchmarks log in far more often than any real client
+    config.setdefault('RATELIMIT_ENABLED', False)
+    app.config.update(config)
+    with app.app_context():
+        db.create_all()
+    return app, path
+
+def seed(app, members=20, rooms=6, weeks=4, fill=0.6, start=None, seed_value=42, reset_day=1):
+    """Seed one property with members, rooms and several weeks of bookings.
+    
+    Quota weeks start on reset_day (Monday = 1). Returns a dict with the
+    owner id, property id, room ids and member ids.
+    """
+    from app import db
+    from app.models.user import User
+    from app.models.property import Property, PropertyMember
+    from app.models.room import Room
+    from app.models.booking import BookingApplication
+    from app.models.time_allocation import TimeAllocation, quota_week_start
+    from app.utils.slots import slot_counter
+    
+    rng = random.Random(seed_value)
+    today = date.today()
+    start = start or today - timedelta(days=today.weekday())
+    
+    with app.app_context():
+        # Hash once, bcrypt would dominate seeding otherwise
+        template = User(username='template', email='template@example.com')
+        template.set_password('Password1')
+        
+        owner = User(username='owner', email='owner@example.com',
+                     password_hash=template.password_hash, role='admin')
+        db.session.add(owner)
+        db.session.flush()
+        
+        property_obj = Property(name='Bench House', description='Benchmark property', owner_id=owner.id)
+        db.session.add(property_obj)
+        db.session.flush()
+        db.session.add(TimeAllocation(property_id=property_obj.id, weekly_limit_days=3.0,
+                                      reset_day_of_week=reset_day))
+        
+        member_ids = []
+        for i in range(members):
+            user = User(username=f'member{i:03d}', email=f'member{i:03d}@example.com',
+                        password_hash=template.password_hash)
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(PropertyMember(property_id=property_obj.id, user_id=user.id,
+                                          role='admin' if i == 0 else 'member',
+                                          invitation_status='accepted'))
+            member_ids.append(user.id)
+        
+        room_ids = []
+        for i in range(rooms):
+            room = Room(property_id=property_obj.id, name=f'Room {i + 1}', capacity=1 + i % 3)
+            db.session.add(room)
+            db.session.flush()
+            room_ids.append(room.id)
+        
+        bookings = []
+        for day in range(weeks * 7):
+            booking_date = start + timedelta(days=day)
+            for room_id in room_ids:
+                for session_type in SESSIONS:
+                    if rng.random() > fill:
+                        continue
+                    bookings.append({
+                        'user_id': rng.choice(member_ids),
+                        'room_id': room_id,
+                        'booking_date': booking_date,
+                        'session_type': session_type,
+                        'status': rng.choice(STATUSES),
+                        'notes': 'Benchmark booking',
+                        'duration_value': BookingApplication.get_session_duration(session_type),
+                        'quota_week': quota_week_start(booking_date, reset_day)
+                    })
+        db.session.bulk_insert_mappings(BookingApplication, bookings)
+        db.session.commit()
+        # Inserted around the API, so count the places they take
+        slot_counter.rebuild()
+        
+        return {
+            'owner_id': owner.id,
+            'property_id': property_obj.id,
+            'room_ids': room_ids,
+            'member_ids': member_ids,
+            'start': start,
+            'bookings': len(bookings)
+        }
+
+def login(client, username, password='Password1'):
+    """Log in through the API and return the Authorization header."""
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def measure(fn, iterations=50, warmup=3):
+    """Time a callable and return latency statistics in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'mean_ms': statistics.fmean(samples)
+    }
+
+def print_table(headers, rows):
+    """Print rows as an aligned plain-text table."""
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    print('  '.join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print('  '.join('-' * w for w in widths))
+    for row in rows:
+        print('  '.join(str(cell).ljust(w) for cell, w in zip(row, widths)))
+
+def cleanup(path):
+    """Remove a benchmark database and its WAL side files."""
+    if not path:
+        return
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
\ No newline at end of file
@@ -0,0 +1,541 @@
+"""
+Concurrent load test of a running server with a realistic traffic mix.
+
+Virtual users log in and then loop: pick an action from the weighted mix,
+run it over HTTP and think for an exponentially distributed pause. Members
+view the weekly chart, check their usage, log in again and request
+bookings; a share of the requests targets a few popular slots that move to
+a new day every --hot-rotate seconds, so writers keep colliding. The owner
+and member000 are property admins and also work the pending-approval queue.
+
+Without --url the script seeds a throwaway SQLite database and starts
+`flask run` on it (or --server-cmd, e.g. gunicorn), passing environment
+variables such as SQLITE_PROFILE through. With --url it drives a server whose
+database was prepared with --seed-only.
+
+The report gives throughput, latency percentiles and outcomes per action:
+slot conflicts, rate limiting, load shedding, server errors, slots booked
+past their room's capacity and "database is locked" failures from the server log and metrics.
+Each run is saved as JSON with the git commit under benchmarks/results/;
+--compare prints two saved runs side by side.
+
+Usage: python -m benchmarks.load_test [--users 40] [--duration 60] [--think 1.0]
+                                      [--mix chart=40,usage=20,book=25,approve=10,login=5]
+       python -m benchmarks.load_test --seed-only sqlite:////tmp/load.db --users 40
+       python -m benchmarks.load_test --url http://127.0.0.1:5000 --users 40
+       python -m benchmarks.load_test --compare results/OLD.json results/NEW.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import secrets
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit, urlencode
+
+from benchmarks.common import SESSIONS, make_app, seed, print_table, cleanup
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+DEFAULT_MIX = 'chart=40,usage=20,book=25,approve=10,login=5'
+ADMINS = ('owner', 'member000')
+# Server settings recorded with each run, so saved results say what they measured
+SERVER_SETTINGS = ('SQLITE_PROFILE', 'LOADSHED_ENABLED', 'LOADSHED_MAX_CONCURRENCY', 'RATELIMIT_ENABLED',
+                   'RESPONSE_CACHE_ENABLED', 'SHARD_DATABASE_URLS')
+PERCENTILES = (50, 90, 95, 99)
+
+class Client:
+    """Keep-alive HTTP/1.1 client for one virtual user."""
+    
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.connection = None
+    
+    def request(self, method, path, body=None, token=None):
+        """Send one JSON request and return (status, parsed body or None)."""
+        headers = {'Accept': 'application/json'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        status, data = self.send(method, path, payload, headers)
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+    
+    def send(self, method, path, payload=None, headers=None):
+        """Send one request and return (status, raw body)."""
+        for attempt in range(2):
+            reused = self.connection is not None
+            if not reused:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, self.prefix + path, payload, headers or {})
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.close()
+                # The server may have closed an idle keep-alive connection; retry once on a new one
+                if not reused or attempt:
+                    raise
+            except Exception:
+                self.close()
+                raise
+        if response.will_close:
+            self.close()
+        return response.status, data
+    
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+class Recorder:
+    """Thread-safe collection of latencies and outcomes per action."""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+        self.created_slots = defaultdict(int)
+    
+    def add(self, action, elapsed, outcome):
+        with self.lock:
+            self.latencies[action].append(elapsed * 1000)
+            self.outcomes[action][outcome] += 1
+    
+    def booked(self, slot):
+        with self.lock:
+            self.created_slots[slot] += 1
+
+def classify(status, body):
+    """Sort a response into ok, conflict, rate_limited, shed, locked, server_error or client_error."""
+    error = (body or {}).get('error', '') if isinstance(body, dict) else ''
+    if 200 <= status < 300:
+        return 'ok'
+    if status == 409 or any(text in error for text in ('fully booked', 'already have a booking', 'Only pending')):
+        return 'conflict'
+    if status == 429:
+        return 'rate_limited'
+    if status == 503:
+        return 'shed'
+    if status >= 500:
+        return 'locked' if 'locked' in error.lower() else 'server_error'
+    return 'client_error'
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ('chart', 'usage', 'book', 'approve', 'login'):
+            raise SystemExit(f'Unknown action in --mix: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+class VirtualUser(threading.Thread):
+    """One logged-in user running the traffic mix until the run ends."""
+    
+    def __init__(self, index, username, site, args, recorder, stop):
+        super().__init__(daemon=True)
+        self.index = index
+        self.username = username
+        self.site = site
+        self.args = args
+        self.recorder = recorder
+        self.stop = stop
+        self.rng = random.Random(args.seed + index)
+        self.client = Client(args.url, args.timeout)
+        self.token = None
+        mix = dict(args.mix)
+        if username not in ADMINS:
+            mix.pop('approve', None)
+        self.actions = list(mix)
+        self.weights = [mix[action] for action in self.actions]
+    
+    def call(self, action, method, path, body=None):
+        started = time.perf_counter()
+        try:
+            status, data = self.client.request(method, path, body, self.token)
+        except (OSError, http.client.HTTPException):
+            self.recorder.add(action, time.perf_counter() - started, 'transport')
+            return None, None
+        outcome = classify(status, data)
+        self.recorder.add(action, time.perf_counter() - started, outcome)
+        if status == 401 and action != 'login':
+            # Expired access token: log in again like the frontend does
+            self.login()
+        return status, data
+    
+    def login(self):
+        status, data = self.call('login', 'POST', '/api/auth/login',
+                                 {'username': self.username, 'password': self.args.password})
+        if status == 200:
+            self.token = data['access_token']
+    
+    def chart(self):
+        week_start = self.site['week_start'] + timedelta(weeks=self.rng.choice((0, 0, 0, 1)))
+        self.call('chart', 'GET', '/api/bookings/weekly?' + urlencode({'week_start': week_start.isoformat()}))
+    
+    def usage(self):
+        self.call('usage', 'GET', '/api/usage/weekly')
+    
+    def book(self):
+        elapsed = time.monotonic() - self.site['started']
+        if self.rng.random() < self.args.hot_share:
+            # Popular slots: evenings in the first rooms on a day that moves on every --hot-rotate seconds
+            day = self.site['hot_start'] + timedelta(days=int(elapsed // self.args.hot_rotate))
+            room_id = self.rng.choice(self.site['room_ids'][:self.args.hot_slots])
+            session_type = 'evening'
+        else:
+            day = self.site['cold_start'] + timedelta(days=self.rng.randrange(self.args.horizon_days))
+            room_id = self.rng.choice(self.site['room_ids'])
+            session_type = self.rng.choice(SESSIONS)
+        status, _ = self.call('book', 'POST', '/api/bookings/', {
+            'room_id': room_id,
+            'booking_date': day.isoformat(),
+            'session_type': session_type,
+            'notes': 'Load test'
+        })
+        if status == 201:
+            self.recorder.booked((room_id, day.isoformat(), session_type))
+    
+    def approve(self):
+        status, data = self.call('queue', 'GET', '/api/bookings/pending?limit=20')
+        if status != 200 or not data['bookings']:
+            return
+        # Admins rarely pick the very same request; the ones who do show up as conflicts
+        booking = self.rng.choice(data['bookings'])
+        self.call('approve', 'PUT', f"/api/bookings/{booking['id']}/approve", {})
+    
+    def run(self):
+        if self.stop.wait(self.index * self.args.ramp / max(self.args.users, 1)):
+            return
+        self.login()
+        while not self.stop.is_set():
+            action = self.rng.choices(self.actions, self.weights)[0]
+            getattr(self, action)()
+            if self.args.think > 0:
+                pause = min(self.rng.expovariate(1 / self.args.think), self.args.think * 5)
+                if self.stop.wait(pause):
+                    break
+        self.client.close()
+
+def seed_database(args, database_url=None):
+    """Seed the property used by the virtual users and return the database path if it is a temporary one."""
+    app, path = make_app(database_url)
+    seed(app, members=max(args.users, 2), rooms=args.rooms, weeks=args.weeks)
+    return path
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(args, log_path):
+    port = free_port()
+    args.url = f'http://127.0.0.1:{port}'
+    env = dict(os.environ)
+    env.setdefault('JWT_SECRET_KEY', 'benchmark-secret-key-long-enough-for-hs256')
+    # /api/metrics needs a token or an admin login
+    env.setdefault('METRICS_TOKEN', secrets.token_hex(16))
+    args.metrics_token = env['METRICS_TOKEN']
+    if not args.rate_limit:
+        # Every virtual user shares one client address, so per-IP login limits would throttle the whole run
+        env['RATELIMIT_ENABLED'] = 'false'
+    if args.server_cmd:
+        command = shlex.split(args.server_cmd.format(port=port))
+    else:
+        command = [sys.executable, '-m', 'flask', '--app', 'app:create_app', 'run',
+                   '--port', str(port), '--no-reload', '--no-debugger', '--with-threads']
+    log = open(log_path, 'w')
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    client = Client(args.url, 2)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            if client.request('GET', '/api/health')[0] == 200:
+                client.close()
+                return process, log
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    log.close()
+    with open(log_path) as handle:
+        sys.stderr.write(handle.read()[-4000:])
+    raise SystemExit('Server did not become healthy within 30s')
+
+def discover(args):
+    """Find the seeded property's rooms through the API, as a client would."""
+    client = Client(args.url, args.timeout)
+    status, data = client.request('POST', '/api/auth/login', {'username': 'owner', 'password': args.password})
+    if status != 200:
+        raise SystemExit(f'Could not log in as owner ({status}); seed the server database with --seed-only first')
+    token = data['access_token']
+    properties = client.request('GET', '/api/properties/', token=token)[1]['properties']
+    rooms = client.request('GET', '/api/rooms/?' + urlencode({'property_id': properties[0]['id']}), token=token)[1]['rooms']
+    client.close()
+    
+    today = date.today()
+    week_start = today - timedelta(days=today.weekday())
+    # Past the seeded weeks, so only the load test itself fills these slots
+    first_free = week_start + timedelta(weeks=args.weeks)
+    return {
+        'room_ids': [room['id'] for room in sorted(rooms, key=lambda room: room['name'])],
+        'capacities': {room['id']: room['capacity'] for room in rooms},
+        'week_start': week_start,
+        'hot_start': first_free,
+        'cold_start': first_free + timedelta(days=args.duration // args.hot_rotate + 1),
+        'started': time.monotonic()
+    }
+
+def scrape_metrics(args):
+    """Get the SQLite writer timeout count from /api/metrics, or None when it is unavailable."""
+    client = Client(args.url, args.timeout)
+    token = getattr(args, 'metrics_token', None) or os.environ.get('METRICS_TOKEN')
+    try:
+        status, data = client.send('GET', '/api/metrics', headers={'Authorization': f'Bearer {token}'} if token else {})
+    except (OSError, http.client.HTTPException):
+        return None
+    finally:
+        client.close()
+    if status != 200:
+        return None
+    text = data.decode()
+    return sum(int(float(value)) for value in re.findall(r'^roomieflow_sqlite_writer_timeouts_total\{[^}]*\} (\S+)$', text, re.M))
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BACKEND_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, dirty
+
+def summarize(recorder, elapsed, capacities):
+    actions = {}
+    totals = defaultdict(int)
+    everything = []
+    for action, samples in sorted(recorder.latencies.items()):
+        samples.sort()
+        everything.extend(samples)
+        outcomes = dict(recorder.outcomes[action])
+        for outcome, count in outcomes.items():
+            totals[outcome] += count
+        actions[action] = {
+            'requests': len(samples),
+            'rps': len(samples) / elapsed,
+            'mean_ms': sum(samples) / len(samples),
+            **{f'p{pct}_ms': percentile(samples, pct) for pct in PERCENTILES},
+            'max_ms': samples[-1],
+            'outcomes': outcomes
+        }
+    everything.sort()
+    requests = len(everything)
+    failed = requests - totals['ok'] - totals['conflict']
+    return actions, {
+        'requests': requests,
+        'rps': requests / elapsed,
+        **{f'p{pct}_ms': percentile(everything, pct) for pct in PERCENTILES},
+        'error_rate': failed / requests if requests else 0.0,
+        'conflict_rate': totals['conflict'] / requests if requests else 0.0,
+        'outcomes': dict(totals),
+        'overbooked_slots': sum(1 for slot, count in recorder.created_slots.items() if count > capacities[slot[0]])
+    }
+
+def print_report(result):
+    rows = []
+    for action, stats in result['actions'].items():
+        outcomes = stats['outcomes']
+        errors = stats['requests'] - outcomes.get('ok', 0) - outcomes.get('conflict', 0)
+        rows.append([
+            action, stats['requests'], f"{stats['rps']:.1f}",
+            *[f"{stats[f'p{pct}_ms']:.1f}" for pct in PERCENTILES], f"{stats['max_ms']:.0f}",
+            outcomes.get('conflict', 0), errors, f"{100 * errors / stats['requests']:.1f}"
+        ])
+    totals = result['totals']
+    rows.append([
+        'all', totals['requests'], f"{totals['rps']:.1f}",
+        *[f"{totals[f'p{pct}_ms']:.1f}" for pct in PERCENTILES], '',
+        totals['outcomes'].get('conflict', 0),
+        totals['requests'] - totals['outcomes'].get('ok', 0) - totals['outcomes'].get('conflict', 0),
+        f"{100 * totals['error_rate']:.1f}"
+    ])
+    print_table(['action', 'requests', 'req/s', *[f'p{pct} ms' for pct in PERCENTILES], 'max ms',
+                 'conflicts', 'errors', 'error %'], rows)
+    print()
+    print('outcomes: ' + ', '.join(f'{name}={count}' for name, count in sorted(totals['outcomes'].items())))
+    print(f"slots booked past capacity: {totals['overbooked_slots']}")
+    server = result['server']
+    print(f"'database is locked' in server log: {server['lock_errors'] if server['lock_errors'] is not None else 'n/a'}")
+    print(f"SQLite writer timeouts: {server['writer_timeouts'] if server['writer_timeouts'] is not None else 'n/a'}")
+
+def compare(old_path, new_path):
+    with open(old_path) as handle:
+        old = json.load(handle)
+    with open(new_path) as handle:
+        new = json.load(handle)
+    print(f"old: {old['commit']}{' (dirty)' if old['dirty'] else ''} {old['started_at']}  {old.get('label') or ''}")
+    print(f"new: {new['commit']}{' (dirty)' if new['dirty'] else ''} {new['started_at']}  {new.get('label') or ''}")
+    for name in sorted(set(old['config']) | set(new['config'])):
+        if old['config'].get(name) != new['config'].get(name):
+            print(f"warning: {name} differs ({old['config'].get(name)} vs {new['config'].get(name)})")
+    print()
+    
+    def change(before, after):
+        if not before:
+            return f'{after:.1f}'
+        return f'{before:.1f} -> {after:.1f} ({100 * (after - before) / before:+.0f}%)'
+    
+    rows = []
+    for action in list(old['actions']) + [action for action in new['actions'] if action not in old['actions']]:
+        before = old['actions'].get(action)
+        after = new['actions'].get(action)
+        if not before or not after:
+            rows.append([action, 'only in ' + ('new' if after else 'old'), '', '', ''])
+            continue
+        rows.append([action, change(before['rps'], after['rps']), change(before['p50_ms'], after['p50_ms']),
+                     change(before['p95_ms'], after['p95_ms']), change(before['p99_ms'], after['p99_ms'])])
+    rows.append(['all', change(old['totals']['rps'], new['totals']['rps']),
+                 change(old['totals']['p50_ms'], new['totals']['p50_ms']),
+                 change(old['totals']['p95_ms'], new['totals']['p95_ms']),
+                 change(old['totals']['p99_ms'], new['totals']['p99_ms'])])
+    print_table(['action', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'], rows)
+    print()
+    print(f"error rate: {100 * old['totals']['error_rate']:.2f}% -> {100 * new['totals']['error_rate']:.2f}%")
+    print(f"conflict rate: {100 * old['totals']['conflict_rate']:.2f}% -> {100 * new['totals']['conflict_rate']:.2f}%")
+    print(f"slots booked past capacity: {old['totals']['overbooked_slots']} -> {new['totals']['overbooked_slots']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Base URL of a running server; default starts one on a seeded temporary database')
+    parser.add_argument('--server-cmd', help='Command starting the server, with {port}; default is flask run')
+    parser.add_argument('--seed-only', metavar='DATABASE_URL', help='Only seed this database for a server started separately')
+    parser.add_argument('--users', type=int, default=40, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=int, default=60, help='Seconds of load after the first user starts')
+    parser.add_argument('--ramp', type=float, default=5.0, help='Seconds over which the users start')
+    parser.add_argument('--think', type=float, default=1.0, help='Mean think time in seconds; 0 for a closed loop')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f'Action weights (default {DEFAULT_MIX})')
+    parser.add_argument('--hot-slots', type=int, default=2, help='Rooms whose evening slot is popular')
+    parser.add_argument('--hot-share', type=float, default=0.5, help='Share of booking requests aimed at a popular slot')
+    parser.add_argument('--hot-rotate', type=int, default=10, help='Seconds before the popular slots move to the next day')
+    parser.add_argument('--horizon-days', type=int, default=60, help='Days over which other booking requests spread')
+    parser.add_argument('--rooms', type=int, default=6)
+    parser.add_argument('--weeks', type=int, default=2, help='Weeks of seeded bookings from this Monday')
+    parser.add_argument('--password', default='Password1')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--rate-limit', action='store_true', help='Keep rate limiting on in the started server')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed of the virtual users')
+    parser.add_argument('--label', help='Free-form note saved with the results')
+    parser.add_argument('--output', help=f'Results file; default {os.path.relpath(RESULTS_DIR, BACKEND_DIR)}/<time>-<commit>.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two saved results and exit')
+    args = parser.parse_args()
+    
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.seed_only:
+        seed_database(args, args.seed_only)
+        print(f'Seeded {args.seed_only} with owner and member000..member{max(args.users, 2) - 1:03d}')
+        return
+    
+    process = log = path = None
+    log_path = None
+    try:
+        if not args.url:
+            path = seed_database(args)
+            log_path = tempfile.mkstemp(prefix='roomieflow-load-', suffix='.log')[1]
+            process, log = start_server(args, log_path)
+        site = discover(args)
+        writer_timeouts_before = scrape_metrics(args)
+        
+        usernames = ['owner'] + [f'member{i:03d}' for i in range(args.users - 1)]
+        recorder = Recorder()
+        stop = threading.Event()
+        started_at = datetime.now()
+        site['started'] = time.monotonic()
+        users = [VirtualUser(i, username, site, args, recorder, stop) for i, username in enumerate(usernames)]
+        for user in users:
+            user.start()
+        print(f'{args.users} users on {args.url} for {args.duration}s ...', file=sys.stderr)
+        stop.wait(args.duration)
+        stop.set()
+        for user in users:
+            user.join(args.timeout)
+        elapsed = time.monotonic() - site['started']
+        
+        writer_timeouts = scrape_metrics(args)
+        lock_errors = None
+        if log_path:
+            log.flush()
+            with open(log_path, errors='replace') as handle:
+                lock_errors = handle.read().count('database is locked')
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(10)
+            log.close()
+            os.remove(log_path)
+        cleanup(path)
+    
+    actions, totals = summarize(recorder, elapsed, site['capacities'])
+    commit, dirty = git_commit()
+    result = {
+        'commit': commit,
+        'dirty': dirty,
+        'label': args.label,
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'config': {
+            'users': args.users, 'duration': args.duration, 'ramp': args.ramp, 'think': args.think,
+            'mix': args.mix, 'hot_slots': args.hot_slots, 'hot_share': args.hot_share,
+            'hot_rotate': args.hot_rotate, 'horizon_days': args.horizon_days, 'seed': args.seed
+        },
+        'server': {
+            'url': args.url,
+            'started_by_load_test': process is not None,
+            'command': (args.server_cmd or 'flask run --with-threads') if process is not None else None,
+            'settings': {name: os.environ[name] for name in SERVER_SETTINGS if name in os.environ},
+            'lock_errors': lock_errors,
+            'writer_timeouts': writer_timeouts - writer_timeouts_before if None not in (writer_timeouts, writer_timeouts_before) else None
+        },
+        'elapsed_s': elapsed,
+        'totals': totals,
+        'actions': actions
+    }
+    print_report(result)
+    
+    output = args.output or os.path.join(RESULTS_DIR, f"{started_at:%Y%m%d-%H%M%S}-{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(result, handle, indent=2)
+    print(f'\nSaved {output}')
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Local debugging SMTP server for RoomieFlow
+Accepts every message and prints it instead of delivering it, so the outbox
+worker can be exercised with NOTIFY_TRANSPORT=smtp and no real mail server
+"""
+
+import argparse
+import socketserver
+import threading
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue: enough for smtplib's send_message."""
+    
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode('utf-8'))
+    
+    def handle(self):
+        self.reply('220 roomieflow-debug ESMTP ready')
+        sender = None
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 roomieflow-debug')
+            elif verb == 'MAIL':
+                sender = command.partition(':')[2].strip()
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.partition(':')[2].strip())
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b'.\r\n', b'.\n'):
+                        break
+                    if data_line.startswith(b'..'):
+                        data_line = data_line[1:]
+                    lines.append(data_line)
+                self.server.deliver(sender, recipients, b''.join(lines))
+                self.reply('250 OK: queued')
+            elif verb == 'RSET':
+                sender = None
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'NOOP':
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+class DebuggingSMTPServer(socketserver.ThreadingTCPServer):
+    """SMTP sink that keeps received messages in memory and optionally prints them."""
+    
+    allow_reuse_address = True
+    daemon_threads = True
+    
+    def __init__(self, host='localhost', port=1025, echo=True):
+        super().__init__((host, port), SMTPHandler)
+        self.echo = echo
+        self.messages = []
+        self._lock = threading.Lock()
+    
+    def deliver(self, sender, recipients, data):
+        with self._lock:
+            self.messages.append({'from': sender, 'to': recipients, 'data': data})
+        if self.echo:
+            print(f'---------- MESSAGE FOLLOWS ({sender} -> {", ".join(recipients)}) ----------')
+            print(data.decode('utf-8', 'replace'))
+            print('------------------------ END MESSAGE ------------------------')
+    
+    def start(self):
+        """Serve in a background thread, for use from scripts and tests."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Print every email sent to this SMTP server.')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=1025)
+    args = parser.parse_args()
+    
+    server = DebuggingSMTPServer(args.host, args.port)
+    print(f'Debugging SMTP server listening on {args.host}:{args.port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
\ No newline at end of file
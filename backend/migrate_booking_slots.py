@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Slot capacity migration for RoomieFlow
+Replaces the slot-wide unique constraint of booking_applications with the
+partial unique index on active bookings per member, creates booking_slots
+and counts the places already taken
+"""
+
+from app import create_app, db
+from app.models.booking import BookingApplication, BookingSlot
+from app.utils.sharding import shard_router
+from app.utils.slots import slot_counter
+from sqlalchemy import inspect, text, MetaData
+import argparse
+
+SLOT_COLUMNS = ['room_id', 'booking_date', 'session_type']
+
+# Plain slot index that briefly replaced the constraint before the partial index existed
+LEGACY_INDEXES = ['ix_booking_applications_slot']
+
+def slot_constraints(inspector):
+    """Get the unique constraints of booking_applications over the whole slot; SQLite leaves them unnamed."""
+    return [
+        constraint for constraint in inspector.get_unique_constraints('booking_applications')
+        if sorted(constraint['column_names']) == sorted(SLOT_COLUMNS)
+    ]
+
+def pending_steps(inspector):
+    """List what the migration still has to do on one database."""
+    if not inspector.has_table('booking_applications'):
+        return []
+    steps = []
+    if slot_constraints(inspector):
+        steps.append('drop the slot-wide unique constraint')
+    indexes = {index['name'] for index in inspector.get_indexes('booking_applications')}
+    if indexes & set(LEGACY_INDEXES):
+        steps.append('drop the plain slot index')
+    if not {index.name for index in BookingApplication.__table__.indexes} <= indexes:
+        steps.append('create the booking indexes')
+    if not inspector.has_table('booking_slots'):
+        steps.append('create booking_slots')
+    return steps
+
+def migrate_postgresql(connection, inspector):
+    for constraint in slot_constraints(inspector):
+        connection.execute(text(f'ALTER TABLE booking_applications DROP CONSTRAINT {constraint["name"]}'))
+    for name in LEGACY_INDEXES:
+        connection.execute(text(f'DROP INDEX IF EXISTS {name}'))
+    for index in BookingApplication.__table__.indexes:
+        index.create(connection, checkfirst=True)
+    BookingSlot.__table__.create(connection, checkfirst=True)
+
+def migrate_sqlite(connection, inspector):
+    """Rebuild booking_applications without the constraint, which SQLite cannot drop in place.
+    
+    The new table is filled before the old one is dropped, so a failure
+    part way leaves the old table and its rows in place.
+    """
+    table = BookingApplication.__table__
+    if slot_constraints(inspector):
+        for index in inspector.get_indexes(table.name):
+            connection.execute(text(f'DROP INDEX IF EXISTS {index["name"]}'))
+        # A scratch copy under another name, next to the tables its foreign keys point at
+        scratch = MetaData()
+        for referenced in {foreign_key.column.table for foreign_key in table.foreign_keys}:
+            referenced.to_metadata(scratch)
+        rebuilt = table.to_metadata(scratch, name=f'{table.name}_rebuilt')
+        rebuilt.create(connection)
+        
+        legacy = {column['name'] for column in inspector.get_columns(table.name)}
+        shared = ', '.join(column.name for column in table.columns if column.name in legacy)
+        # Copied as stored, keys included
+        copied = connection.execute(text(
+            f'INSERT INTO {rebuilt.name} ({shared}) SELECT {shared} FROM {table.name}'
+        )).rowcount
+        connection.execute(text(f'DROP TABLE {table.name}'))
+        connection.execute(text(f'ALTER TABLE {rebuilt.name} RENAME TO {table.name}'))
+        print(f'  booking_applications: {copied} rows')
+    else:
+        for name in LEGACY_INDEXES:
+            connection.execute(text(f'DROP INDEX IF EXISTS {name}'))
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    BookingSlot.__table__.create(connection, checkfirst=True)
+
+def migrate(dry_run=False):
+    """Move every shard of the configured database to per-slot place counting."""
+    app = create_app()
+    
+    with app.app_context():
+        changed = False
+        for shard in shard_router.all_shards():
+            engine = db.engines[shard] if shard is not None else db.engine
+            inspector = inspect(engine)
+            steps = pending_steps(inspector)
+            label = shard or 'database'
+            if not steps:
+                print(f'{label}: already migrated')
+                continue
+            print(f'{label}: {", ".join(steps)}')
+            
+            columns = {column['name'] for column in inspector.get_columns('booking_applications')}
+            if 'quota_week' not in columns:
+                raise SystemExit('booking_applications has no quota_week column, run `flask rebuild-quota-weeks` first.')
+            if dry_run:
+                continue
+            
+            if engine.dialect.name == 'sqlite':
+                with engine.connect() as connection:
+                    connection.execute(text('PRAGMA foreign_keys=OFF'))
+                    connection.commit()
+                    with connection.begin():
+                        migrate_sqlite(connection, inspector)
+            elif engine.dialect.name == 'postgresql':
+                with engine.begin() as connection:
+                    migrate_postgresql(connection, inspector)
+            else:
+                raise SystemExit(f'Unsupported database: {engine.dialect.name}')
+            changed = True
+        
+        if dry_run:
+            print('Dry run, no changes made.')
+            return
+        if changed:
+            # Pending and approved bookings already hold their places
+            print(f'Counted bookings in {slot_counter.rebuild()} slots')
+        print('Booking slots migrated successfully!')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replace the slot-wide booking constraint with per-slot place counts.')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would change.')
+    args = parser.parse_args()
+    migrate(dry_run=args.dry_run)
\ No newline at end of file
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Compact key migration for RoomieFlow
+Converts the 36-character string ids of an existing database to compact keys:
+native uuid columns on PostgreSQL, 16-byte BLOBs on SQLite
+"""
+
+from app import create_app, db
+from app.models.user import User
+from app.models.property import Property, PropertyMember
+from app.models.room import Room
+from app.models.booking import BookingApplication, ArchivedBooking
+from app.models.time_allocation import TimeAllocation
+from app.models.token_revocation import TokenRevocation
+from app.models.types import CompactUUID
+from sqlalchemy import inspect, select, text, Table, MetaData, String
+from sqlalchemy.schema import AddConstraint
+import argparse
+import uuid
+
+BATCH_SIZE = 1000
+
+def key_columns(table):
+    """Get the names of a table's compact key columns."""
+    return [column.name for column in table.columns if isinstance(column.type, CompactUUID)]
+
+def legacy_tables(inspector):
+    """Get the model tables that still store keys as strings, parents first."""
+    tables = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name) or not key_columns(table):
+            continue
+        columns = {column['name']: column['type'] for column in inspector.get_columns(table.name)}
+        if any(isinstance(columns.get(name), String) for name in key_columns(table)):
+            tables.append(table)
+    return tables
+
+def find_invalid_keys(connection, tables):
+    """List (table, column, value) for stored ids that are not valid UUIDs."""
+    invalid = []
+    for table in tables:
+        for name in key_columns(table):
+            rows = connection.execute(text(
+                f'SELECT DISTINCT {name} FROM {table.name} WHERE {name} IS NOT NULL'
+            ))
+            for (value,) in rows:
+                try:
+                    uuid.UUID(str(value))
+                except ValueError:
+                    invalid.append((table.name, name, value))
+    return invalid
+
+def migrate_postgresql(connection, inspector, tables):
+    """Convert key columns in place with ALTER COLUMN ... TYPE uuid."""
+    # Foreign keys pin the column types on both ends, so drop them first
+    for table in tables:
+        for foreign_key in inspector.get_foreign_keys(table.name):
+            connection.execute(text(f'ALTER TABLE {table.name} DROP CONSTRAINT {foreign_key["name"]}'))
+    
+    for table in tables:
+        for name in key_columns(table):
+            connection.execute(text(f'ALTER TABLE {table.name} ALTER COLUMN {name} TYPE uuid USING {name}::uuid'))
+    
+    for table in tables:
+        for constraint in table.foreign_key_constraints:
+            connection.execute(AddConstraint(constraint))
+
+def migrate_sqlite(connection, inspector, tables):
+    """Rebuild each table with BLOB keys and copy its rows across."""
+    for table in tables:
+        for index in inspector.get_indexes(table.name):
+            connection.execute(text(f'DROP INDEX IF EXISTS {index["name"]}'))
+        connection.execute(text(f'ALTER TABLE {table.name} RENAME TO {table.name}_legacy'))
+    
+    db.metadata.create_all(connection, tables=tables)
+    
+    legacy_metadata = MetaData()
+    for table in tables:
+        legacy = Table(f'{table.name}_legacy', legacy_metadata, autoload_with=connection)
+        shared = [column.name for column in table.columns if column.name in legacy.c]
+        result = connection.execute(select(*[legacy.c[name] for name in shared]))
+        copied = 0
+        while True:
+            rows = result.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            # Rows are inserted through the model table, so CompactUUID packs the ids
+            connection.execute(table.insert(), [dict(zip(shared, row)) for row in rows])
+            copied += len(rows)
+        connection.execute(text(f'DROP TABLE {table.name}_legacy'))
+        print(f'  {table.name}: {copied} rows')
+
+def migrate(dry_run=False):
+    """Convert every string key column of the configured database."""
+    app = create_app()
+    
+    with app.app_context():
+        engine = db.engine
+        inspector = inspect(engine)
+        tables = legacy_tables(inspector)
+        if not tables:
+            print('All key columns are already compact, nothing to do.')
+            return
+        
+        print(f'Tables with string keys: {", ".join(table.name for table in tables)}')
+        
+        with engine.connect() as connection:
+            invalid = find_invalid_keys(connection, tables)
+        if invalid:
+            for table_name, column_name, value in invalid[:20]:
+                print(f'  invalid id {value!r} in {table_name}.{column_name}')
+            raise SystemExit(f'{len(invalid)} stored ids are not valid UUIDs, fix them before migrating.')
+        
+        if dry_run:
+            print('Dry run, no changes made.')
+            return
+        
+        if engine.dialect.name == 'sqlite':
+            # Foreign key enforcement cannot be toggled inside a transaction
+            with engine.connect() as connection:
+                connection.execute(text('PRAGMA foreign_keys=OFF'))
+                connection.commit()
+                with connection.begin():
+                    migrate_sqlite(connection, inspector, tables)
+                connection.execute(text('VACUUM'))
+        elif engine.dialect.name == 'postgresql':
+            with engine.begin() as connection:
+                migrate_postgresql(connection, inspector, tables)
+        else:
+            raise SystemExit(f'Unsupported database: {engine.dialect.name}')
+        
+        print('Key columns converted successfully!')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert string ids to compact keys.')
+    parser.add_argument('--dry-run', action='store_true', help='Only check the stored ids.')
+    args = parser.parse_args()
+    migrate(dry_run=args.dry_run)
\ No newline at end of file
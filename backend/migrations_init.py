@@ -4,17 +4,19 @@ Database initialization script for RoomieFlow
 This script creates the database tables and sets up the initial schema
 """
 
-import app as app_module
-from app_package.models.user import User
-from app_package.models.property import Property, PropertyMember
-from app_package.models.room import Room
-from app_package.models.booking import BookingApplication
-from app_package.models.time_allocation import TimeAllocation
+from app import create_app, db
+from app.models.user import User
+from app.models.property import Property, PropertyMember
+from app.models.room import Room
+from app.models.booking import BookingApplication, BookingSlot, ArchivedBooking
+from app.models.time_allocation import TimeAllocation
+from app.models.token_revocation import TokenRevocation
+from app.models.notification import NotificationOutbox
+from app.models.change_log import ChangeLogEntry
 
 def init_db():
     """Initialize the database with tables."""
-    app = app_module.create_app()
-    db = app_module.db
+    app = create_app()
     
     with app.app_context():
         # Create all tables
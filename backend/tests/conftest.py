@@ -0,0 +1,39 @@
+"""
+Shared fixtures for the RoomieFlow test suite.
+
+Each test gets the real app on a throwaway SQLite database, seeded like the
+benchmarks: one property, its owner and members member000... (password
+Password1) and rooms with capacities 1, 2 and 3.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import make_app, seed, login, cleanup
+
+@pytest.fixture
+def app():
+    from app.utils.revocation import revocation_registry
+    app, path = make_app(LOADSHED_ENABLED=False)
+    # The registry is a process-wide singleton, so forget the previous test's database
+    revocation_registry.reset()
+    yield app
+    revocation_registry.reset()
+    cleanup(path)
+
+@pytest.fixture
+def data(app):
+    return seed(app, members=17, rooms=3, weeks=1)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def auth(client):
+    """Log in as a seeded user and return the Authorization header."""
+    return lambda username: login(client, username)
\ No newline at end of file
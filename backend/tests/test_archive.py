@@ -0,0 +1,90 @@
+"""Archiving: bookings move shard by shard and synced clients see them go."""
+
+from datetime import date, timedelta
+
+from app import db
+from app.models.booking import BookingApplication, ArchivedBooking
+from app.utils.archive import booking_archive
+from tests.test_sync import sync, drain
+
+def past_week():
+    today = date.today()
+    return today - timedelta(days=today.weekday(), weeks=60)
+
+def test_archived_bookings_sync_as_deletes(app, client, auth):
+    from benchmarks.common import seed
+    seed(app, members=5, rooms=3, weeks=1, start=past_week())
+    member = auth('member001')
+    cursor = drain(client, member)[1][-1]
+    with app.app_context():
+        archived = {booking.id for booking in BookingApplication.query.all()}
+    assert archived
+    
+    with app.app_context():
+        result = booking_archive.archive(chunk_size=4)
+        assert result['moved'] == len(archived)
+        assert BookingApplication.query.count() == 0
+        assert ArchivedBooking.query.count() == len(archived)
+    
+    changes, _ = drain(client, member, cursor)
+    assert {change['id'] for change in changes if change['type'] == 'booking' and change['action'] == 'delete'} == archived
+    # A fresh snapshot no longer carries them either
+    assert not [change for change in sync(client, member)['changes'] if change['type'] == 'booking']
+
+def shard_rows(model, shard):
+    from app.utils.sharding import shard_router
+    return db.session.execute(
+        db.select(db.func.count()).select_from(model.__table__),
+        bind_arguments=shard_router.bind_arguments(shard)
+    ).scalar()
+
+def test_archive_on_a_sharded_deployment(tmp_path, monkeypatch):
+    from benchmarks.common import make_app, cleanup
+    from app.models.user import User
+    from app.models.property import Property
+    from app.models.room import Room
+    from app.models.time_allocation import quota_week_start
+    from app.utils.sharding import shard_router
+    from app.utils.revocation import revocation_registry
+    monkeypatch.setenv('SHARD_DATABASE_URLS', ','.join(f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(2)))
+    app, path = make_app(LOADSHED_ENABLED=False)
+    revocation_registry.reset()
+    try:
+        with app.app_context():
+            for shard in shard_router.shard_ids:
+                db.metadata.create_all(db.engines[shard])
+            owner = User(username='owner', email='owner@example.com', role='admin')
+            owner.set_password('Password1')
+            db.session.add(owner)
+            db.session.commit()
+            # Seeded through the ORM, which routes each row to its property's shard
+            placed = set()
+            while placed != set(shard_router.shard_ids):
+                property_obj = Property(name=f'House {len(placed)}', owner_id=owner.id)
+                db.session.add(property_obj)
+                db.session.flush()
+                room = Room(property_id=property_obj.id, name='Room', capacity=3)
+                db.session.add(room)
+                db.session.flush()
+                for day in range(3):
+                    booking_date = past_week() + timedelta(days=day)
+                    db.session.add(BookingApplication(
+                        user_id=owner.id, room_id=room.id, booking_date=booking_date, session_type='morning',
+                        status='approved', duration_value=0.5, quota_week=quota_week_start(booking_date)
+                    ))
+                db.session.commit()
+                placed.add(shard_router.shard_for_property(property_obj.id))
+            booked = [shard_rows(BookingApplication, shard) for shard in shard_router.shard_ids]
+            assert all(booked)
+            
+            assert booking_archive.archive(chunk_size=4)['moved'] == sum(booked)
+            
+            # Each shard's bookings stay on that shard
+            assert [shard_rows(BookingApplication, shard) for shard in shard_router.shard_ids] == [0, 0]
+            assert [shard_rows(ArchivedBooking, shard) for shard in shard_router.shard_ids] == booked
+    finally:
+        revocation_registry.reset()
+        # Flask-SQLAlchemy keeps a metadata per bind it has seen; later apps have no shard binds
+        for shard in shard_router.shard_ids:
+            db.metadatas.pop(shard, None)
+        cleanup(path)
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""Batch sub-requests run their registered views and fail one at a time."""
+
+def batch(client, headers, requests):
+    response = client.post('/api/batch/', headers=headers, json={'requests': requests})
+    assert response.status_code == 200
+    return response.get_json()['responses']
+
+def test_sub_requests_answer_by_name(app, data, client, auth):
+    responses = batch(client, auth('member001'), {
+        'me': '/api/auth/me',
+        'properties': '/api/properties/',
+        'analytics': f"/api/properties/{data['property_id']}/analytics"
+    })
+    
+    assert responses['me']['status'] == 200
+    assert responses['me']['body']['user']['username'] == 'member001'
+    assert responses['properties']['status'] == 200
+    # Not on the list of batchable reads
+    assert responses['analytics']['status'] == 400
+
+def test_failing_view_fails_only_its_sub_request(app, data, client, auth):
+    def broken(**view_args):
+        raise RuntimeError('boom')
+    app.view_functions['rooms.get_rooms'] = broken
+    
+    responses = batch(client, auth('member001'), {
+        'rooms': '/api/rooms/',
+        'me': '/api/auth/me'
+    })
+    
+    assert responses['rooms']['status'] == 500
+    assert responses['me']['status'] == 200
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""Cached charts and usage pick up changes made by other workers on the next read."""
+
+import multiprocessing
+
+from app import db
+from app.models.property import Property
+from app.models.room import Room
+from app.models.time_allocation import TimeAllocation
+from app.models.user import User
+
+MODELS = {'property': Property, 'room': Room, 'time_allocation': TimeAllocation, 'user': User}
+
+def change_in_process(model, object_id, values):
+    """Update one row from a separate app instance, as another worker would."""
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        instance = db.session.get(MODELS[model], object_id)
+        for name, value in values.items():
+            setattr(instance, name, value)
+        db.session.commit()
+
+def change_elsewhere(model, object_id, **values):
+    # Spawned, so this process's caches hear nothing of the commit
+    process = multiprocessing.get_context('spawn').Process(target=change_in_process, args=(model, object_id, values))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+def weekly(client, headers, data):
+    response = client.get(
+        f"/api/bookings/weekly?property_id={data['property_id']}&week_start={data['start'].isoformat()}",
+        headers=headers
+    )
+    assert response.status_code == 200
+    return [entry for sessions in response.get_json()['bookings'].values()
+            for entries in sessions.values() for entry in entries]
+
+def usage(client, headers, data):
+    response = client.get(f"/api/usage/weekly?week_start={data['start'].isoformat()}", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['property_breakdown']
+
+def test_room_renamed_by_another_worker(app, data, client, auth):
+    headers = auth('member001')
+    room_id = weekly(client, headers, data)[0]['room_id']
+    
+    change_elsewhere('room', room_id, name='Renamed Room')
+    
+    names = {entry['room_name'] for entry in weekly(client, headers, data) if entry['room_id'] == room_id}
+    assert names == {'Renamed Room'}
+
+def test_user_renamed_by_another_worker(app, data, client, auth):
+    headers = auth('member001')
+    entry = weekly(client, headers, data)[0]
+    
+    change_elsewhere('user', entry['user_id'], username='renamed')
+    
+    users = {row['user'] for row in weekly(client, headers, data) if row['user_id'] == entry['user_id']}
+    assert users == {'renamed'}
+
+def test_usage_follows_another_worker(app, data, client, auth):
+    headers = auth('member001')
+    assert usage(client, headers, data)[0]['weekly_limit'] == 3.0
+    with app.app_context():
+        allocation_id = TimeAllocation.query.filter_by(property_id=data['property_id']).one().id
+    
+    change_elsewhere('time_allocation', allocation_id, weekly_limit_days=5.0)
+    assert usage(client, headers, data)[0]['weekly_limit'] == 5.0
+    
+    change_elsewhere('property', data['property_id'], name='Renamed House')
+    assert usage(client, headers, data)[0]['property_name'] == 'Renamed House'
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""/api/metrics counts every request, failed ones included, and only admins or the scraper may read it."""
+
+import re
+
+import pytest
+
+def requests_total(text, endpoint, status):
+    match = re.search(rf'^roomieflow_requests_total\{{endpoint="{re.escape(endpoint)}",method="GET",status="{status}"\}} (\d+)$',
+                      text, re.M)
+    return int(match.group(1)) if match else 0
+
+def test_metrics_need_an_admin(app, data, client, auth):
+    assert client.get('/api/metrics').status_code == 403
+    assert client.get('/api/metrics', headers=auth('member001')).status_code == 403
+    assert client.get('/api/metrics', headers=auth('owner')).status_code == 200
+
+def test_metrics_token_lets_the_scraper_in(app, data, client):
+    app.config['METRICS_TOKEN'] = 'scraper-token'
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer scraper-token'}).status_code == 200
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+
+def test_unhandled_exceptions_are_counted(app, data, client, auth):
+    headers = auth('owner')
+    before = requests_total(client.get('/api/metrics', headers=headers).get_data(as_text=True), 'health_check', 500)
+    
+    def broken():
+        raise RuntimeError('boom')
+    app.view_functions['health_check'] = broken
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    assert client.get('/api/health').status_code == 500
+    
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    with pytest.raises(RuntimeError):
+        client.get('/api/health')
+    
+    after = requests_total(client.get('/api/metrics', headers=headers).get_data(as_text=True), 'health_check', 500)
+    assert after - before == 2
\ No newline at end of file
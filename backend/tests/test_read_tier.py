@@ -0,0 +1,64 @@
+"""The async read tier serves the same reads without blocking its event loop on shared backends."""
+
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip('greenlet')
+pytest.importorskip('aiosqlite')
+
+from app.read_tier import create_read_app, Offloaded
+from app.utils.ratelimit import rate_limiter, parse_rate
+from app.utils.response_cache import response_cache
+
+async def get(tier, path, headers, query=''):
+    """Send one GET through the ASGI app; return (status, body)."""
+    sent = []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        sent.append(message)
+    
+    await tier({
+        'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    }, receive, send)
+    return sent[0]['status'], sent[1]['body']
+
+@pytest.fixture
+def tier(app, tmp_path, monkeypatch):
+    monkeypatch.setenv('RATELIMIT_STORAGE', f"sqlite:///{tmp_path / 'ratelimit.db'}")
+    monkeypatch.setenv('RESPONSE_CACHE_SHARED', f"sqlite:///{tmp_path / 'responses.db'}")
+    tier = create_read_app()
+    yield tier
+    asyncio.run(tier.shutdown())
+
+def test_shared_backends_run_off_the_event_loop(tier, data, auth):
+    headers = auth('member001')
+    assert isinstance(rate_limiter.backend, Offloaded)
+    assert isinstance(response_cache.shared, Offloaded)
+    rate_limiter.policies['bookings.get_weekly_bookings'] = [('user', *parse_rate('5/minute'))]
+    
+    threads = set()
+    consume = rate_limiter.backend.target.consume
+    
+    def recording_consume(*args):
+        threads.add(threading.get_ident())
+        return consume(*args)
+    rate_limiter.backend.target.consume = recording_consume
+    
+    async def run():
+        query = f"property_id={data['property_id']}&week_start={data['start'].isoformat()}"
+        return await asyncio.gather(*[get(tier, '/api/bookings/weekly', headers, query) for _ in range(8)])
+    
+    statuses = sorted(status for status, _ in asyncio.run(run()))
+    
+    assert statuses == [200] * 5 + [429] * 3
+    assert threads and threading.get_ident() not in threads
+
+def test_other_endpoints_stay_on_the_main_api(tier, data, auth):
+    status, _ = asyncio.run(get(tier, '/api/users/', auth('owner')))
+    assert status == 404
\ No newline at end of file
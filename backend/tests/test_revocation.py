@@ -0,0 +1,113 @@
+"""Logging out revokes tokens in this worker at once and in other workers after their next sync."""
+
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.token_revocation import TokenRevocation
+from app.models.user import User
+from app.utils.revocation import revocation_registry
+
+def session(client, username='member001'):
+    """Log in and return (access headers, refresh headers)."""
+    tokens = client.post('/api/auth/login', json={'username': username, 'password': 'Password1'}).get_json()
+    return ({'Authorization': f"Bearer {tokens['access_token']}"},
+            {'Authorization': f"Bearer {tokens['refresh_token']}"})
+
+def test_logout_revokes_only_its_session(app, data, client):
+    access, refresh = session(client)
+    other, _ = session(client)
+    
+    assert client.post('/api/auth/logout', headers=access, json={}).status_code == 200
+    
+    assert client.get('/api/auth/me', headers=access).status_code == 401
+    assert client.post('/api/auth/refresh', headers=refresh).status_code == 401
+    assert client.get('/api/auth/me', headers=other).status_code == 200
+
+def test_logout_everywhere_revokes_every_session(app, data, client):
+    access, _ = session(client)
+    other, other_refresh = session(client)
+    bystander, _ = session(client, 'member002')
+    
+    response = client.post('/api/auth/logout', headers=access, json={'all_sessions': True})
+    assert response.status_code == 200
+    
+    assert client.get('/api/auth/me', headers=other).status_code == 401
+    assert client.post('/api/auth/refresh', headers=other_refresh).status_code == 401
+    assert client.get('/api/auth/me', headers=bystander).status_code == 200
+    # A later login starts a session above the floor
+    assert client.get('/api/auth/me', headers=session(client)[0]).status_code == 200
+
+def test_refreshed_token_belongs_to_the_session(app, data, client):
+    access, refresh = session(client)
+    refreshed = {'Authorization': f"Bearer {client.post('/api/auth/refresh', headers=refresh).get_json()['access_token']}"}
+    
+    client.post('/api/auth/logout', headers=access, json={})
+    
+    assert client.get('/api/auth/me', headers=refreshed).status_code == 401
+
+def test_revocation_from_another_worker_applies_after_sync(app, data, client):
+    access, _ = session(client)
+    assert client.get('/api/auth/me', headers=access).status_code == 200
+    
+    # Another worker logs the user out everywhere; this one only sees the row
+    with app.app_context():
+        user = User.query.filter_by(username='member001').first()
+        db.session.add(TokenRevocation(user_id=user.id, epoch=2 ** 62, all_sessions=True,
+                                       expires_at=datetime.utcnow() + timedelta(days=30)))
+        db.session.commit()
+    assert client.get('/api/auth/me', headers=access).status_code == 200
+    
+    revocation_registry.sync_interval = 0
+    assert client.get('/api/auth/me', headers=access).status_code == 401
+
+def test_late_revocation_is_pulled_whatever_its_timestamp(app, data, client):
+    access, _ = session(client)
+    other, _ = session(client, 'member002')
+    client.post('/api/auth/logout', headers=other, json={})
+    assert client.get('/api/auth/me', headers=access).status_code == 200
+    
+    # Written by a worker whose clock runs an hour behind, after this one already synced a newer row
+    with app.app_context():
+        user = User.query.filter_by(username='member001').first()
+        db.session.add(TokenRevocation(user_id=user.id, epoch=2 ** 62, all_sessions=True,
+                                       revoked_at=datetime.utcnow() - timedelta(hours=1),
+                                       expires_at=datetime.utcnow() + timedelta(days=30)))
+        db.session.commit()
+    
+    revocation_registry.sync_interval = 0
+    assert client.get('/api/auth/me', headers=access).status_code == 401
+
+def test_session_revocation_outlives_its_last_access_token(app, data, client):
+    access, _ = session(client)
+    client.post('/api/auth/logout', headers=access, json={})
+    
+    with app.app_context():
+        revocation = TokenRevocation.query.one()
+        started = datetime.utcfromtimestamp(revocation.epoch / 1000)
+        lifetime = app.config['JWT_REFRESH_TOKEN_EXPIRES'] + app.config['JWT_ACCESS_TOKEN_EXPIRES']
+        assert revocation.expires_at >= started + lifetime
+def test_logout_on_a_sharded_deployment(tmp_path, monkeypatch):
+    from benchmarks.common import make_app, cleanup
+    from app.utils.sharding import shard_router
+    monkeypatch.setenv('SHARD_DATABASE_URLS', ','.join(f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(2)))
+    app, path = make_app()
+    revocation_registry.reset()
+    try:
+        with app.app_context():
+            for shard in shard_router.shard_ids:
+                db.metadata.create_all(db.engines[shard])
+        client = app.test_client()
+        response = client.post('/api/auth/register', json={
+            'username': 'sharded', 'email': 'sharded@example.com', 'password': 'Password1'
+        })
+        access = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        
+        assert client.post('/api/auth/logout', headers=access, json={}).status_code == 200
+        revocation_registry.reset()
+        assert client.get('/api/auth/me', headers=access).status_code == 401
+    finally:
+        revocation_registry.reset()
+        # Flask-SQLAlchemy keeps a metadata per bind it has seen; later apps have no shard binds
+        for shard in shard_router.shard_ids:
+            db.metadatas.pop(shard, None)
+        cleanup(path)
\ No newline at end of file
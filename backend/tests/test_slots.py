@@ -0,0 +1,103 @@
+"""Concurrent booking requests must never take more places than a room has."""
+
+import multiprocessing
+import threading
+from datetime import timedelta
+
+from app import db
+from app.models.booking import BookingApplication, BookingSlot
+from app.models.room import Room
+
+def hammer(app, headers, body):
+    """Send the same booking request from one thread per header set at once; return the statuses."""
+    statuses = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(headers))
+    
+    def send(header):
+        client = app.test_client()
+        barrier.wait()
+        response = client.post('/api/bookings/', headers=header, json=body)
+        with lock:
+            statuses.append(response.status_code)
+    
+    threads = [threading.Thread(target=send, args=(header,)) for header in headers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+def book_in_process(header, body):
+    """Send a booking request from a separate app instance, as another worker would."""
+    from app import create_app
+    app = create_app()
+    app.config.update(RATELIMIT_ENABLED=False, LOADSHED_ENABLED=False)
+    return app.test_client().post('/api/bookings/', headers=header, json=body).status_code
+
+def slot_state(app, room_id, booking_date, session_type):
+    """Get (active booking rows, counted places) of one slot."""
+    with app.app_context():
+        rows = BookingApplication.query.filter_by(
+            room_id=room_id, booking_date=booking_date, session_type=session_type
+        ).filter(BookingApplication.status.in_(['pending', 'approved'])).count()
+        slot = db.session.get(BookingSlot, (room_id, booking_date, session_type))
+        return rows, slot.booked if slot else 0
+
+def room_with_capacity(app, capacity):
+    with app.app_context():
+        return Room.query.filter_by(capacity=capacity).first().id
+
+def free_slot(data, days=0):
+    # Past the seeded week, so every slot starts empty
+    return (data['start'] + timedelta(weeks=2, days=days)).isoformat()
+
+def test_crowd_never_overbooks(app, data, auth):
+    room_id = room_with_capacity(app, 3)
+    headers = [auth(f'member{i:03d}') for i in range(16)]
+    body = {'room_id': room_id, 'booking_date': free_slot(data), 'session_type': 'morning'}
+    
+    statuses = hammer(app, headers, body)
+    
+    assert statuses.count(201) == 3
+    assert statuses.count(409) == 13
+    rows, booked = slot_state(app, room_id, data['start'] + timedelta(weeks=2), 'morning')
+    assert rows == booked == 3
+
+def test_workers_never_overbook(app, data, auth):
+    room_id = room_with_capacity(app, 2)
+    headers = [auth(f'member{i:03d}') for i in range(6)]
+    body = {'room_id': room_id, 'booking_date': free_slot(data, 3), 'session_type': 'morning'}
+    
+    # Spawned processes share nothing but the database file
+    with multiprocessing.get_context('spawn').Pool(len(headers)) as pool:
+        statuses = pool.starmap(book_in_process, [(header, body) for header in headers])
+    
+    assert statuses.count(201) == 2
+    assert statuses.count(409) == 4
+    rows, booked = slot_state(app, room_id, data['start'] + timedelta(weeks=2, days=3), 'morning')
+    assert rows == booked == 2
+
+def test_double_submit_takes_one_place(app, data, auth):
+    room_id = room_with_capacity(app, 3)
+    body = {'room_id': room_id, 'booking_date': free_slot(data, 1), 'session_type': 'evening'}
+    
+    statuses = hammer(app, [auth('member001')] * 16, body)
+    
+    assert statuses.count(201) == 1
+    assert statuses.count(409) == 15
+    rows, booked = slot_state(app, room_id, data['start'] + timedelta(weeks=2, days=1), 'evening')
+    assert rows == booked == 1
+
+def test_rejection_gives_the_place_back(app, data, client, auth):
+    room_id = room_with_capacity(app, 1)
+    body = {'room_id': room_id, 'booking_date': free_slot(data, 2), 'session_type': 'midday'}
+    
+    first = client.post('/api/bookings/', headers=auth('member001'), json=body)
+    assert first.status_code == 201
+    assert client.post('/api/bookings/', headers=auth('member002'), json=body).status_code == 409
+    
+    booking_id = first.get_json()['booking']['id']
+    response = client.put(f'/api/bookings/{booking_id}/reject', headers=auth('owner'), json={})
+    assert response.status_code == 200
+    assert client.post('/api/bookings/', headers=auth('member002'), json=body).status_code == 201
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""Delta sync paging: snapshot pages, log paging and snapshots of newly granted properties."""
+
+from datetime import timedelta
+from urllib.parse import quote
+
+from app import db
+from app.models.property import Property, PropertyMember
+from app.models.room import Room
+from app.models.user import User
+
+def sync(client, headers, cursor=None, limit=None):
+    params = []
+    if cursor is not None:
+        params.append(f'cursor={quote(cursor)}')
+    if limit is not None:
+        params.append(f'limit={limit}')
+    response = client.get('/api/sync' + ('?' + '&'.join(params) if params else ''), headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+def drain(client, headers, cursor=None, limit=None):
+    """Follow has_more to the end; return every change and the cursors handed out."""
+    changes, cursors = [], []
+    while True:
+        page = sync(client, headers, cursor, limit)
+        changes.extend(page['changes'])
+        cursor = page['cursor']
+        cursors.append(cursor)
+        if not page['has_more']:
+            return changes, cursors
+
+def keys(changes):
+    return sorted((change['type'], change['action'], change['id']) for change in changes)
+
+def test_paged_snapshot_matches_one_page(app, data, client, auth):
+    member = auth('member001')
+    whole = sync(client, member)
+    assert not whole['has_more']
+    
+    paged, cursors = drain(client, member, limit=7)
+    
+    assert len(cursors) > 1
+    assert all(cursor.startswith('snapshot|') for cursor in cursors[:-1])
+    assert keys(paged) == keys(whole['changes'])
+    assert len(paged) == len({(change['type'], change['id']) for change in paged})
+    assert cursors[-1] == whole['cursor']
+    # Nothing changed since, so the log has nothing more
+    assert sync(client, member, cursors[-1])['changes'] == []
+
+def test_log_pages_carry_every_change(app, data, client, auth):
+    member = auth('member001')
+    cursor = sync(client, member)['cursor']
+    
+    created = set()
+    for day in range(5):
+        for session_type in ('morning', 'midday', 'evening'):
+            response = client.post('/api/bookings/', headers=member, json={
+                'room_id': data['room_ids'][2],
+                'booking_date': (data['start'] + timedelta(weeks=2, days=day)).isoformat(),
+                'session_type': session_type
+            })
+            if response.status_code == 201:
+                created.add(response.get_json()['booking']['id'])
+    assert created
+    
+    changes, _ = drain(client, member, cursor, limit=4)
+    
+    assert {change['id'] for change in changes if change['type'] == 'booking'} == created
+
+def test_granted_property_arrives_as_snapshot_pages(app, data, client, auth):
+    member = auth('member001')
+    cursor = sync(client, member)['cursor']
+    
+    with app.app_context():
+        owner = db.session.get(User, data['owner_id'])
+        property_obj = Property(name='Second House', description='Granted later', owner_id=owner.id)
+        db.session.add(property_obj)
+        db.session.flush()
+        room_ids = set()
+        for i in range(5):
+            room = Room(property_id=property_obj.id, name=f'Annex {i + 1}', capacity=2)
+            db.session.add(room)
+            db.session.flush()
+            room_ids.add(room.id)
+        member_id = User.query.filter_by(username='member001').first().id
+        db.session.add(PropertyMember(property_id=property_obj.id, user_id=member_id,
+                                      role='member', invitation_status='accepted'))
+        db.session.commit()
+        property_id = property_obj.id
+    
+    changes, cursors = drain(client, member, cursor, limit=2)
+    
+    # The new property and its rooms take several snapshot pages
+    assert sum(cursor.startswith('snapshot|') for cursor in cursors) >= 3
+    assert ('property', property_id) in {(change['type'], change['id']) for change in changes}
+    assert {change['id'] for change in changes if change['type'] == 'room'} == room_ids
+    assert not cursors[-1].startswith('snapshot|')
+
+def test_invalid_cursor_is_rejected(app, data, client, auth):
+    member = auth('member001')
+    for cursor in ('garbage', 'snapshot|1|x', 'snapshot|0||unknown|1|*'):
+        response = client.get(f'/api/sync?cursor={quote(cursor)}', headers=member)
+        assert response.status_code == 400
\ No newline at end of file
@@ -5,6 +5,7 @@ export const useAuthStore = defineStore('auth', {
   state: () => ({
     user: null,
     token: localStorage.getItem('token') || null,
+    refreshTokenValue: localStorage.getItem('refresh_token') || null,
     initialized: false
   }),
 
@@ -27,12 +28,10 @@ export const useAuthStore = defineStore('auth', {
     async login(credentials) {
       try {
         const response = await api.post('/auth/login', credentials)
-        const { user, access_token } = response.data
+        const { user, access_token, refresh_token } = response.data
 
         this.user = user
-        this.token = access_token
-        
-        localStorage.setItem('token', access_token)
+        this.setTokens(access_token, refresh_token)
         
         return { success: true }
       } catch (error) {
@@ -44,12 +43,10 @@ export const useAuthStore = defineStore('auth', {
     async register(userData) {
       try {
         const response = await api.post('/auth/register', userData)
-        const { user, access_token } = response.data
+        const { user, access_token, refresh_token } = response.data
 
         this.user = user
-        this.token = access_token
-        
-        localStorage.setItem('token', access_token)
+        this.setTokens(access_token, refresh_token)
         
         return { success: true }
       } catch (error) {
@@ -70,14 +67,20 @@ export const useAuthStore = defineStore('auth', {
     },
 
     async refreshToken() {
+      if (!this.refreshTokenValue) {
+        this.logout()
+        return { success: false }
+      }
+
       try {
-        const response = await api.post('/auth/refresh')
-        const { user, access_token } = response.data
+        // Refresh is authenticated with the long-lived refresh token
+        const response = await api.post('/auth/refresh', null, {
+          headers: { Authorization: `Bearer ${this.refreshTokenValue}` },
+          skipAuthRefresh: true
+        })
+        const { access_token } = response.data
 
-        this.user = user
-        this.token = access_token
-        
-        localStorage.setItem('token', access_token)
+        this.setTokens(access_token, this.refreshTokenValue)
         
         return { success: true }
       } catch (error) {
@@ -86,10 +89,39 @@ export const useAuthStore = defineStore('auth', {
       }
     },
 
+    setTokens(accessToken, refreshToken) {
+      this.token = accessToken
+      this.refreshTokenValue = refreshToken || null
+      
+      localStorage.setItem('token', accessToken)
+      if (refreshToken) {
+        localStorage.setItem('refresh_token', refreshToken)
+      } else {
+        localStorage.removeItem('refresh_token')
+      }
+    },
+
+    async signOut() {
+      // Revoke the session server-side, then clear local state regardless
+      if (this.refreshTokenValue) {
+        try {
+          await api.post('/auth/logout', null, {
+            headers: { Authorization: `Bearer ${this.refreshTokenValue}` },
+            skipAuthRefresh: true
+          })
+        } catch (error) {
+          // Ignore, the local session is cleared below
+        }
+      }
+      this.logout()
+    },
+
     logout() {
       this.user = null
       this.token = null
+      this.refreshTokenValue = null
       localStorage.removeItem('token')
+      localStorage.removeItem('refresh_token')
     }
   }
 })
\ No newline at end of file
@@ -12,7 +12,7 @@ api.interceptors.request.use(
     const authStore = useAuthStore()
     const token = authStore.token
     
-    if (token) {
+    if (token && !config.headers.Authorization) {
       config.headers.Authorization = `Bearer ${token}`
     }
     
@@ -28,8 +28,17 @@ api.interceptors.response.use(
   (response) => response,
   async (error) => {
     const authStore = useAuthStore()
+    const original = error.config
     
-    if (error.response?.status === 401 && authStore.isAuthenticated) {
+    if (error.response?.status === 401 && original && !original.skipAuthRefresh && !original._retried) {
+      // Access token expired, try once with a fresh one from the refresh token
+      original._retried = true
+      const result = await authStore.refreshToken()
+      if (result.success) {
+        original.headers.Authorization = `Bearer ${authStore.token}`
+        return api(original)
+      }
+    } else if (error.response?.status === 401 && authStore.isAuthenticated) {
       // Token expired, logout user
       authStore.logout()
     }